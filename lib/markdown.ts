@@ -2,10 +2,13 @@ import { remark } from "remark";
 import html from "remark-html";
 import remarkGfm from "remark-gfm";
 
-export async function markdownToHtml(markdown: string): Promise<string> {
+export async function markdownToHtml(
+  markdown: string,
+  { sanitize = false }: { sanitize?: boolean } = {},
+): Promise<string> {
   const result = await remark()
     .use(remarkGfm)
-    .use(html, { sanitize: false })
+    .use(html, { sanitize })
     .process(markdown);
   return result.toString();
 }
@@ -81,6 +81,8 @@ export const ManifestPartSchema = z.object({
     part: z.string().min(1),
     quest: z.string().min(1),
     lessons: z.array(z.string().min(1)).min(1),
+    // sha256 of each lesson file, keyed by path; written by generate-rich-lessons.py --write-manifest
+    lesson_hashes: z.record(z.string(), z.string()).optional(),
   }),
 });
 
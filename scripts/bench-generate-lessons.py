@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Benchmark the rich lesson generator on a synthetic content pack.
+
+Builds a pack of WEEKS × DAYS lessons (each with STEPS do-steps of CONTENT
+characters) in a temp directory and times each generator stage separately:
+make_week_lessons, box_diagram (cold and from the render cache), the lesson index + find_lesson_file,
+generate_lesson, stream_lesson (fresh and unchanged files) and render_and_write
+on unchanged files, the path a build takes for every lesson it does not skip.
+
+For every stage it reports wall and CPU seconds, lessons/second, how much the
+process's peak RSS grew, read/write syscall counts and directory scans as
+JSON, so runs from different commits can be diffed or compared with --compare.
+The syscall counts come from /proc/self/io (null where unavailable), which
+counts read(2)/write(2)-family calls only, not getdents; directory scans are
+therefore counted separately, as calls to os.scandir and os.listdir.
+
+Usage: python3 scripts/bench-generate-lessons.py [--weeks 24] [--days 5] [--steps 6]
+                                                 [--content 800] [--repeat 3]
+                                                 [--output bench.json] [--compare old.json]
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import importlib.util
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+GENERATOR_PATH = os.path.join(os.path.dirname(__file__), 'generate-rich-lessons.py')
+
+
+def load_generator():
+    spec = importlib.util.spec_from_file_location('generate_rich_lessons', GENERATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ─── SYNTHETIC PACK ───────────────────────────────────────────────────────────
+
+def _text(n, seed):
+    """Deterministic filler text of about n characters."""
+    words = ('event', 'loop', 'socket', 'buffer', 'state', 'EAGAIN', 'poll', 'fd', 'client', 'frame')
+    out = []
+    size = 0
+    i = seed
+    while size < n:
+        w = words[i % len(words)]
+        out.append(w)
+        size += len(w) + 1
+        i += 7
+    return ' '.join(out)
+
+
+def make_spec(week, day, steps, content):
+    return {
+        'slug': f'synthetic-topic-{day}',
+        'title': f'Quest: Synthetic W{week:02d} Day {day}  2h',
+        'goal_intro': _text(200, week * day),
+        'goal_deliverables': [_text(80, i) for i in range(4)],
+        'pass_criteria': [(_text(40, i), _text(40, i + 1)) for i in range(5)],
+        'build_desc': _text(160, day),
+        'build_deliverables': [_text(80, i) for i in range(4)],
+        'done_example': '\n'.join(_text(60, i) for i in range(content // 60 + 1)),
+        'code_lang': 'cpp',
+        'can_do': _text(80, 1),
+        'cannot_yet': _text(80, 2),
+        'why_without': [_text(80, i) for i in range(4)],
+        'why_with': [_text(80, i) for i in range(4)],
+        'why_connects': [_text(80, i) for i in range(5)],
+        'mental_model_name': 'Synthetic Model',
+        'mental_model_desc': _text(400, week),
+        'visual_model': '',
+        'ship_file': f'week-{week}/day{day}-synthetic.md',
+        'do_steps': [
+            {'title': _text(40, i), 'why': _text(120, i), 'content': _text(content, i)}
+            for i in range(steps)
+        ],
+        'done_when': [_text(80, i) for i in range(5)],
+        'proof_instruction': _text(120, 3),
+        'self_test': [(_text(60, i), _text(100, i)) for i in range(3)],
+    }
+
+
+def diagram_rows(week, day):
+    return [f'{_text(30, week + i)} ──▶ {_text(20, day + i)}' for i in range(8)]
+
+
+def make_pack_dirs(base_dir, weeks, days):
+    """Create parts/<week>/lessons/NN-*.md stubs the generator can resolve."""
+    for week in range(1, weeks + 1):
+        lessons_dir = os.path.join(base_dir, f'w{week:02d}', 'lessons')
+        os.makedirs(lessons_dir)
+        for day in range(1, days + 1):
+            with open(os.path.join(lessons_dir, f'{day:02d}-synthetic-topic-{day}.md'), 'w') as f:
+                f.write('---\ntitle: stub\n---\n')
+
+
+# ─── MEASUREMENT ──────────────────────────────────────────────────────────────
+
+def _io_counters():
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['syscr']), int(fields['syscw'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+@contextlib.contextmanager
+def count_dir_scans():
+    """Count os.scandir/os.listdir calls in the block: [count]."""
+    counter = [0]
+    originals = os.scandir, os.listdir
+
+    def counted(fn):
+        def wrapper(*args, **kwargs):
+            counter[0] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+    os.scandir, os.listdir = counted(os.scandir), counted(os.listdir)
+    try:
+        yield counter
+    finally:
+        os.scandir, os.listdir = originals
+
+
+def measure(fn, items, repeat):
+    """Run fn(items) `repeat` times and keep the fastest run's numbers.
+
+    peak_rss_growth_kb is how far the process-wide high-water mark rose over
+    all runs of this stage; it is 0 for stages that fit in memory already used.
+    """
+    best = None
+    rss_before = _peak_rss_kb()
+    for _ in range(repeat):
+        io_before = _io_counters()
+        cpu_before = time.process_time()
+        wall_before = time.perf_counter()
+        with count_dir_scans() as scans:
+            fn(items)
+        wall = time.perf_counter() - wall_before
+        cpu = time.process_time() - cpu_before
+        io_after = _io_counters()
+        if best is None or wall < best['wall_s']:
+            best = {
+                'wall_s': round(wall, 6),
+                'cpu_s': round(cpu, 6),
+                'items': len(items),
+                'items_per_s': round(len(items) / wall, 1) if wall > 0 else None,
+                'read_syscalls': io_after[0] - io_before[0] if io_before and io_after else None,
+                'write_syscalls': io_after[1] - io_before[1] if io_before and io_after else None,
+                'dir_scans': scans[0],
+            }
+    best['peak_rss_growth_kb'] = _peak_rss_kb() - rss_before
+    return best
+
+
+def run_benchmark(args):
+    gen = load_generator()
+    tmp = tempfile.mkdtemp(prefix='bench-lessons-')
+    try:
+        base_dir = os.path.join(tmp, 'parts')
+        make_pack_dirs(base_dir, args.weeks, args.days)
+        specs = {
+            f'w{week:02d}': [make_spec(week, day, args.steps, args.content) for day in range(1, args.days + 1)]
+            for week in range(1, args.weeks + 1)
+        }
+        weeks = {}
+        stages = {}
+
+        def build(week_slugs):
+            for slug in week_slugs:
+                weeks[slug] = gen.make_week_lessons(int(slug[1:]), slug, 'synthetic', specs[slug])
+        stages['make_week_lessons'] = measure(build, list(specs), args.repeat)
+        lessons = [(slug, l) for slug, ls in weeks.items() for l in ls]
+
+        diagram_inputs = [
+            (f'W{week:02d} D{l.frontmatter.order} DATA FLOW', diagram_rows(week, l.frontmatter.order))
+            for week, l in ((int(slug[1:]), l) for slug, l in lessons)
+        ]
+
+        def diagrams(items):
+            for title, rows in items:
+                gen.box_diagram(title, rows)
+
+        def diagrams_uncached(items):
+            gen.RENDER_CACHE.clear()
+            diagrams(items)
+        stages['box_diagram'] = measure(diagrams_uncached, diagram_inputs, args.repeat)
+        stages['box_diagram_cached'] = measure(diagrams, diagram_inputs, args.repeat)
+        lessons = [
+            (slug, dataclasses.replace(lesson, visual_model=gen.box_diagram(title, rows)))
+            for (slug, lesson), (title, rows) in zip(lessons, diagram_inputs)
+        ]
+
+        targets = {}
+
+        def find(items):
+            index = gen.LessonIndex(base_dir)
+            for slug, lesson in items:
+                targets[lesson.frontmatter.id] = gen.find_lesson_file(
+                    slug, lesson.frontmatter.order, index)
+        stages['find_lesson_file'] = measure(find, lessons, args.repeat)
+
+        rendered = {}
+
+        def render(items):
+            for _, lesson in items:
+                rendered[lesson.frontmatter.id] = gen.generate_lesson(lesson)
+        stages['generate_lesson'] = measure(render, lessons, args.repeat)
+
+        pairs = [(targets[i], rendered[i]) for i in rendered]
+
+        def write(items):
+            for filepath, content in items:
+                gen.stream_lesson(filepath, [content])
+
+        # The first write replaces every stub; later repeats find identical bytes,
+        # so the fresh-write stage is measured once.
+        stages['stream_lesson'] = measure(write, pairs, 1)
+        stages['stream_lesson_unchanged'] = measure(write, pairs, args.repeat)
+
+        def render_and_write(items):
+            for _, lesson in items:
+                gen.render_and_write(targets[lesson.frontmatter.id], lesson)
+        stages['render_and_write_unchanged'] = measure(render_and_write, lessons, args.repeat)
+
+        total = sum(s['wall_s'] for s in stages.values())
+        return {
+            'params': {'weeks': args.weeks, 'days': args.days, 'steps': args.steps,
+                       'content': args.content, 'repeat': args.repeat},
+            'lessons': len(lessons),
+            'bytes_rendered': sum(len(c.encode('utf-8')) for c in rendered.values()),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'stages': stages,
+            'peak_rss_kb': _peak_rss_kb(),
+            'total_wall_s': round(total, 6),
+            'lessons_per_s': round(len(lessons) / total, 1) if total > 0 else None,
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def print_summary(result, baseline=None, out=sys.stderr):
+    print(f"📦 {result['lessons']} lessons, {result['bytes_rendered']:,} bytes rendered", file=out)
+    for name, stage in result['stages'].items():
+        line = f"  {name:<28} {stage['wall_s'] * 1000:9.2f} ms  {stage['items_per_s'] or 0:>10.1f}/s"
+        old = (baseline or {}).get('stages', {}).get(name)
+        if old and old['wall_s'] > 0:
+            line += f"  ×{stage['wall_s'] / old['wall_s']:.2f} vs baseline"
+        print(line, file=out)
+    print(f"  peak RSS {result['peak_rss_kb']:,} KB", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark generate-rich-lessons.py on a synthetic pack.')
+    parser.add_argument('--weeks', type=int, default=24)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--steps', type=int, default=6, help='do-steps per lesson')
+    parser.add_argument('--content', type=int, default=800, help='characters per do-step content block')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per stage; the fastest is kept')
+    parser.add_argument('--output', help='write the JSON result here instead of stdout')
+    parser.add_argument('--compare', metavar='JSON', help='earlier result to print per-stage ratios against')
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_summary(result, baseline)
+
+    blob = json.dumps(result, indent=2) + '\n'
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(blob)
+    else:
+        sys.stdout.write(blob)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,1294 +3,2670 @@
 Generate rich lesson content for W03-W24 (110 files).
 Transforms vague stubs into Day-1-quality lessons (~200+ lines each).
 
-Usage: python3 scripts/generate-rich-lessons.py
+Usage: python3 scripts/generate-rich-lessons.py [--week SLUG] [--day N] [--id GLOB] [--since REV]
+                                              [--jobs N] [--force] [--layout NAME] [--check [--diff] | --validate]
+                                              [--graph [PATH]] [--search-index [PATH]] [--audit-proof [PATH]]
+                                              [--render-cache [PATH]] [--stream [--trace-alloc]] [--sections] [--html]
+                                              [--watch] [--profile [--profile-json PATH]] [--profile-dump PATH]
 """
 
+import argparse
+import bisect
+import contextlib
+import cProfile
+import dataclasses
+import difflib
+import fnmatch
+import functools
+import hashlib
+import itertools
+import json
 import os
 import re
+import resource
+import subprocess
 import sys
+import time
+import tracemalloc
+import types
+import unicodedata
+import typing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
 import yaml
 
-BASE_DIR = os.path.join(os.path.dirname(__file__), '..', 'content', 'trust_platform_content', 'parts')
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPTS_DIR not in sys.path:  # when loaded by path (bench, tests) rather than run
+    sys.path.insert(0, SCRIPTS_DIR)
+import lesson_search  # noqa: E402
+import lesson_watch  # noqa: E402
+import lesson_html  # noqa: E402
+import proof_audit  # noqa: E402
+
+CONTENT_DIR = os.path.join(os.path.dirname(__file__), '..', 'content', 'trust_platform_content')
+BASE_DIR = os.path.join(CONTENT_DIR, 'parts')
+MANIFEST_PATH = os.path.join(CONTENT_DIR, 'manifest.json')
+CACHE_PATH = os.path.join(CONTENT_DIR, '.generate-cache.json')
+GRAPH_PATH = os.path.join(CONTENT_DIR, 'lesson-graph.json')
+RENDER_CACHE_PATH = os.path.join(CONTENT_DIR, '.render-cache.json')
+SEARCH_INDEX_PATH = os.path.join(CONTENT_DIR, 'search-index.json')
+SEARCH_CACHE_PATH = os.path.join(CONTENT_DIR, '.search-cache.json')
+PROOF_PATTERNS_PATH = os.path.join(CONTENT_DIR, 'proof-patterns.json')
+GRAPH_FORMAT_VERSION = 1
+
+MANIFEST_FORMAT_VERSION = 'v2'  # v2 adds parts[].files.lesson_hashes
+
+# Bump whenever the template engine or its filters change output for the same
+# lesson data, so cached lessons are regenerated. Edits to layout files are
+# tracked separately through each layout's content hash.
+TEMPLATE_VERSION = 1
+
+# Bump whenever a cached block renderer (box_diagram, ...) changes its output,
+# so persisted render caches stop matching.
+RENDER_CACHE_VERSION = 1
+RENDER_CACHE_SIZE = 4096  # blocks kept in memory (and on disk), least recently used dropped first
+
+
+# ─── LESSON MODEL ─────────────────────────────────────────────────────────────
+# Lessons are frozen, slotted dataclasses. Field types are checked once, at
+# construction, so a typo or a missing field fails when the week is loaded
+# rather than as a KeyError halfway through rendering. Lists are stored as
+# tuples; nested items may be given as dicts or sequences and are converted.
+
+class LessonDataError(ValueError):
+    """Lesson data does not match the lesson model."""
+
+
+@functools.cache
+def _coercer(tp):
+    """Build a checker for a field type: fn(value, where) -> value.
+
+    Lists become tuples and dicts/sequences become nested model instances.
+    Type introspection happens once per type, not once per value.
+    """
+    origin = typing.get_origin(tp)
+    if origin is tuple:
+        item = _coercer(typing.get_args(tp)[0])
+
+        def coerce_tuple(value, where):
+            if not isinstance(value, (list, tuple)):
+                raise LessonDataError(f"{where}: expected a list, got {type(value).__name__}")
+            return tuple(item(v, f"{where}[{i}]") for i, v in enumerate(value))
+        return coerce_tuple
+
+    if origin in (typing.Union, types.UnionType):
+        inner = _coercer(next(t for t in typing.get_args(tp) if t is not type(None)))
+        return lambda value, where: None if value is None else inner(value, where)
+
+    if dataclasses.is_dataclass(tp):
+        def coerce_model(value, where):
+            if isinstance(value, tp):
+                return value
+            try:
+                if isinstance(value, dict):
+                    return tp(**value)
+                if isinstance(value, (list, tuple)):
+                    return tp(*value)
+            except TypeError as e:
+                raise LessonDataError(f"{where}: {e}") from None
+            except LessonDataError as e:
+                raise LessonDataError(f"{where}.{e}") from None
+            raise LessonDataError(f"{where}: expected {tp.__name__}, got {type(value).__name__}")
+        return coerce_model
+
+    def coerce_scalar(value, where):
+        if (tp is int and isinstance(value, bool)) or not isinstance(value, tp):
+            raise LessonDataError(f"{where}: expected {tp.__name__}, got {type(value).__name__}")
+        return value
+    return coerce_scalar
+
+
+@functools.cache
+def _field_coercers(cls):
+    """[(field name, coercer)] for a model class, computed once per class."""
+    hints = typing.get_type_hints(cls)
+    return [(f.name, _coercer(hints[f.name])) for f in dataclasses.fields(cls)]
+
+
+class _Validated:
+    """Mixin: coerce and type-check every field in __post_init__."""
+
+    __slots__ = ()
+
+    def __post_init__(self):
+        for name, coerce in _field_coercers(type(self)):
+            object.__setattr__(self, name, coerce(getattr(self, name), name))
+
+    def to_dict(self):
+        """Plain dict/list form, matching the lesson data dict layout."""
+        return {f.name: _plain(getattr(self, f.name)) for f in dataclasses.fields(self)
+                if getattr(self, f.name) is not None}
+
+
+def _plain(value):
+    if isinstance(value, _Validated):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_plain(v) for v in value]
+    return value
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Frontmatter(_Validated):
+    id: str
+    part: str
+    title: str
+    order: int
+    prereqs: tuple[str, ...] = ()
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class PassCriterion(_Validated):
+    criterion: str
+    how_to_check: str
+
+    def to_dict(self):
+        return [self.criterion, self.how_to_check]
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class DoStep(_Validated):
+    title: str
+    why: str
+    content: str = ''
+
+    def to_dict(self):
+        d = {'title': self.title, 'why': self.why}
+        if self.content:
+            d['content'] = self.content
+        return d
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class SelfTestItem(_Validated):
+    question: str
+    answer: str
+
+    def to_dict(self):
+        return [self.question, self.answer]
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Lesson(_Validated):
+    frontmatter: Frontmatter
+    goal_intro: str
+    goal_deliverables: tuple[str, ...]
+    pass_criteria: tuple[PassCriterion, ...]
+    build_description: str
+    build_deliverables: tuple[str, ...]
+    done_example: str
+    can_do: str
+    cannot_yet: str
+    why_without: tuple[str, ...]
+    why_with: tuple[str, ...]
+    why_connects: tuple[str, ...]
+    mental_model_name: str
+    mental_model_desc: str
+    visual_model: str
+    ship_file: str
+    do_steps: tuple[DoStep, ...]
+    done_when: tuple[str, ...]
+    proof_instruction: str
+    self_test: tuple[SelfTestItem, ...]
+    code_lang: str = 'markdown'
+    layout: typing.Optional[str] = None
+
+    def __post_init__(self):
+        try:
+            _Validated.__post_init__(self)
+        except LessonDataError as e:
+            fm = self.frontmatter
+            lesson_id = fm.id if isinstance(fm, Frontmatter) else (fm or {}).get('id', '?')
+            raise LessonDataError(f"{lesson_id}: {e}") from None
+
+    @classmethod
+    def from_dict(cls, d):
+        """Build a Lesson from a full lesson data dict, rejecting unknown keys."""
+        names = {f.name for f in dataclasses.fields(cls)}
+        lesson_id = (d.get('frontmatter') or {}).get('id', '?')
+        unknown = sorted(set(d) - names)
+        if unknown:
+            raise LessonDataError(f"{lesson_id}: unknown field(s) {', '.join(unknown)}")
+        missing = sorted(f.name for f in dataclasses.fields(cls)
+                         if f.name not in d and f.default is dataclasses.MISSING)
+        if missing:
+            raise LessonDataError(f"{lesson_id}: missing field(s) {', '.join(missing)}")
+        return cls(**d)
 
 
 # ─── TEMPLATE ──────────────────────────────────────────────────────────────────
 
-def generate_lesson(d):
-    """Generate full Day-1-quality markdown from lesson data dict."""
-    fm = d['frontmatter']
-    prereqs_str = ""
-    if fm.get('prereqs'):
-        prereqs_str = "\n".join(f'  - "{p}"' for p in fm['prereqs'])
-        prereqs_str = f"prereqs:\n{prereqs_str}"
-    else:
-        prereqs_str = "prereqs: []"
-
-    deliverables = "\n".join(f"- ✅ {x}" for x in d['goal_deliverables'])
-    pass_rows = "\n".join(f"| {i+1} | {c[0]} | {c[1]} |" for i, c in enumerate(d['pass_criteria']))
-    build_deliverables = "\n".join(f"- ✅ {x}" for x in d['build_deliverables'])
-
-    without = "\n".join(f"- {x}" for x in d['why_without'])
-    with_ = "\n".join(f"- {x}" for x in d['why_with'])
-    connects = "\n".join(f"- {x}" for x in d['why_connects'])
-
-    do_steps = ""
-    for i, step in enumerate(d['do_steps']):
-        do_steps += f"\n{i+1}. **{step['title']}**\n"
-        do_steps += f"   > 💡 *WHY: {step['why']}*\n"
-        if step.get('content'):
-            do_steps += f"\n{step['content']}\n"
-
-    done_when = "\n".join(f"- [ ] {x}" for x in d['done_when'])
-    self_test = "\n".join(f"{i+1}. {q[0]} → **{q[1]}**" for i, q in enumerate(d['self_test']))
+# Layouts live in scripts/lesson_layouts/<name>.md. A layout is plain markdown
+# with {{ field }} slots; dotted fields reach into nested fields
+# ({{ frontmatter.title }}) and an optional filter formats the value
+# ({{ why_with | bullets }}, {{ code_lang | default:markdown }}). Each layout
+# is compiled once into a plan of literal chunks and slots, cached in memory
+# and recompiled only when the file's mtime changes.
+
+LAYOUT_DIR = os.path.join(os.path.dirname(__file__), 'lesson_layouts')
+DEFAULT_LAYOUT = 'day1'
+
+SLOT_RE = re.compile(r'\{\{\s*([\w.]+)\s*(?:\|\s*(\w+)(?::([^}]*?))?\s*)?\}\}')
+MISSING = object()
+
+
+def _filter_default(value, arg):
+    return arg if value is MISSING else value
+
+
+def _filter_prereqs(prereqs, _arg):
+    if not prereqs:
+        return "prereqs: []"
+    return "prereqs:\n" + "\n".join(f'  - "{p}"' for p in prereqs)
+
+
+def _filter_do_steps(steps, _arg):
+    for i, step in enumerate(steps):
+        yield f"\n{i+1}. **{step.title}**\n   > 💡 *WHY: {step.why}*\n"
+        if step.content:
+            yield f"\n{step.content}\n"
+
+
+FILTERS = {
+    'default': _filter_default,
+    'prereqs': _filter_prereqs,
+    'checked': lambda items, _arg: "\n".join(f"- ✅ {x}" for x in items),
+    'bullets': lambda items, _arg: "\n".join(f"- {x}" for x in items),
+    'todo': lambda items, _arg: "\n".join(f"- [ ] {x}" for x in items),
+    'table_rows': lambda rows, _arg: "\n".join(
+        f"| {i+1} | {c.criterion} | {c.how_to_check} |" for i, c in enumerate(rows)),
+    'self_test': lambda qs, _arg: "\n".join(f"{i+1}. {q.question} → **{q.answer}**" for i, q in enumerate(qs)),
+    'do_steps': _filter_do_steps,
+}
+
+
+class Layout:
+    """A compiled layout: ``plan`` is a tuple of literal strings and
+    (field path, filter, filter arg) slot tuples, in document order."""
+
+    def __init__(self, name, path, text, mtime_ns):
+        self.name = name
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        self.plan = self._compile(text)
+
+    def _compile(self, text):
+        plan = []
+        pos = 0
+        for m in SLOT_RE.finditer(text):
+            if m.start() > pos:
+                plan.append(text[pos:m.start()])
+            field, filter_name, arg = m.groups()
+            if filter_name is not None and filter_name not in FILTERS:
+                line = text.count('\n', 0, m.start()) + 1
+                raise ValueError(f"{self.path}:{line}: unknown filter '{filter_name}'")
+            plan.append((tuple(field.split('.')), FILTERS.get(filter_name), arg))
+            pos = m.end()
+        if pos < len(text):
+            plan.append(text[pos:])
+        return tuple(plan)
+
+    def render(self, d):
+        """Yield the rendered chunks of this layout for one lesson."""
+        for part in self.plan:
+            if isinstance(part, str):
+                yield part
+                continue
+            field, filter_fn, arg = part
+            value = d
+            for key in field:
+                if isinstance(value, dict):
+                    value = value.get(key, MISSING)
+                else:
+                    value = getattr(value, key, MISSING)
+            if filter_fn is not None:
+                value = filter_fn(value, arg)
+            if value is MISSING:
+                raise KeyError('.'.join(field))
+            if isinstance(value, str):
+                yield value
+            elif hasattr(value, '__next__'):
+                yield from value
+            else:
+                yield str(value)
+
+
+_LAYOUT_CACHE = {}  # resolved path -> Layout
+
+
+def layout_path(name):
+    """Map a layout name (``day1``) or an explicit file path to a file path."""
+    if os.sep in name or name.endswith('.md'):
+        return os.path.abspath(name)
+    return os.path.join(LAYOUT_DIR, f'{name}.md')
+
+
+def get_layout(name=DEFAULT_LAYOUT):
+    """Return the compiled layout, recompiling only if the file's mtime changed."""
+    path = layout_path(name)
+    mtime_ns = os.stat(path).st_mtime_ns
+    layout = _LAYOUT_CACHE.get(path)
+    if layout is None or layout.mtime_ns != mtime_ns:
+        with open(path, 'r', encoding='utf-8') as f:
+            layout = Layout(name, path, f.read(), mtime_ns)
+        _LAYOUT_CACHE[path] = layout
+    return layout
+
+
+def lesson_layout(d, default=DEFAULT_LAYOUT):
+    """The layout for a lesson: its own layout field wins over the run default."""
+    return get_layout(d.layout or default)
+
+
+def iter_lesson(d, layout=DEFAULT_LAYOUT):
+    """Yield the markdown for a Lesson, section by section.
+
+    Chunks come out in document order, so they can go straight to
+    ``f.writelines`` without building the whole lesson in memory.
+    """
+    return lesson_layout(d, layout).render(d)
+
+
+def generate_lesson(d, layout=DEFAULT_LAYOUT):
+    """Generate full Day-1-quality markdown from a Lesson."""
+    return ''.join(iter_lesson(d, layout))
+
+
+# ─── RENDER CACHE ─────────────────────────────────────────────────────────────
+# Blocks such as box diagrams are often identical across lessons, weeks and
+# packs. They are rendered through RENDER_CACHE, keyed by the renderer name
+# and the content of its inputs, so each distinct block is rendered once per
+# build. --render-cache also persists the cache between builds.
+
+def _freeze(value):
+    """Nested lists (as read back from JSON) -> nested tuples, so they can key a dict."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class RenderCache:
+    """Bounded LRU of rendered blocks keyed by (kind, inputs).
+
+    Inputs are tuples of strings (and nested tuples), so the dict hashes and
+    compares them by content; no digest has to be computed per lookup.
+    """
+
+    def __init__(self, maxsize=RENDER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = {}  # (kind, inputs) -> rendered text, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+    def get_or_render(self, kind, inputs, render):
+        """Return the cached block for (kind, inputs), calling render() on a miss.
+
+        ``inputs`` must be a tuple of JSON-compatible values that fully
+        determines the output.
+        """
+        key = (kind, inputs)
+        text = self.entries.pop(key, None)
+        if text is not None:
+            self.hits += 1
+            self.entries[key] = text
+            return text
+        self.misses += 1
+        text = render()
+        self.entries[key] = text
+        self.dirty = True
+        if len(self.entries) > self.maxsize:
+            del self.entries[next(iter(self.entries))]
+        return text
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+    def load(self, path=RENDER_CACHE_PATH):
+        """Merge a persisted cache; a missing, corrupt or outdated file is ignored."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get('version') != RENDER_CACHE_VERSION:
+            return
+        persisted = {(kind, _freeze(inputs)): text for kind, inputs, text in data.get('entries', [])}
+        persisted.update(self.entries)
+        self.entries = persisted
+        while len(self.entries) > self.maxsize:
+            del self.entries[next(iter(self.entries))]
+
+    def save(self, path=RENDER_CACHE_PATH):
+        """Persist the cache (in LRU order) if anything new was rendered."""
+        if not self.dirty:
+            return
+        data = {'version': RENDER_CACHE_VERSION,
+                'entries': [[kind, inputs, text] for (kind, inputs), text in self.entries.items()]}
+        atomic_write_bytes(path, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        self.dirty = False
+
+
+RENDER_CACHE = RenderCache()
+
+
+# ─── DIAGRAMS ─────────────────────────────────────────────────────────────────
+# A small layout engine for visual models. A diagram is a tree of plain
+# tuples, so it is hashable and JSON-compatible and can key RENDER_CACHE:
+#
+#   'text'                          one row
+#   box(title, *items)              a framed box; title may be None
+#   columns(*items, sep='  ')       items side by side, top-aligned; a sep
+#                                   like ' ──▶ ' is drawn on the middle row
+#   arrow(label='')                 a downward arrow between stacked items
+#
+# Widths are terminal display widths, not len(): emoji and CJK count as two
+# columns, combining marks and zero-width characters as none. Each rendered
+# line carries its width, so nothing is measured twice.
+
+# Zero-width code points that unicodedata does not classify as combining.
+_ZERO_WIDTH = frozenset('\u200b\u200c\u200d\u2060\ufeff') | frozenset(map(chr, range(0xfe00, 0xfe10)))
+_EMOJI_PRESENTATION = '\ufe0f'
+_NON_ASCII_RE = re.compile(r'[^\x00-\x7f]')
+_VS16_RE = re.compile(r'(.)\ufe0f')
+
+
+@functools.cache
+def char_width(ch):
+    """Display width of one character (0, 1 or 2), memoized per character."""
+    if ch in _ZERO_WIDTH or unicodedata.combining(ch):
+        return 0
+    if unicodedata.east_asian_width(ch) in 'WF':
+        return 2
+    return 1
+
+
+def display_width(text):
+    """Terminal columns taken by text."""
+    if text.isascii():
+        return len(text)
+    width = len(text)
+    for ch in _NON_ASCII_RE.findall(text):
+        width += char_width(ch) - 1
+    if _EMOJI_PRESENTATION in text:
+        # VS16 turns a narrow symbol (⚠, ✔, ...) into a wide emoji.
+        width += sum(char_width(ch) == 1 for ch in _VS16_RE.findall(text))
+    return width
+
+
+def box(title, *items):
+    return ('box', title, items)
+
+
+def columns(*items, sep='  '):
+    return ('columns', sep, items)
+
+
+def arrow(label=''):
+    return ('arrow', label)
+
+
+def _center(text, text_width, width):
+    # Same split as str.center, so ASCII titles come out as they always have.
+    pad = width - text_width
+    left = pad // 2 + (pad & width & 1)
+    return ' ' * left + text + ' ' * (pad - left)
+
+
+def _layout(node):
+    """Render a diagram node to [(line, display width)]."""
+    if isinstance(node, str):
+        return [(node, display_width(node))]
+    kind = node[0]
+    if kind == 'box':
+        _, title, items = node
+        body = [line for item in items for line in _layout(item)]
+        title_width = display_width(title) if title is not None else 0
+        width = max([title_width + 4] + [w + 4 for _, w in body])
+        lines = [('┌' + '─' * width + '┐', width + 2)]
+        if title is not None:
+            lines.append(('│' + _center(title, title_width, width) + '│', width + 2))
+            if body:
+                lines.append(('├' + '─' * width + '┤', width + 2))
+        lines.extend(('│  ' + text + ' ' * (width - 2 - w) + '│', width + 2) for text, w in body)
+        lines.append(('└' + '─' * width + '┘', width + 2))
+        return lines
+    if kind == 'columns':
+        _, sep, items = node
+        cells = [_layout(item) for item in items]
+        if not cells:
+            return []
+        height = max(len(cell) for cell in cells)
+        widths = [max(w for _, w in cell) if cell else 0 for cell in cells]
+        sep_width = display_width(sep)
+        blank_sep = ' ' * sep_width
+        middle = (height - 1) // 2
+        full_width = sum(widths) + sep_width * (len(cells) - 1)
+        lines = []
+        for row in range(height):
+            parts = []
+            for i, (cell, cell_width) in enumerate(zip(cells, widths)):
+                if i:
+                    parts.append(sep if row == middle else blank_sep)
+                text, w = cell[row] if row < len(cell) else ('', 0)
+                parts.append(text + ' ' * (cell_width - w))
+            # No trailing padding: an enclosing box pads each row itself.
+            line = ''.join(parts)
+            stripped = line.rstrip(' ')
+            lines.append((stripped, full_width - (len(line) - len(stripped))))
+        return lines
+    if kind == 'arrow':
+        label = node[1]
+        head = f'▼ {label}' if label else '▼'
+        return [('│', 1), (head, display_width(head))]
+    raise ValueError(f"unknown diagram node {kind!r}")
+
+
+def diagram(node):
+    """Render a diagram tree to text, once per distinct tree per build."""
+    return RENDER_CACHE.get_or_render('diagram', node, lambda: '\n'.join(text for text, _ in _layout(node)))
+
+
+def render_diagrams(nodes):
+    """Render many diagrams in one call; identical trees are laid out once."""
+    return [diagram(node) for node in nodes]
 
-    return f"""---
-id: {fm['id']}
-part: {fm['part']}
-title: "{fm['title']}"
-order: {fm['order']}
-duration_minutes: 120
-{prereqs_str}
-proof:
-  type: "paste_or_upload"
-  status: "manual_or_regex"
-review_schedule_days: [3,7,21,60]
----
 
-# {fm['title']}
+# Helper for consistent visual models
+def box_diagram(title, rows):
+    """Generate a box diagram: a centered title over left-aligned rows.
 
-## Goal
+    Rows may also be nested diagram nodes (box, columns, arrow).
+    """
+    return diagram(box(title, *rows))
 
-{d['goal_intro']}
 
-By end of this session you will have:
+# ─── WEEK DATA HELPERS ─────────────────────────────────────────────────────────
+# Week data lives in scripts/lesson_data/, one file per week; the helpers
+# below turn compact specs into Lessons.
 
-{deliverables}
+SPEC_KEYS = (
+    'slug', 'title', 'goal_intro', 'goal_deliverables', 'pass_criteria', 'build_desc',
+    'build_deliverables', 'done_example', 'can_do', 'cannot_yet', 'why_without', 'why_with',
+    'why_connects', 'mental_model_name', 'mental_model_desc', 'visual_model', 'ship_file',
+    'do_steps', 'done_when', 'proof_instruction', 'self_test',
+)
 
-**PASS CRITERIA** (must achieve ALL):
 
-| # | Criterion | How to check |
-|---|-----------|-------------|
-{pass_rows}
+def make_week_lessons(week_num, week_slug, week_theme, lessons_data, errors=None):
+    """Build Lessons for a week from compact specifications.
 
-## What You're Building Today
+    If ``errors`` is a list, bad specs are reported there and skipped instead
+    of raising LessonDataError.
+    """
+    result = []
+    for i, ld in enumerate(lessons_data):
+        day = i + 1
+        prev_id = f"{week_slug}-d{day-1:02d}-quest-{lessons_data[i-1].get('slug')}-2h" if day > 1 else None
 
-{d['build_description']}
+        missing = [k for k in SPEC_KEYS if k not in ld]
+        if missing:
+            error = LessonDataError(f"{week_slug} day {day}: missing spec field(s) {', '.join(missing)}")
+            if errors is None:
+                raise error
+            errors.append(str(error))
+            continue
 
-By end of this session, you will have:
+        # Determine prereqs
+        if ld.get('prereqs') is not None:
+            prereqs = ld['prereqs']
+        elif day == 1:
+            prereqs = []
+        else:
+            prereqs = [prev_id]
 
-{build_deliverables}
+        fm_id = ld.get('id', f"{week_slug}-d{day:02d}-quest-{ld['slug']}-2h")
 
-What "done" looks like:
+        try:
+            lesson = _spec_lesson(ld, fm_id, week_slug, day, prereqs)
+        except LessonDataError as e:
+            if errors is None:
+                raise
+            errors.append(str(e))
+            continue
+        result.append(lesson)
+    return result
 
-```{d.get('code_lang', 'markdown')}
-{d['done_example']}
-```
 
-You **can**: {d['can_do']}
-You **cannot yet**: {d['cannot_yet']}
+def _spec_lesson(ld, fm_id, week_slug, day, prereqs):
+    return Lesson(
+        frontmatter=Frontmatter(id=fm_id, part=week_slug, title=ld['title'], order=day, prereqs=prereqs),
+        goal_intro=ld['goal_intro'],
+        goal_deliverables=ld['goal_deliverables'],
+        pass_criteria=ld['pass_criteria'],
+        build_description=ld['build_desc'],
+        build_deliverables=ld['build_deliverables'],
+        done_example=ld['done_example'],
+        code_lang=ld.get('code_lang', 'markdown'),
+        can_do=ld['can_do'],
+        cannot_yet=ld['cannot_yet'],
+        why_without=ld['why_without'],
+        why_with=ld['why_with'],
+        why_connects=ld['why_connects'],
+        mental_model_name=ld['mental_model_name'],
+        mental_model_desc=ld['mental_model_desc'],
+        visual_model=ld['visual_model'],
+        ship_file=ld['ship_file'],
+        do_steps=ld['do_steps'],
+        done_when=ld['done_when'],
+        proof_instruction=ld['proof_instruction'],
+        self_test=ld['self_test'],
+        layout=ld.get('layout'),
+    )
+
+
+# ─── FILE DISCOVERY ───────────────────────────────────────────────────────────
+
+LESSON_FILE_RE = re.compile(r'^(\d{2,})-.*\.md$')
+
+
+class LessonIndex:
+    """One-pass index of parts/<week>/lessons/NN-*.md, built once per run.
+
+    Keyed by week directory name, by week-slug prefix (first 3 chars, e.g.
+    ``w03``) and by day number, so each lesson resolves with dict lookups
+    instead of directory scans. Ambiguous matches (two week dirs sharing a
+    prefix, two files for one day) are recorded in ``ambiguities`` when hit
+    and left unresolved rather than silently picking the first.
+    """
+
+    def __init__(self, base_dir=BASE_DIR):
+        self.base_dir = base_dir
+        self.weeks = {}      # week dir name -> {day: [paths]}
+        self.prefixes = {}   # week dir prefix -> [week dir names]
+        self.ambiguities = {}  # message -> None (ordered set of reports)
+
+        try:
+            part_dirs = sorted(e.name for e in os.scandir(base_dir) if e.is_dir())
+        except FileNotFoundError:
+            part_dirs = []
+        for name in part_dirs:
+            lessons_dir = os.path.join(base_dir, name, 'lessons')
+            try:
+                entries = sorted(e.name for e in os.scandir(lessons_dir) if e.is_file())
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            days = {}
+            for f in entries:
+                m = LESSON_FILE_RE.match(f)
+                if m:
+                    days.setdefault(int(m.group(1)), []).append(os.path.join(lessons_dir, f))
+            self.weeks[name] = days
+            self.prefixes.setdefault(name[:3], []).append(name)
+
+    def week_dir(self, week_slug):
+        """Resolve a week slug to an indexed week dir name (exact, then prefix)."""
+        if week_slug in self.weeks:
+            return week_slug
+        candidates = self.prefixes.get(week_slug[:3], [])
+        if len(candidates) > 1:
+            self.ambiguities[f"{week_slug}: prefix '{week_slug[:3]}' matches {', '.join(candidates)}"] = None
+            return None
+        return candidates[0] if candidates else None
+
+    def resolve(self, week_slug, lesson_data):
+        return self.lookup(week_slug, lesson_data.frontmatter.order)
+
+    def lookup(self, week_slug, day_num):
+        """Return the lesson file for a week/day, or None if missing or ambiguous."""
+        name = self.week_dir(week_slug)
+        if name is None:
+            return None
+        paths = self.weeks[name].get(day_num, [])
+        if len(paths) > 1:
+            files = ', '.join(os.path.basename(p) for p in paths)
+            self.ambiguities[f"{week_slug} day {day_num}: {files}"] = None
+            return None
+        return paths[0] if paths else None
+
+
+class ManifestIndex:
+    """Lesson targets taken from manifest.json instead of the directory tree.
+
+    The manifest is loaded once into a (part id, order) -> path map, where order
+    is the file's NN- prefix (or its position in the part's lesson list). An
+    id -> path map is filled per part from the files' front matter the first
+    time a lesson of that part is resolved. Lessons resolve by front matter id
+    first, then by (part, order); no directories are scanned and nothing is
+    guessed from file names beyond the manifest's own entries.
+    """
+
+    def __init__(self, manifest_path=MANIFEST_PATH):
+        self.content_dir = os.path.dirname(manifest_path)
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.by_part_order = {}  # (part id, order) -> path
+        self.part_paths = {}     # part id -> [paths]
+        self.part_aliases = {}   # part id or slug -> part id
+        self.ambiguities = {}
+        self.claimed = set()
+        self.unmatched = []      # lesson ids with no manifest entry
+        self._ids = {}           # lesson id -> path, filled per part
+        self._ids_loaded = set()
+        for part in manifest.get('parts', []):
+            part_id = part['id']
+            self.part_aliases[part_id] = part_id
+            self.part_aliases[part.get('slug', part_id)] = part_id
+            paths = [os.path.join(self.content_dir, rel) for rel in part.get('files', {}).get('lessons', [])]
+            self.part_paths[part_id] = paths
+            for position, path in enumerate(paths, start=1):
+                m = LESSON_FILE_RE.match(os.path.basename(path))
+                order = int(m.group(1)) if m else position
+                if (part_id, order) in self.by_part_order:
+                    self.ambiguities[f"{part_id} order {order}: listed twice in manifest"] = None
+                self.by_part_order.setdefault((part_id, order), path)
+
+    def part_id(self, week_slug):
+        """Map a data week slug (w03-multi-client-event-loop) to a manifest part id (w03)."""
+        if week_slug in self.part_aliases:
+            return self.part_aliases[week_slug]
+        matches = [pid for alias, pid in self.part_aliases.items() if week_slug.startswith(alias + '-')]
+        matches = sorted(set(matches))
+        if len(matches) > 1:
+            self.ambiguities[f"{week_slug}: matches manifest parts {', '.join(matches)}"] = None
+            return None
+        return matches[0] if matches else None
+
+    def _load_ids(self, part_id):
+        if part_id in self._ids_loaded:
+            return
+        self._ids_loaded.add(part_id)
+        for path in self.part_paths.get(part_id, []):
+            lesson_id = read_existing_frontmatter(path).get('id')
+            if lesson_id is not None:
+                self._ids.setdefault(str(lesson_id), path)
+
+    def resolve(self, week_slug, lesson_data):
+        fm = lesson_data.frontmatter
+        part_id = self.part_id(week_slug)
+        path = None
+        if part_id is not None:
+            self._load_ids(part_id)
+            path = self._ids.get(fm.id) or self.by_part_order.get((part_id, fm.order))
+        if path is None:
+            self.unmatched.append(fm.id)
+        else:
+            self.claimed.add(path)
+        return path
+
+    def unclaimed(self, part_ids=None):
+        """Manifest lesson paths no lesson data resolved to: {part id: [paths]}."""
+        out = {}
+        for part_id, paths in self.part_paths.items():
+            if part_ids is not None and part_id not in part_ids:
+                continue
+            left = [p for p in paths if p not in self.claimed]
+            if left:
+                out[part_id] = left
+        return out
 
-## Why This Matters
 
-🔴 **Without this, you will:**
-{without}
+def find_lesson_file(week_slug, day_num, index=None):
+    """Find the existing lesson file for a given week and day number."""
+    if index is None:
+        index = LessonIndex()
+    return index.lookup(week_slug, day_num)
+
+
+# ─── FRONT MATTER MERGE ───────────────────────────────────────────────────────
+# With --merge-frontmatter the body is regenerated but the target's authored
+# front matter (xp, kind, proof.regex_patterns, ...) is kept byte-for-byte:
+# quoting, flow lists and comments survive. Generated top-level keys the
+# authored block lacks are appended after it; nested mappings the author
+# wrote are kept whole, so nothing inside them is ever re-serialized.
+
+_FRONTMATTER_CACHE = {}  # path -> ((mtime_ns, size), authored YAML text, parsed front matter)
+
+
+def _read_frontmatter(filepath):
+    """(YAML text between the --- lines, parsed dict), cached until mtime or size change.
+
+    Only reads up to the closing ``---`` line, not the whole file. The text is
+    '' when the file has no front matter.
+    """
+    try:
+        st = os.stat(filepath)
+    except FileNotFoundError:
+        return '', {}
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _FRONTMATTER_CACHE.get(filepath)
+    if cached is not None and cached[0] == key:
+        return cached[1], cached[2]
+
+    text, fm = '', {}
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        if f.readline().rstrip('\r\n') == '---':
+            lines = []
+            for line in f:
+                if line.rstrip('\r\n') == '---':
+                    text = ''.join(lines)
+                    fm = yaml.safe_load(text) or {}
+                    break
+                lines.append(line)
+    _FRONTMATTER_CACHE[filepath] = (key, text, fm)
+    return text, fm
 
-🟢 **With this, you will:**
-{with_}
 
-🔗 **How this connects:**
-{connects}
+def read_existing_frontmatter(filepath):
+    """Read existing YAML frontmatter from a lesson file as a dict."""
+    return _read_frontmatter(filepath)[1]
+
+
+def build_frontmatter_index(paths):
+    """Read the front matter of every target once: {path: authored YAML text}."""
+    return {path: _read_frontmatter(path)[0] for path in paths}
+
+
+def missing_frontmatter(generated, existing):
+    """Generated top-level keys the authored front matter does not have, in generated order."""
+    return {key: value for key, value in generated.items() if key not in existing}
+
+
+FRONTMATTER_RE = re.compile(r'\A---\n(.*?\n)---\n', re.DOTALL)
+
+
+def merge_frontmatter_chunks(chunks, authored):
+    """Stream rendered chunks, swapping the front matter block for the authored one.
+
+    ``authored`` is the target's YAML text. Only the chunks up to the closing
+    ``---`` are buffered; the body streams through untouched. With no
+    authored front matter the output is unchanged.
+    """
+    if not authored:
+        yield from chunks
+        return
+    buf = ''
+    for chunk in chunks:
+        buf += chunk
+        m = FRONTMATTER_RE.match(buf)
+        if m:
+            missing = missing_frontmatter(yaml.safe_load(m.group(1)) or {}, yaml.safe_load(authored) or {})
+            block = authored
+            if missing:
+                block += yaml.safe_dump(missing, sort_keys=False, allow_unicode=True,
+                                        default_flow_style=False, width=1000)
+            yield f"---\n{block}---\n"
+            yield buf[m.end():]
+            yield from chunks
+            return
+    yield buf
+
+
+def render_chunks(lesson_data, layout=DEFAULT_LAYOUT, existing_fm=None):
+    """Rendered chunks for a lesson, keeping the authored front matter (YAML text) if given."""
+    chunks = iter_lesson(lesson_data, layout)
+    if existing_fm is None:
+        return chunks
+    return merge_frontmatter_chunks(chunks, existing_fm)
+
+
+# ─── SECTION SIDECARS ─────────────────────────────────────────────────────────
+# --sections writes NN-slug.sections.json next to each lesson, in the same
+# pass as the markdown. It holds the lesson's structured sections straight
+# from the data, plus ``lesson_sections``: a summary typed like the
+# LessonSections interface, so a page can load it instead of calling
+# extractLessonSections. Its values come from the data, not from that
+# function's markdown heuristics, and do not match them: on generated lessons
+# the heuristics take "PASS CRITERIA" as the goal, find no callouts (there is
+# no "Self-Check" heading) and strip backticks from the do steps, while the
+# sidecar has the goal intro, the self-test questions as callouts, and step
+# titles and proof text as authored. Only the fallbacks for empty fields are
+# shared. source_sha256 is the hash of the markdown it was written with, so a
+# stale sidecar can be spotted.
+
+SECTIONS_FORMAT_VERSION = 1
+PRACTICE_DONE_WHEN = {
+    'warmup': 'Basic setup verified.',
+    'core': 'Output matches expected behavior.',
+    'boss': 'All edge cases handled and output validated.',
+}
+
+
+def sections_path(filepath):
+    return os.path.splitext(filepath)[0] + '.sections.json'
+
+
+def _practice_items(steps):
+    items = []
+    for i, step in enumerate(steps):
+        difficulty = 'warmup' if i == 0 else 'boss' if i == len(steps) - 1 else 'core'
+        items.append({'difficulty': difficulty, 'instruction': step.title,
+                      'doneWhen': PRACTICE_DONE_WHEN[difficulty], 'hint': step.why})
+    return items
+
+
+def lesson_sections(lesson):
+    """A LessonSections-typed summary built from lesson data (not extractLessonSections' output)."""
+    rules = '\n'.join([
+        '## Goal', '', lesson.goal_intro, '',
+        FILTERS['checked'](lesson.goal_deliverables, None), '',
+        '**PASS CRITERIA** (must achieve ALL):', '',
+        '| # | Criterion | How to check |', '|---|-----------|-------------|',
+        FILTERS['table_rows'](lesson.pass_criteria, None),
+    ])
+    return {
+        'goal': lesson.goal_intro or 'Complete this lesson and submit proof.',
+        'deliverable': lesson.ship_file or 'Proof submission (paste or upload)',
+        'doSteps': [step.title for step in lesson.do_steps],
+        'proofText': lesson.proof_instruction or 'Paste your output or upload a proof file.',
+        'rulesMarkdown': rules,
+        'practiceItems': _practice_items(lesson.do_steps),
+        'callouts': [{'label': label, 'text': item.question}
+                     for label, item in zip('ABCDE', lesson.self_test)],
+        'whatCounts': (lesson.done_when[0] if lesson.done_when
+                       else 'Paste command output or upload a log file showing completion.'),
+        'hasVisual': bool(lesson.visual_model.strip()),
+        'hasRules': True,
+        'hasPractice': bool(lesson.do_steps),
+        'hasProve': bool(lesson.done_when or lesson.proof_instruction),
+    }
 
-🧠 **Mental model: "{d['mental_model_name']}"**
 
-{d['mental_model_desc']}
+def sections_document(lesson, filepath, output_hash):
+    fm = lesson.frontmatter
+    return {
+        'format_version': SECTIONS_FORMAT_VERSION,
+        'id': fm.id,
+        'part': fm.part,
+        'title': fm.title,
+        'order': fm.order,
+        'source': os.path.basename(filepath),
+        'source_sha256': output_hash,
+        'sections': {
+            'goal': {
+                'intro': lesson.goal_intro,
+                'deliverables': list(lesson.goal_deliverables),
+                'pass_criteria': [{'criterion': c.criterion, 'how_to_check': c.how_to_check}
+                                  for c in lesson.pass_criteria],
+            },
+            'build': {
+                'description': lesson.build_description,
+                'deliverables': list(lesson.build_deliverables),
+                'done_example': {'lang': lesson.code_lang, 'code': lesson.done_example},
+                'can_do': lesson.can_do,
+                'cannot_yet': lesson.cannot_yet,
+            },
+            'why': {
+                'without': list(lesson.why_without),
+                'with': list(lesson.why_with),
+                'connects': list(lesson.why_connects),
+                'mental_model': {'name': lesson.mental_model_name,
+                                 'description': lesson.mental_model_desc},
+            },
+            'visual_model': lesson.visual_model,
+            'ship_file': lesson.ship_file,
+            'do_steps': [{'title': st.title, 'why': st.why, 'content': st.content}
+                         for st in lesson.do_steps],
+            'done_when': list(lesson.done_when),
+            'proof': lesson.proof_instruction,
+            'self_test': [{'question': q.question, 'answer': q.answer} for q in lesson.self_test],
+        },
+        'lesson_sections': lesson_sections(lesson),
+    }
 
-## Visual Model
 
-```
-{d['visual_model']}
-```
+def write_sections(filepath, lesson, output_hash):
+    """Write the lesson's sidecar unless it already holds these bytes. Returns changed."""
+    document = sections_document(lesson, filepath, output_hash)
+    return write_lesson(sections_path(filepath),
+                        json.dumps(document, indent=2, ensure_ascii=False) + '\n')
 
-## Build
 
-File: `{d['ship_file']}`
+# ─── WRITING ──────────────────────────────────────────────────────────────────
 
-## Do
-{do_steps}
-## Done when
 
-{done_when}
+def atomic_write_bytes(filepath, data):
+    """Write data (bytes or an iterable of bytes chunks) to filepath atomically.
 
-## Proof
+    The data goes to a sibling temp file that then replaces filepath, so
+    readers (and sync-content.ts) only ever see the old file or the complete
+    new one, even if the run is killed mid-write.
+    """
+    tmp_path = f"{filepath}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'xb') as f:
+            if isinstance(data, bytes):
+                f.write(data)
+            else:
+                f.writelines(data)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
 
-{d['proof_instruction']}
 
-**Quick self-test** (answer without looking at your notes):
-> 💡 *WHY these questions: If you can answer all 3 instantly, you've internalized the concept. If not, re-read — these come back in future weeks.*
+def write_lesson(filepath, content):
+    """Write lesson content to file unless it already holds exactly these bytes.
+
+    Returns True if the file was (re)written, False if it was left untouched.
+    """
+    data = content.encode('utf-8')
+    try:
+        if os.path.getsize(filepath) == len(data):
+            with open(filepath, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    atomic_write_bytes(filepath, data)
+    return True
+
+
+COPY_BLOCK = 1 << 16
+
+
+def _file_prefix(f, size):
+    """Yield the first size bytes of an open binary file, in blocks."""
+    f.seek(0)
+    while size > 0:
+        block = f.read(min(size, COPY_BLOCK))
+        if not block:
+            return
+        size -= len(block)
+        yield block
+
+
+def stream_lesson(filepath, chunks):
+    """Stream rendered text chunks to filepath, comparing against the old file.
+
+    Chunks are encoded and hashed as they are produced and compared with the
+    existing file in step. Nothing is opened for writing until the first
+    mismatch; then the matched prefix is copied from the old file and the
+    remaining chunks follow with ``writelines``. An unchanged lesson costs
+    reads only.
+
+    Returns (changed, line_count, sha256 hex digest).
+    """
+    digest = hashlib.sha256()
+    state = {'lines': 0, 'last': b''}
+
+    def encoded():
+        for chunk in chunks:
+            if not chunk:
+                continue
+            data = chunk.encode('utf-8')
+            digest.update(data)
+            state['lines'] += data.count(b'\n')
+            state['last'] = data
+            yield data
+
+    rendered = encoded()
+    try:
+        old = open(filepath, 'rb')
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        atomic_write_bytes(filepath, rendered)
+        changed = True
+    else:
+        with old:
+            matched = 0
+            for data in rendered:
+                if old.read(len(data)) != data:
+                    atomic_write_bytes(filepath, itertools.chain(_file_prefix(old, matched), (data,), rendered))
+                    changed = True
+                    break
+                matched += len(data)
+            else:
+                # Every chunk matched; the old file may still be longer.
+                changed = old.read(1) != b''
+                if changed:
+                    atomic_write_bytes(filepath, _file_prefix(old, matched))
+
+    lines = state['lines'] + (1 if state['last'] and not state['last'].endswith(b'\n') else 0)
+    return changed, lines, digest.hexdigest()
+
+
+def render_and_write(filepath, lesson_data, layout=DEFAULT_LAYOUT, existing_fm=None, sections=False):
+    """Render one lesson and stream it to disk. Top-level so worker processes can run it.
+
+    ``existing_fm`` (the target's authored front matter text) turns on front
+    matter merging; ``sections`` also writes the JSON sidecar.
+    Returns (line_count, sha256 of the rendered bytes, whether the file changed).
+    """
+    changed, lines, output_hash = stream_lesson(filepath, render_chunks(lesson_data, layout, existing_fm))
+    if sections:
+        changed = write_sections(filepath, lesson_data, output_hash) or changed
+    return lines, output_hash, changed
+
+
+# ─── DRIFT CHECK ──────────────────────────────────────────────────────────────
+# --check renders every selected lesson in memory and compares it with the file
+# on disk: one read per file, no writes (not even the cache).
+
+def render_and_compare(filepath, lesson_data, layout=DEFAULT_LAYOUT, existing_fm=None, with_diff=False):
+    """Return (drifted, unified diff text or None) for one lesson."""
+    rendered = ''.join(render_chunks(lesson_data, layout, existing_fm)).encode('utf-8')
+    try:
+        with open(filepath, 'rb') as f:
+            on_disk = f.read()
+    except FileNotFoundError:
+        on_disk = b''
+    if on_disk == rendered:
+        return False, None
+    if not with_diff:
+        return True, None
+    diff = difflib.unified_diff(
+        on_disk.decode('utf-8', 'replace').splitlines(keepends=True),
+        rendered.decode('utf-8').splitlines(keepends=True),
+        fromfile=f'a/{os.path.relpath(filepath, BASE_DIR)}',
+        tofile=f'b/{os.path.relpath(filepath, BASE_DIR)}',
+    )
+    return True, ''.join(diff)
+
+
+def check_plan(plan, layout=DEFAULT_LAYOUT, jobs=1, show_diff=False, frontmatter=None):
+    """Report lessons whose on-disk markdown differs from what would be generated.
+
+    ``frontmatter`` is a front matter index to merge with (--merge-frontmatter).
+    Returns the process exit code: 0 if everything matches, 1 on drift or
+    when a lesson has no target file.
+    """
+    return report_check(*check_lessons(plan, layout, jobs, show_diff, frontmatter))
+
+
+def check_lessons(plan, layout=DEFAULT_LAYOUT, jobs=1, show_diff=False, frontmatter=None):
+    """Print each drifted or unresolved lesson; returns (checked, drifted, missing)."""
+    tasks = [(filepath, lesson_data, lesson_layout(lesson_data, layout).path,
+              frontmatter.get(filepath) if frontmatter is not None else None, show_diff)
+             for _, _, filepath, lesson_data in plan if filepath is not None]
+    results = run_tasks(tasks, jobs, render_and_compare)
+
+    drifted = missing = 0
+    for week_slug, day, filepath, lesson_data in plan:
+        if filepath is None:
+            print(f"  ⚠️  Could not find file for {week_slug} day {day}")
+            missing += 1
+            continue
+        is_drifted, diff = next(results)
+        if is_drifted:
+            drifted += 1
+            print(f"  ❌ {os.path.relpath(filepath, BASE_DIR)}")
+            if diff:
+                sys.stdout.write(diff)
+
+    checked = sum(1 for entry in plan if entry[2] is not None)
+    return checked, drifted, missing
+
+
+def report_check(checked, drifted, missing):
+    print(f"\n{'=' * 60}")
+    print(f"🔎 Checked {checked} files: {drifted} drifted, {missing} missing targets")
+    print(f"{'=' * 60}")
+    return 1 if drifted or missing else 0
 
-{self_test}
-"""
 
+# ─── INCREMENTAL CACHE ───────────────────────────────────────────────────────
+# .generate-cache.json maps lesson id -> {path, data_hash, template_version,
+# layout_hash, output_hash, lines}. A lesson is skipped when its data, the
+# template engine and its layout are unchanged and the file on disk still has
+# the bytes we last wrote.
 
-# ─── LESSON DATA: WEEK 3 — Multi-Client Event Loop ───────────────────────────
+def lesson_hash(lesson_data):
+    """Stable hash of a Lesson's data (key order and tuple/list independent)."""
+    blob = json.dumps(lesson_data.to_dict(), sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
 
-W03_LESSONS = [
-    {
-        'frontmatter': {
-            'id': 'w03-multi-client-event-loop-d01-quest-event-loop-state-model-2h',
-            'part': 'w03-multi-client-event-loop',
-            'title': 'Quest: Event Loop State Model  2h',
-            'order': 1,
-            'prereqs': [],
-        },
-        'goal_intro': 'Design the **complete state model** for a non-blocking event loop so every connection has explicit, trackable state transitions before you write any loop code.',
-        'goal_deliverables': [
-            'A **connection state enum** covering all lifecycle phases (connecting, reading, writing, closing)',
-            'A **state transition table** showing valid transitions with trigger events',
-            'A **blocking-call audit** proving no blocking operations exist in the loop path',
-            'A **per-connection data structure** spec showing what each connection tracks',
-        ],
-        'pass_criteria': [
-            ('State enum has ≥ 5 states', 'Count enum values'),
-            ('Transition table covers all state pairs', 'Verify every state has at least one exit transition'),
-            ('Blocking audit has zero violations', 'Search for recv/send/accept without O_NONBLOCK'),
-            ('Per-connection struct has ≥ 4 fields', 'Review struct definition'),
-            ('EAGAIN handling documented for every I/O call', 'Check each recv/send path'),
-        ],
-        'build_description': 'A design document defining the state machine for your multi-client event loop — the "blueprint" before writing C++ loop code.',
-        'build_deliverables': [
-            'File: `week-3/day1-event-loop-state-model.md`',
-            'Connection state enum with 5+ states: `CONNECTING`, `READING_HEADER`, `READING_BODY`, `WRITING`, `CLOSING`',
-            'State transition table with events and guard conditions',
-            'Per-connection struct: `{ fd, state, read_buf, write_buf, last_active, bytes_queued }`',
-        ],
-        'done_example': '''## Connection States
-enum ConnState {
-    CONNECTING,      // accept() returned, waiting for first data
-    READING_HEADER,  // partial header received, need more bytes
-    READING_BODY,    // header complete, reading payload
-    WRITING,         // response queued, draining write buffer
-    CLOSING          // shutdown initiated, draining then close
-};
-
-## Per-Connection Data
-struct Connection {
-    int fd;
-    ConnState state;
-    std::vector<uint8_t> read_buf;
-    std::vector<uint8_t> write_buf;
-    time_t last_active;
-    size_t bytes_queued;
-};''',
-        'code_lang': 'cpp',
-        'can_do': 'Describe every state a connection can be in and what triggers each transition.',
-        'cannot_yet': 'Run the event loop — that starts on Day 2 when you implement the select loop.',
-        'why_without': [
-            'Treat connections as stateless and lose track of partial reads mid-message',
-            'Accidentally call blocking `recv()` inside the event loop, freezing all clients',
-            'Have no way to detect or handle `EAGAIN` — the kernel telling you "not ready yet"',
-            'Waste hours debugging "why does the server hang with 2+ clients?"',
-        ],
-        'why_with': [
-            'Know exactly what phase each connection is in at all times',
-            'Handle `EAGAIN` as a normal event, not an error — the key insight of non-blocking I/O',
-            'Detect stuck connections by checking state + `last_active` timestamp',
-            'Build a foundation that scales cleanly from 2 clients to 200 clients',
-        ],
-        'why_connects': [
-            '**To Day 2:** You will plug this state model into a `select()` loop',
-            '**To Day 3:** Backpressure policy uses `bytes_queued` from this struct',
-            '**To Day 4:** `poll()` migration preserves these exact states',
-            '**To Week 4:** `epoll` upgrade keeps the same state machine, different notification',
-            '**To Week 6:** Overload detection triggers on state queue depths defined here',
-        ],
-        'mental_model_name': 'Explicit State Machines',
-        'mental_model_desc': '''In amateur code: state is scattered across local variables, if/else chains, and implicit assumptions.
-In professional systems: **every entity has an explicit state enum with documented transitions.**
-
-Event loops fail when state is implicit. A connection that\'s "reading" but also has unsent data in its write buffer
-is in an ambiguous state. Your state model eliminates ambiguity.
-
-By Week 11 when building replication, each follower node will have an explicit state machine too.
-This habit starts TODAY — make state visible, make transitions explicit.''',
-        'visual_model': '''┌──────────────────────────────────────────────────────────┐
-│               CONNECTION STATE MACHINE                    │
-├──────────────────────────────────────────────────────────┤
-│                                                          │
-│   accept()                                               │
-│      │                                                   │
-│      ▼                                                   │
-│  ┌────────────┐  readable    ┌─────────────────┐        │
-│  │ CONNECTING  │────────────▶│ READING_HEADER   │        │
-│  └────────────┘              └────────┬────────┘        │
-│                                       │ header complete  │
-│                                       ▼                  │
-│                              ┌─────────────────┐        │
-│                              │ READING_BODY     │        │
-│                              └────────┬────────┘        │
-│                                       │ body complete    │
-│                                       ▼                  │
-│                              ┌─────────────────┐        │
-│       EAGAIN ◀───────────────│ WRITING          │        │
-│       (retry later)          └────────┬────────┘        │
-│                                       │ write complete   │
-│                                       ▼                  │
-│                              ┌─────────────────┐        │
-│                              │ CLOSING           │        │
-│                              └────────┬────────┘        │
-│                                       │ fd closed        │
-│                                       ▼                  │
-│                                   [removed]              │
-│                                                          │
-│  ANY STATE ──── error/timeout ───▶ CLOSING               │
-└──────────────────────────────────────────────────────────┘''',
-        'ship_file': 'week-3/day1-event-loop-state-model.md',
-        'do_steps': [
-            {
-                'title': 'Define the connection state enum',
-                'why': 'Every connection needs a finite set of named states. Without this, you\'ll use booleans like `is_reading` and `is_writing` that create impossible combinations.',
-                'content': '''   Define at least 5 states. For each state, write one sentence explaining what the connection is doing:
-
-   ```cpp
-   // State: CONNECTING
-   // Connection accepted but no data exchanged yet.
-   // Valid next: READING_HEADER (on readable), CLOSING (on timeout)
-   ```''',
-            },
-            {
-                'title': 'Build the state transition table',
-                'why': 'A transition table prevents illegal state changes. On Day 4 when you migrate to `poll()`, this table is your regression checklist — behavior must be identical.',
-                'content': '''   Create a table with columns: Current State → Event → Next State → Action:
-
-   | Current | Event | Next | Action |
-   |---------|-------|------|--------|
-   | CONNECTING | fd readable | READING_HEADER | Start reading into buffer |
-   | READING_HEADER | header complete | READING_BODY | Parse header, continue reading |
-   | READING_BODY | body complete | WRITING | Prepare response, queue write |
-   | WRITING | write complete | CLOSING | Initiate graceful shutdown |
-   | WRITING | EAGAIN | WRITING | Register for writability, retry later |
-   | ANY | error | CLOSING | Log error, begin close sequence |
-   | ANY | timeout | CLOSING | Log timeout, begin close sequence |''',
-            },
-            {
-                'title': 'Design the per-connection data structure',
-                'why': 'Each connection is independent state. The struct IS the connection\'s memory. In Week 5 when threads access connections, ownership of this struct prevents data races.',
-                'content': '''   Define a struct with these minimum fields:
-
-   ```cpp
-   struct Connection {
-       int fd;                          // socket file descriptor
-       ConnState state;                 // current state enum value
-       std::vector<uint8_t> read_buf;   // partial read accumulator
-       std::vector<uint8_t> write_buf;  // pending write data
-       time_t last_active;              // for timeout detection
-       size_t bytes_queued;             // for backpressure tracking
-   };
-   ```
-
-   Add any additional fields you need for your protocol (e.g., `request_id`, `frame_bytes_remaining`).''',
-            },
-            {
-                'title': 'Audit for blocking calls',
-                'why': 'ONE blocking call inside the event loop freezes ALL clients. This audit catches the #1 event-loop bug before it happens.',
-                'content': '''   Search your planned code paths for these dangerous patterns:
-
-   | Call | Danger | Non-blocking alternative |
-   |------|--------|------------------------|
-   | `recv(fd, ...)` without `O_NONBLOCK` | Blocks if no data ready | Set `O_NONBLOCK` on fd after `accept()` |
-   | `send(fd, ...)` without `O_NONBLOCK` | Blocks if send buffer full | Check writability first, handle `EAGAIN` |
-   | `accept()` without `O_NONBLOCK` | Blocks if no pending conn | Set `O_NONBLOCK` on listen socket |
-   | `sleep()` / `usleep()` | Freezes entire loop | Use poll/select timeout instead |
-
-   Document your rule: **"Every fd is set `O_NONBLOCK` immediately after creation."**''',
-            },
-            {
-                'title': 'Define EAGAIN handling for every I/O path',
-                'why': '`EAGAIN` is not an error — it means "try again later." Mishandling it causes silent data loss. By Week 6, your backpressure system depends on correct EAGAIN response.',
-                'content': '''   For each I/O operation, define what happens on `EAGAIN`:
-
-   ```
-   recv() returns EAGAIN:
-     → Keep current state
-     → Re-register fd for read readiness
-     → Do NOT close connection
-     → Do NOT discard partial buffer
-
-   send() returns EAGAIN:
-     → Keep remaining data in write_buf
-     → Register fd for write readiness
-     → Transition state to WRITING (if not already)
-     → bytes_queued tracks unsent amount
-   ```
-
-   **Rule:** EAGAIN means "not ready yet" — NEVER means "failed."''',
-            },
-        ],
-        'done_when': [
-            'Connection state enum with 5+ named states — *becomes your Day 2 switch/case structure*',
-            'State transition table with events and guard conditions — *your Day 4 regression checklist*',
-            'Per-connection struct with fd, state, buffers, timestamp, queue counter — *the data each connection owns*',
-            'Blocking call audit with zero violations — *prevents the #1 event-loop bug*',
-            'EAGAIN handling documented for recv and send — *the foundation of non-blocking I/O*',
-        ],
-        'proof_instruction': 'Paste your connection state enum, transition table, and per-connection struct, or upload `week-3/day1-event-loop-state-model.md`.',
-        'self_test': [
-            ('What does `EAGAIN` mean when `recv()` returns it?', '"Not ready yet — try again later." It is NOT an error.'),
-            ('What happens if you call blocking `recv()` inside an event loop with 50 clients?', 'The entire loop freezes until that one recv completes — all 49 other clients wait.'),
-            ('What state must a connection track to implement backpressure?', '`bytes_queued` (or write buffer size) — if it exceeds a threshold, stop reading from that client.'),
-        ],
-    },
-    {
-        'frontmatter': {
-            'id': 'w03-multi-client-event-loop-d02-quest-first-multi-client-loop-2h',
-            'part': 'w03-multi-client-event-loop',
-            'title': 'Quest: First Multi-Client Loop  2h',
-            'order': 2,
-            'prereqs': ['w03-multi-client-event-loop-d01-quest-event-loop-state-model-2h'],
-        },
-        'goal_intro': 'Plan and design your first **multi-client event loop** using `select()` so you can serve 50+ concurrent clients from a single thread without blocking.',
-        'goal_deliverables': [
-            'A **select() loop pseudocode** showing fd_set setup, timeout, and dispatch',
-            'A **connection registry** design for tracking all active connections',
-            'A **connect/disconnect burst test plan** for 50+ clients',
-            'A **max-fd tracking strategy** to handle `select()` limits correctly',
-        ],
-        'pass_criteria': [
-            ('select() loop pseudocode handles read, write, and error sets', 'Verify all 3 fd_sets used'),
-            ('Connection registry supports add/remove/lookup by fd', 'Check API signatures'),
-            ('Max-fd tracking updates on every add/remove', 'Trace through add/remove paths'),
-            ('Test plan covers 50+ concurrent idle clients', 'Count test scenario rows'),
-            ('Timeout value chosen and justified', 'Look for timeout rationale'),
-        ],
-        'build_description': 'A design document for your first multi-client server using `select()` — the simplest multiplexing API that works everywhere.',
-        'build_deliverables': [
-            'File: `week-3/day2-select-plan.md`',
-            'select() loop pseudocode with fd_set setup and event dispatch',
-            'Connection registry API: `add(fd)`, `remove(fd)`, `get(fd)`',
-            'Test plan for 50+ concurrent connections with connect/disconnect bursts',
-        ],
-        'done_example': '''## Select Loop Pseudocode
-while (running) {
-    fd_set read_fds, write_fds, error_fds;
-    FD_ZERO(&read_fds); FD_ZERO(&write_fds); FD_ZERO(&error_fds);
-
-    FD_SET(listen_fd, &read_fds);  // always watch for new connections
-    int max_fd = listen_fd;
-
-    for (auto& [fd, conn] : registry) {
-        FD_SET(fd, &read_fds);     // always watch for data
-        if (!conn.write_buf.empty())
-            FD_SET(fd, &write_fds); // watch for writability if data pending
-        FD_SET(fd, &error_fds);
-        max_fd = std::max(max_fd, fd);
-    }
 
-    struct timeval tv = {.tv_sec = 1, .tv_usec = 0};
-    int ready = select(max_fd + 1, &read_fds, &write_fds, &error_fds, &tv);
-    // dispatch to handlers...
-}''',
-        'code_lang': 'cpp',
-        'can_do': 'Design a complete multi-client loop that tracks and dispatches events for 50+ connections.',
-        'cannot_yet': 'Handle backpressure — that comes on Day 3. You also can\'t handle `poll()` migration yet (Day 4).',
-        'why_without': [
-            'Be limited to one client at a time (blocking server) — useless for real workloads',
-            'Misuse `select()` by forgetting to rebuild fd_sets each iteration (they\'re destructive)',
-            'Forget to track `max_fd` and silently miss events on higher-numbered descriptors',
-            'Have no plan for handling connect/disconnect storms that happen in production',
-        ],
-        'why_with': [
-            'Serve 50+ clients from a single thread — the foundation of all high-performance servers',
-            'Understand `select()` mechanics deeply before migrating to better APIs',
-            'Have a clear connection registry that maps fd → state for instant lookups',
-            'Have a test plan that proves your loop survives connection churn',
-        ],
-        'why_connects': [
-            '**To Day 1:** Your state model plugs directly into this loop\'s dispatch logic',
-            '**To Day 3:** Backpressure policy adds write-buffer limits to this registry',
-            '**To Day 4:** `poll()` replaces `select()` but your dispatch logic stays identical',
-            '**To Week 4:** `epoll` replaces `poll()` — same pattern, better scaling',
-            '**To Week 5:** Thread pool offloads CPU work FROM this loop',
-        ],
-        'mental_model_name': 'Event-Driven Dispatch',
-        'mental_model_desc': '''In blocking servers: one thread per client. 1000 clients = 1000 threads = memory explosion.
-In event-driven servers: **one thread, one loop, N clients. The loop asks "who\'s ready?" and dispatches.**
-
-`select()` is the simplest form of this pattern. It\'s limited (~1024 fds) but teaches the core concept:
-**readiness notification → dispatch → handle → back to waiting.**
-
-Every high-performance server (nginx, Redis, Node.js) uses this pattern. You\'re learning the primitive version first.''',
-        'visual_model': '''┌──────────────────────────────────────────────────────────┐
-│                   SELECT() EVENT LOOP                     │
-├──────────────────────────────────────────────────────────┤
-│                                                          │
-│  ┌──────────────────────────────────┐                    │
-│  │ 1. Build fd_sets from registry   │                    │
-│  │    read_fds: all connections     │                    │
-│  │    write_fds: those with data    │                    │
-│  │    error_fds: all connections    │                    │
-│  │    max_fd: track highest fd      │                    │
-│  └──────────────┬───────────────────┘                    │
-│                 ▼                                         │
-│  ┌──────────────────────────────────┐                    │
-│  │ 2. select(max_fd+1, r, w, e, t) │ ◀── blocks here    │
-│  │    (waits for readiness)          │     until ready    │
-│  └──────────────┬───────────────────┘                    │
-│                 ▼                                         │
-│  ┌──────────────────────────────────┐                    │
-│  │ 3. Dispatch ready fds:           │                    │
-│  │    listen_fd → accept new conn   │                    │
-│  │    readable  → recv into buffer  │                    │
-│  │    writable  → send from buffer  │                    │
-│  │    error     → close + cleanup   │                    │
-│  └──────────────┬───────────────────┘                    │
-│                 │                                         │
-│                 └──── loop back to step 1 ────────────▶  │
-│                                                          │
-│  Connection Registry: fd → Connection { state, bufs }    │
-│  [fd=4: READING] [fd=7: WRITING] [fd=12: READING] ...   │
-└──────────────────────────────────────────────────────────┘''',
-        'ship_file': 'week-3/day2-select-plan.md',
-        'do_steps': [
-            {
-                'title': 'Design the connection registry',
-                'why': 'You need O(1) lookup from fd to connection state. A `std::unordered_map<int, Connection>` gives you this. On Day 3, backpressure decisions use this registry.',
-                'content': '''   ```cpp
-   class ConnectionRegistry {
-       std::unordered_map<int, Connection> conns_;
-       int max_fd_ = -1;
-   public:
-       void add(int fd, Connection conn);  // insert + update max_fd
-       void remove(int fd);                 // erase + recalculate max_fd
-       Connection* get(int fd);             // lookup, returns nullptr if missing
-       int max_fd() const;                  // for select() first argument
-       // Iterator for building fd_sets
-       auto begin() { return conns_.begin(); }
-       auto end() { return conns_.end(); }
-   };
-   ```''',
-            },
-            {
-                'title': 'Write the select() loop pseudocode',
-                'why': '`select()` DESTROYS the fd_sets on return — you must rebuild them every iteration. Forgetting this causes "server stops responding after first event."',
-                'content': '''   Write the full loop structure showing:
-   - fd_set initialization (FD_ZERO every iteration!)
-   - Adding listen_fd to read_fds
-   - Adding all client fds to appropriate sets
-   - select() call with timeout
-   - Dispatch logic checking FD_ISSET for each fd
-
-   **Critical rule:** FD_ZERO + rebuild EVERY iteration. select() modifies the sets.''',
-            },
-            {
-                'title': 'Define the accept handler',
-                'why': 'New connections arrive as readability on the listen socket. You must set the new fd to `O_NONBLOCK` immediately — this is the rule from Day 1.',
-                'content': '''   ```
-   if FD_ISSET(listen_fd, &read_fds):
-       new_fd = accept(listen_fd, ...)
-       set_nonblocking(new_fd)           // CRITICAL: O_NONBLOCK immediately
-       registry.add(new_fd, Connection{
-           .fd = new_fd,
-           .state = CONNECTING,
-           .last_active = now()
-       })
-   ```''',
-            },
-            {
-                'title': 'Define read/write dispatch handlers',
-                'why': 'Read and write handlers are where partial I/O and EAGAIN happen. Your Day 1 state machine drives these transitions.',
-                'content': '''   For readable fds:
-   ```
-   bytes = recv(fd, buf, sizeof(buf), 0)
-   if bytes > 0:  update read_buf, advance state per transition table
-   if bytes == 0: peer closed → transition to CLOSING
-   if bytes < 0 && errno == EAGAIN: do nothing, try again next loop
-   if bytes < 0 && errno != EAGAIN: error → transition to CLOSING
-   ```
-
-   For writable fds:
-   ```
-   bytes = send(fd, write_buf.data(), write_buf.size(), 0)
-   if bytes > 0:  remove sent bytes from write_buf
-   if bytes < 0 && errno == EAGAIN: do nothing, try again next loop
-   if write_buf.empty(): all data sent → advance state
-   ```''',
-            },
-            {
-                'title': 'Plan the 50-client test',
-                'why': 'You need to prove this works under realistic load. 50 clients exposes fd_set rebuild bugs, max_fd tracking errors, and connection churn issues.',
-                'content': '''   Design a test scenario table:
-
-   | # | Scenario | Expected |
-   |---|----------|----------|
-   | 1 | 50 clients connect simultaneously | All accepted, all in registry |
-   | 2 | All 50 send one message | All messages received correctly |
-   | 3 | 25 clients disconnect | 25 remain, no fd leaks |
-   | 4 | 25 new clients connect while 25 active | Total 50 again, no confusion |
-   | 5 | All 50 send messages rapidly | No data loss, no starvation |
-   | 6 | Kill server during active connections | Clean shutdown attempted |''',
-            },
-        ],
-        'done_when': [
-            'Connection registry with add/remove/lookup in O(1) — *plugs directly into Day 3 backpressure checks*',
-            'select() loop pseudocode rebuilds fd_sets every iteration — *prevents the #1 select bug*',
-            'Accept handler sets O_NONBLOCK immediately — *Day 1 rule enforced*',
-            'Read/write handlers follow EAGAIN protocol — *no data loss on partial I/O*',
-            '50-client test plan with 6+ scenarios — *proves loop survives real connection patterns*',
-        ],
-        'proof_instruction': 'Paste your select() loop pseudocode and connection registry design, or upload `week-3/day2-select-plan.md`.',
-        'self_test': [
-            ('Why must you call FD_ZERO before every select() call?', 'Because select() modifies the fd_sets — it clears bits for fds that are NOT ready. Reusing without zeroing misses events.'),
-            ('What is the first argument to select()?', '`max_fd + 1` — select needs to know the range of fds to check.'),
-            ('How many threads does your event loop use to handle 50 clients?', 'ONE thread. That is the whole point — multiplexing replaces threading for I/O-bound work.'),
-        ],
-    },
-    {
-        'frontmatter': {
-            'id': 'w03-multi-client-event-loop-d03-quest-backpressure-policy-2h',
-            'part': 'w03-multi-client-event-loop',
-            'title': 'Quest: Backpressure Policy  2h',
-            'order': 3,
-            'prereqs': ['w03-multi-client-event-loop-d02-quest-first-multi-client-loop-2h'],
-        },
-        'goal_intro': 'Define a **per-client backpressure policy** that prevents one slow client from consuming unbounded memory and destabilizing the entire server.',
-        'goal_deliverables': [
-            'A **per-client buffer limit** defining max queued bytes before intervention',
-            'A **slow-reader detection rule** with specific threshold and time window',
-            'An **intervention policy**: what happens when limits are exceeded (throttle vs disconnect)',
-            'A **slow-reader test scenario** with expected disconnect timing',
-        ],
-        'pass_criteria': [
-            ('Per-client buffer cap defined in bytes', 'Check for specific number (e.g., 64KB)'),
-            ('Slow-reader detection rule has both size AND time thresholds', 'Verify two conditions checked'),
-            ('Disconnect policy is explicit (not "maybe")', 'Look for clear IF/THEN rule'),
-            ('Test scenario shows input, timing, and expected disconnect', 'Verify test has concrete numbers'),
-            ('Fairness argument: slow client cannot starve fast clients', 'Check for reasoning about other clients'),
-        ],
-        'build_description': 'A policy document defining how your event loop protects itself from slow clients — the "immune system" of your server.',
-        'build_deliverables': [
-            'File: `week-3/day3-backpressure-policy.md`',
-            'Per-client write buffer cap: e.g., 64KB max queued per connection',
-            'Slow-reader rule: disconnect if buffer stays > 80% for > 5 seconds',
-            'Test scenario: client reads 1 byte/sec while server sends 1KB/sec',
-        ],
-        'done_example': '''## Backpressure Policy
-Max queued bytes per client: 65536 (64KB)
-Warning threshold: 52428 (80%)
-Disconnect threshold: 65536 (100%) OR 80% for > 5 seconds
-
-## Slow-Reader Rule
-IF write_buf.size() > MAX_QUEUED_BYTES:
-    → log warning, close connection immediately
-IF write_buf.size() > WARNING_THRESHOLD for > 5 seconds:
-    → log slow-reader warning, close connection
-ELSE:
-    → normal operation, queue data for sending''',
-        'code_lang': 'markdown',
-        'can_do': 'Define exactly when and why your server disconnects slow clients.',
-        'cannot_yet': 'Implement the enforcement — that integrates with your loop code. The enforcement code comes when you build the server.',
-        'why_without': [
-            'One slow client causes your server to buffer gigabytes of unsent data until OOM kill',
-            'All 49 other clients suffer latency spikes because the server is swapping memory',
-            'Have no way to distinguish "slow client" from "temporarily delayed network"',
-            'Production deployments fail under mixed-speed client workloads — the most common real-world scenario',
-        ],
-        'why_with': [
-            'Your server has explicit memory bounds — maximum memory usage is predictable',
-            'Slow clients are detected and disconnected before they affect others',
-            'You have clear rules that can be tuned in production (thresholds are config, not guesses)',
-            'Week 6\'s full backpressure system builds directly on this per-client policy',
-        ],
-        'why_connects': [
-            '**To Day 1:** The `bytes_queued` field in your Connection struct is what tracks this',
-            '**To Day 2:** Your select loop checks write buffer size before queuing more data',
-            '**To Day 5:** Connection lifecycle tests include slow-reader disconnect scenarios',
-            '**To Week 5:** Thread pool queue limits follow the same bounded-resource principle',
-            '**To Week 6:** Full backpressure policy ladder starts with this per-client cap',
-        ],
-        'mental_model_name': 'Bounded Resources',
-        'mental_model_desc': '''In naive code: buffers grow without limit. "It\'ll be fine, most clients are fast."
-In production code: **every buffer has a maximum size, and exceeding it triggers an explicit policy.**
-
-This principle applies everywhere in distributed systems:
-- Per-client write buffers (today)
-- Thread pool work queues (Week 5)
-- Replication log buffers (Week 11)
-- CAS object store quotas (Week 13)
-
-The rule: if you can\'t name the maximum size and the overflow policy, you have a bug waiting to happen.''',
-        'visual_model': '''┌──────────────────────────────────────────────────────────┐
-│              BACKPRESSURE DECISION FLOW                    │
-├──────────────────────────────────────────────────────────┤
-│                                                          │
-│  Server has data to send to Client X                     │
-│       │                                                  │
-│       ▼                                                  │
-│  ┌─────────────────────────────────┐                     │
-│  │ Check: write_buf.size() < MAX?  │                     │
-│  └─────────┬──────────┬───────────┘                     │
-│       YES  │          │  NO                              │
-│            ▼          ▼                                   │
-│  ┌──────────────┐  ┌──────────────────────┐             │
-│  │ Queue data    │  │ Buffer FULL!          │             │
-│  │ in write_buf  │  │ → Log: "slow client"  │             │
-│  └──────────────┘  │ → Close connection     │             │
-│                     │ → Free buffer          │             │
-│                     └──────────────────────┘             │
-│                                                          │
-│  Also check time-based:                                  │
-│  ┌─────────────────────────────────────────┐            │
-│  │ IF buf > 80% for > 5 sec continuously:  │            │
-│  │    → Disconnect (not temporarily slow — │            │
-│  │       chronically slow)                  │            │
-│  └─────────────────────────────────────────┘            │
-│                                                          │
-│  Result: Server memory usage bounded to:                 │
-│  MAX_CLIENTS × MAX_BUFFER_PER_CLIENT = predictable       │
-└──────────────────────────────────────────────────────────┘''',
-        'ship_file': 'week-3/day3-backpressure-policy.md',
-        'do_steps': [
-            {
-                'title': 'Define the per-client buffer cap',
-                'why': 'Without a number, "bounded" is meaningless. 64KB is a reasonable starting point — large enough for normal messages, small enough that 1000 clients = 64MB total.',
-                'content': '''   Choose your limits:
-
-   ```
-   MAX_WRITE_BUFFER = 65536   // 64KB per client
-   WARNING_THRESHOLD = 52428  // 80% of max
-   MAX_CLIENTS = 1000         // server-wide limit
-   MAX_SERVER_MEMORY = MAX_CLIENTS × MAX_WRITE_BUFFER = 64MB
-   ```
-
-   Justify your numbers: Why 64KB? Because a typical protocol message is < 4KB, so 64KB holds ~16 pending messages — plenty for normal operation.''',
-            },
-            {
-                'title': 'Define the slow-reader detection rule',
-                'why': 'Size alone isn\'t enough. A client at 90% buffer for 0.1 seconds is fine (temporary network blip). A client at 90% for 5 seconds is chronically slow and must be disconnected.',
-                'content': '''   ```
-   SLOW_READER_RULE:
-     Condition 1 (instant): write_buf.size() >= MAX_WRITE_BUFFER
-       → Action: disconnect immediately, log "buffer_overflow"
-
-     Condition 2 (sustained): write_buf.size() >= WARNING_THRESHOLD
-                               AND time_above_threshold > 5 seconds
-       → Action: disconnect, log "slow_reader_sustained"
-
-     Condition 3 (normal): write_buf.size() < WARNING_THRESHOLD
-       → Action: continue normal operation
-   ```''',
-            },
-            {
-                'title': 'Design the disconnect procedure',
-                'why': 'Disconnecting a client requires cleanup: flush what you can, close the fd, remove from registry, log the reason. Skipping any step causes resource leaks.',
-                'content': '''   ```
-   disconnect(fd, reason):
-     1. Log: "{fd} disconnected: {reason}, queued={bytes_queued}"
-     2. Attempt to send any final error message (best-effort)
-     3. shutdown(fd, SHUT_WR)    // signal no more writes
-     4. close(fd)                // release the fd
-     5. registry.remove(fd)      // remove from tracking
-     6. Update metrics: slow_client_disconnects++
-   ```''',
-            },
-            {
-                'title': 'Write the fairness argument',
-                'why': 'Backpressure isn\'t just about one client — it\'s about protecting ALL clients. If slow Client A consumes all server memory, fast Clients B-Z suffer.',
-                'content': '''   Document why this policy is fair:
-
-   ```
-   FAIRNESS GUARANTEE:
-   - Each client gets equal maximum buffer space (64KB)
-   - No client can cause another client's data to be dropped
-   - Server total memory is bounded: MAX_CLIENTS × MAX_BUFFER
-   - Fast clients are never delayed by slow clients
-   - Disconnecting a slow client frees resources for healthy clients
-   ```''',
-            },
-            {
-                'title': 'Design the slow-reader test scenario',
-                'why': 'You need concrete numbers to verify the policy works. This test becomes part of your Day 5 connection lifecycle tests.',
-                'content': '''   ```
-   TEST: Slow Reader Disconnect
-   Setup:
-     - Server sends 1KB messages every 100ms to Client X
-     - Client X reads only 1 byte per second
-   Expected timeline:
-     T=0s:    write_buf = 0 bytes
-     T=1s:    write_buf ≈ 10KB (10 messages queued)
-     T=5s:    write_buf ≈ 50KB (hits WARNING_THRESHOLD)
-     T=5s+5s: write_buf ≈ 100KB (exceeds MAX, or sustained > 5s)
-     T≈6.5s:  Server disconnects Client X
-   Expected log:
-     "fd=7 disconnected: slow_reader_sustained, queued=52430"
-   Expected effect:
-     - All other clients unaffected
-     - Server memory drops by ~50KB
-   ```''',
-            },
-        ],
-        'done_when': [
-            'Per-client buffer cap with specific byte value — *becomes a constant in your server code*',
-            'Slow-reader rule with both instant and sustained conditions — *two-tier detection catches both floods and chronic slowness*',
-            'Disconnect procedure with logging and cleanup — *prevents fd leaks on forced disconnect*',
-            'Fairness argument explaining why this protects all clients — *the rationale for code review*',
-            'Slow-reader test with timeline and expected log output — *becomes a Day 5 test case*',
-        ],
-        'proof_instruction': 'Paste your backpressure policy with buffer limits and slow-reader rule, or upload `week-3/day3-backpressure-policy.md`.',
-        'self_test': [
-            ('What is the maximum memory your server can use for write buffers?', 'MAX_CLIENTS × MAX_WRITE_BUFFER (e.g., 1000 × 64KB = 64MB)'),
-            ('Why disconnect slow clients instead of just pausing reads?', 'Pausing reads still holds buffer memory. Disconnecting frees it immediately for healthy clients.'),
-            ('What is the difference between the instant and sustained disconnect rules?', 'Instant: buffer is completely full → disconnect now. Sustained: buffer is > 80% for > 5 seconds → disconnect (chronically slow).'),
-        ],
-    },
-    {
-        'frontmatter': {
-            'id': 'w03-multi-client-event-loop-d04-quest-poll-migration-2h',
-            'part': 'w03-multi-client-event-loop',
-            'title': 'Quest: Poll Migration  2h',
-            'order': 4,
-            'prereqs': ['w03-multi-client-event-loop-d03-quest-backpressure-policy-2h'],
-        },
-        'goal_intro': 'Plan the **migration from `select()` to `poll()`** while preserving every behavior from your existing event loop — a practice run for changing internals without changing contracts.',
-        'goal_deliverables': [
-            'A **select→poll mapping table** showing how each select concept translates to poll',
-            'A **migration checklist** with before/after verification steps',
-            'A **regression test list** proving identical behavior after the switch',
-            'An **analysis** of what `poll()` improves over `select()` and what stays the same',
-        ],
-        'pass_criteria': [
-            ('Mapping table covers fd_set, FD_ISSET, FD_SET, max_fd, timeout', 'All 5 select concepts mapped'),
-            ('Migration checklist has ≥ 8 steps', 'Count checklist items'),
-            ('Regression tests cover connect, disconnect, send, recv, timeout, EAGAIN', 'Verify 6 behaviors tested'),
-            ('Analysis compares fd limit, performance, and API complexity', 'Check 3 comparison points'),
-            ('State machine from Day 1 is unchanged', 'Confirm same states and transitions'),
-        ],
-        'build_description': 'A migration plan document for swapping `select()` with `poll()` — your first practice at changing implementation without changing behavior.',
-        'build_deliverables': [
-            'File: `week-3/day4-poll-migration-checklist.md`',
-            'select→poll mapping table',
-            'Migration checklist with 8+ verification steps',
-            'Regression test list for 6+ behaviors',
-        ],
-        'done_example': '''## Select → Poll Mapping
-| select concept | poll equivalent |
-|---------------|-----------------|
-| fd_set read_fds | pollfd.events = POLLIN |
-| fd_set write_fds | pollfd.events = POLLOUT |
-| FD_SET(fd, &set) | Add pollfd to array |
-| FD_ISSET(fd, &set) | Check pollfd.revents |
-| max_fd + 1 | nfds = array.size() (no max_fd needed!) |
-| struct timeval | timeout_ms (int, milliseconds) |''',
-        'code_lang': 'markdown',
-        'can_do': 'Plan a complete internal migration with zero behavior change.',
-        'cannot_yet': 'Migrate to `epoll` — that\'s next week\'s upgrade. `poll()` is the intermediate step.',
-        'why_without': [
-            'Be stuck with `select()` and its 1024-fd limit forever',
-            'Fear making internal changes because you can\'t verify behavior preservation',
-            'Skip the intermediate `poll()` step and try jumping straight to `epoll`, making debugging harder',
-            'Miss the most important engineering skill: changing internals without breaking contracts',
-        ],
-        'why_with': [
-            'Practice the "swap internals, keep contracts" pattern you\'ll use repeatedly',
-            'Remove the fd_set 1024-fd limitation without any behavior change',
-            'Have a regression checklist that proves correctness through the migration',
-            'Be confident for Week 4\'s `epoll` upgrade — same process, bigger API change',
-        ],
-        'why_connects': [
-            '**To Days 1-3:** Your state machine, registry, and backpressure policy are UNCHANGED',
-            '**To Day 5:** Regression tests from this migration join the lifecycle test suite',
-            '**To Week 4:** `epoll` migration follows this exact same checklist pattern',
-            '**To Week 7:** Protocol version migration uses the same "change internals, keep API" discipline',
-            '**To Week 11:** Replication protocol upgrades follow the same regression pattern',
-        ],
-        'mental_model_name': 'Contract-Preserving Migration',
-        'mental_model_desc': '''The most important skill in long-lived systems is NOT building the first version.
-It\'s **changing the implementation while preserving the contract.**
-
-`select()` → `poll()` is a tiny migration. But the PROCESS is identical to:
-- Upgrading database engines
-- Swapping serialization formats
-- Migrating from REST to gRPC
-
-The process: (1) Map old → new concepts. (2) Checklist every change. (3) Regression test EVERY behavior.
-If you master this for `select→poll`, you\'ll do it confidently for any migration.''',
-        'visual_model': '''┌──────────────────────────────────────────────────────────┐
-│              SELECT → POLL MIGRATION                      │
-├──────────────────────────────────────────────────────────┤
-│                                                          │
-│  BEFORE (select):                AFTER (poll):           │
-│  ┌────────────────┐              ┌──────────────────┐    │
-│  │ fd_set read_fds │              │ struct pollfd[] { │    │
-│  │ fd_set write_fds│              │   .fd = fd,       │    │
-│  │ max_fd tracking │              │   .events = POLLIN│    │
-│  │ FD_ZERO every   │              │              |     │    │
-│  │   iteration     │              │         POLLOUT    │    │
-│  └────────────────┘              │ }                  │    │
-│                                   └──────────────────┘    │
-│  UNCHANGED:                                               │
-│  ┌────────────────────────────────────────────────┐      │
-│  │ ✅ Connection state machine (Day 1)             │      │
-│  │ ✅ Connection registry (Day 2)                  │      │
-│  │ ✅ Backpressure policy (Day 3)                  │      │
-│  │ ✅ EAGAIN handling                              │      │
-│  │ ✅ Accept/read/write dispatch logic             │      │
-│  │ ✅ All external behavior                        │      │
-│  └────────────────────────────────────────────────┘      │
-│                                                          │
-│  IMPROVED:                                               │
-│  ✅ No 1024-fd limit                                     │
-│  ✅ No FD_ZERO rebuild needed                            │
-│  ✅ Cleaner event iteration                              │
-│  ✅ Dynamic array instead of fixed bitmap                │
-└──────────────────────────────────────────────────────────┘''',
-        'ship_file': 'week-3/day4-poll-migration-checklist.md',
-        'do_steps': [
-            {
-                'title': 'Build the select→poll mapping table',
-                'why': 'A side-by-side mapping eliminates guesswork. Every select concept must have a poll equivalent before you change any code.',
-                'content': '''   Map every `select()` concept to its `poll()` equivalent:
-
-   ```
-   select: FD_SET(fd, &read_fds)     →  poll: pfd.events |= POLLIN
-   select: FD_SET(fd, &write_fds)    →  poll: pfd.events |= POLLOUT
-   select: FD_ISSET(fd, &read_fds)   →  poll: pfd.revents & POLLIN
-   select: FD_ISSET(fd, &write_fds)  →  poll: pfd.revents & POLLOUT
-   select: max_fd + 1                →  poll: not needed (array length)
-   select: struct timeval {sec, usec} →  poll: int timeout_ms
-   select: error_fds                 →  poll: POLLERR | POLLHUP in revents
-   ```''',
-            },
-            {
-                'title': 'Write the migration checklist',
-                'why': 'A step-by-step checklist prevents partial migration where some code uses select and some uses poll — a common source of bugs.',
-                'content': '''   ```
-   MIGRATION CHECKLIST:
-   □ 1. Replace fd_set declarations with std::vector<pollfd>
-   □ 2. Replace FD_ZERO with vector.clear()
-   □ 3. Replace FD_SET with vector.push_back({fd, events, 0})
-   □ 4. Replace select() call with poll(fds.data(), fds.size(), timeout_ms)
-   □ 5. Replace FD_ISSET with revents & POLLIN / POLLOUT checks
-   □ 6. Remove max_fd tracking entirely
-   □ 7. Add POLLERR/POLLHUP checks for error detection
-   □ 8. Update timeout from timeval to milliseconds integer
-   □ 9. Run ALL regression tests
-   □ 10. Remove all select-related #includes
-   ```''',
-            },
-            {
-                'title': 'Define regression tests',
-                'why': 'Every behavior that worked with select must work identically with poll. These tests become permanent — they also verify the Week 4 epoll migration.',
-                'content': '''   | # | Behavior | Test | Expected |
-   |---|---------|------|----------|
-   | 1 | Accept new connection | Connect one client | Client added to registry |
-   | 2 | Receive data | Send "hello" | Server receives "hello" |
-   | 3 | Send response | Server sends "echo" | Client receives "echo" |
-   | 4 | Client disconnect | Close client socket | Server removes from registry |
-   | 5 | Timeout | No activity for 1s | select/poll returns 0 |
-   | 6 | EAGAIN on write | Fill client recv buffer | Server handles without crash |
-   | 7 | 50 concurrent clients | Connect 50 clients | All served correctly |
-   | 8 | Backpressure | Slow reader | Disconnected per policy |''',
-            },
-            {
-                'title': 'Analyze poll improvements',
-                'why': 'Understanding WHY you migrated helps you decide when further migration (to epoll) is warranted versus premature optimization.',
-                'content': '''   ```
-   WHAT POLL IMPROVES:
-   ✅ No fd limit (select capped at FD_SETSIZE, typically 1024)
-   ✅ No bitmap rebuild — pollfd array persists (only reset revents)
-   ✅ Cleaner API — events and revents are explicit bitmasks
-   ✅ Dynamic sizing — just grow the vector
-
-   WHAT POLL DOES NOT IMPROVE:
-   ❌ Still O(n) scan of all fds each call (epoll fixes this)
-   ❌ Still copies fd array to kernel each call (epoll fixes this)
-   ❌ No edge-triggered mode (epoll adds this)
-   ```''',
-            },
-            {
-                'title': 'Document the "unchanged" list',
-                'why': 'The most important part of a migration is what does NOT change. If your state machine or backpressure policy changed, something went wrong.',
-                'content': '''   Explicitly list everything that must be identical:
-
-   ```
-   UNCHANGED AFTER MIGRATION:
-   ✅ Connection state machine (enum values, transitions)
-   ✅ Connection registry (add/remove/get API)
-   ✅ Backpressure policy (buffer limits, disconnect rules)
-   ✅ Protocol behavior (framing, parsing, responses)
-   ✅ Logging format and content
-   ✅ Exit codes and error handling
-   ✅ All external-facing behavior
-   ```''',
-            },
-        ],
-        'done_when': [
-            'select→poll mapping table covers all 7 concepts — *your migration reference card*',
-            'Migration checklist with 10 steps — *follow sequentially, check each off*',
-            '8 regression tests covering all observable behaviors — *reusable for Week 4 epoll migration*',
-            'Analysis of what improves and what doesn\'t — *prevents over-optimizing or under-migrating*',
-            'Unchanged list confirming state machine and contracts preserved — *the #1 migration safety check*',
-        ],
-        'proof_instruction': 'Paste your select→poll mapping table and regression test list, or upload `week-3/day4-poll-migration-checklist.md`.',
-        'self_test': [
-            ('What select limitation does poll remove?', 'The FD_SETSIZE limit (typically 1024 fds). poll uses a dynamic array with no fixed limit.'),
-            ('What does poll NOT improve over select?', 'Still O(n) — polls every fd every call, still copies fd array to kernel. epoll fixes both.'),
-            ('What is the most important thing to verify after migration?', 'That ALL external behavior is identical — same responses, same disconnects, same logging. Internals changed, contracts did not.'),
-        ],
-    },
-    {
-        'frontmatter': {
-            'id': 'w03-multi-client-event-loop-d05-quest-connection-lifecycle-tests-2h',
-            'part': 'w03-multi-client-event-loop',
-            'title': 'Quest: Connection Lifecycle Tests  2h',
-            'order': 5,
-            'prereqs': ['w03-multi-client-event-loop-d04-quest-poll-migration-2h'],
-        },
-        'goal_intro': 'Design the **complete connection lifecycle test suite** that proves your event loop correctly handles every phase from accept to close, including churn, half-close, and fd leak detection.',
-        'goal_deliverables': [
-            'A **lifecycle test matrix** covering open/read/write/error/close for every state',
-            'A **churn test plan** with rapid connect/disconnect cycles and leak counters',
-            'A **half-close test scenario** proving server handles `shutdown()` correctly',
-            'An **fd leak detection strategy** that catches descriptor leaks over time',
-        ],
-        'pass_criteria': [
-            ('Lifecycle matrix covers all 5 connection states from Day 1', 'Map test to each enum value'),
-            ('Churn test has specific cycle count and leak counter', 'Verify numbers (e.g., 1000 cycles, 0 leaks)'),
-            ('Half-close test shows expected server behavior', 'Verify shutdown(SHUT_WR) handling'),
-            ('Fd leak detection has measurement method', 'Check for /proc/self/fd or lsof approach'),
-            ('Test plan covers ≥ 15 scenarios', 'Count numbered test rows'),
-        ],
-        'build_description': 'A comprehensive test plan document covering every connection lifecycle scenario — your quality gate before moving to Week 4.',
-        'build_deliverables': [
-            'File: `week-3/day5-connection-lifecycle-tests.md`',
-            '15+ test scenarios covering all lifecycle phases',
-            'Churn test: 1000 rapid connect/disconnect cycles with zero fd leaks',
-            'Half-close test: client sends shutdown(SHUT_WR), server handles gracefully',
-        ],
-        'done_example': '''## Test #1: Normal Connection Lifecycle
-Input:  Client connects, sends "hello", receives echo, disconnects
-States: CONNECTING → READING → WRITING → CLOSING → removed
-Assert: Response matches, fd removed from registry, no leak
-
-## Test #7: Half-Close
-Input:  Client calls shutdown(SHUT_WR) after sending data
-States: Server sees recv()=0, transitions to CLOSING
-Assert: Server sends any remaining response, then closes cleanly
-
-## Fd Leak Detection
-Method: Count /proc/self/fd entries before and after 1000 cycles
-Assert: fd_count_after == fd_count_before (zero leaks)''',
-        'code_lang': 'markdown',
-        'can_do': 'Verify every connection lifecycle scenario including edge cases that crash production servers.',
-        'cannot_yet': 'Run a 30-minute soak test — that\'s tomorrow\'s Boss Fight.',
-        'why_without': [
-            'Ship an event loop that slowly leaks file descriptors until the process hits ulimit and dies',
-            'Discover half-close handling bugs only when a real client library sends `shutdown()`',
-            'Have no evidence that your loop survives connection churn — the most common real traffic pattern',
-            'Spend hours debugging "why did the server stop accepting connections after 3 hours?"',
-        ],
-        'why_with': [
-            'Have concrete evidence that every lifecycle phase works correctly',
-            'Catch fd leaks before they become production incidents',
-            'Know your server handles half-close, error, and timeout paths — not just happy paths',
-            'Have a reusable test suite that also validates the Week 4 epoll migration',
-        ],
-        'why_connects': [
-            '**To Days 1-4:** These tests verify every design decision from this week',
-            '**To Day 6 (Boss Fight):** The soak test runs THESE scenarios for 30 minutes',
-            '**To Week 4:** These same tests verify the epoll migration',
-            '**To Week 5:** Thread pool tests add concurrency scenarios to this base',
-            '**To Week 6:** Backpressure tests extend the slow-reader scenarios here',
-        ],
-        'mental_model_name': 'Test at the Boundaries',
-        'mental_model_desc': '''Happy paths rarely reveal bugs. Systems break at boundaries:
-- **State transitions:** What happens between READING and WRITING?
-- **Resource lifecycle:** Is the fd always closed? Is the buffer always freed?
-- **Churn:** What happens when connections come and go rapidly?
-- **Half-states:** What happens when one side closes before the other?
-
-By Week 12 when building leader election, you\'ll test boundary conditions automatically:
-"What if the leader dies mid-write? What if two nodes think they\'re leader?"
-The habit of boundary testing starts here.''',
-        'visual_model': '''┌──────────────────────────────────────────────────────────┐
-│              CONNECTION LIFECYCLE TEST MATRIX              │
-├──────────────────────────────────────────────────────────┤
-│                                                          │
-│  Test Category          Coverage Target                  │
-│  ─────────────          ──────────────                   │
-│  Happy path (3)         Normal open → use → close        │
-│  Error paths (4)        Network errors at each state     │
-│  Half-close (2)         Client/server shutdown variants  │
-│  Churn tests (3)        Rapid connect/disconnect cycles  │
-│  Leak detection (2)     fd and memory leak verification  │
-│  Timeout tests (2)      Idle connection expiry           │
-│                                                          │
-│  FD LEAK DETECTION:                                      │
-│  ┌────────────┐    1000 cycles    ┌────────────┐        │
-│  │ Count fds  │──────────────────▶│ Count fds  │        │
-│  │ BEFORE     │                   │ AFTER      │        │
-│  │ = N        │                   │ must = N   │        │
-│  └────────────┘                   └────────────┘        │
-│                                                          │
-│  Method: ls /proc/self/fd | wc -l                        │
-│  Alternative: lsof -p $PID | grep SOCK | wc -l          │
-└──────────────────────────────────────────────────────────┘''',
-        'ship_file': 'week-3/day5-connection-lifecycle-tests.md',
-        'do_steps': [
-            {
-                'title': 'Build the lifecycle test matrix',
-                'why': 'A numbered matrix ensures complete coverage. Every state from Day 1\'s enum must have at least one test entry and one test exit.',
-                'content': '''   Create numbered test cases for each lifecycle phase:
-
-   | # | Category | Scenario | Expected State Transitions | Assert |
-   |---|---------|----------|--------------------------|--------|
-   | 1 | Happy | Connect, send, receive, close | CONN→READ→WRITE→CLOSE | Echo correct |
-   | 2 | Happy | Connect, send large message | CONN→READ_HDR→READ_BODY→WRITE | Full message received |
-   | 3 | Happy | Multiple messages on one connection | READ↔WRITE cycles | All echoed |
-   | 4 | Error | Client disappears (no close) | READ → CLOSE (on error) | fd cleaned up |
-   | 5 | Error | Client sends invalid frame | READ → CLOSE (protocol error) | Error logged |
-   | 6 | Error | Network error during write | WRITE → CLOSE | Partial write handled |
-   | 7 | Error | Connection reset by peer | ANY → CLOSE | ECONNRESET handled |''',
-            },
-            {
-                'title': 'Design half-close test scenarios',
-                'why': 'Half-close (`shutdown(SHUT_WR)`) is the most subtle TCP edge case. The client says "I\'m done sending" but can still receive. Your server must handle this correctly.',
-                'content': '''   ```
-   TEST: Client Half-Close
-   1. Client connects and sends "hello"
-   2. Client calls shutdown(fd, SHUT_WR)  ← stops sending
-   3. Server sees recv() return 0          ← EOF on read
-   4. Server sends echo response           ← client can still receive!
-   5. Server calls close(fd)
-
-   ASSERT: Client receives echo AFTER half-close
-   ASSERT: Server transitions to CLOSING, not crash
-
-   TEST: Server Half-Close
-   1. Server sends response
-   2. Server calls shutdown(client_fd, SHUT_WR)
-   3. Client sees recv() return 0
-   4. Client can still send (but server won't read)
-   ASSERT: Graceful shutdown without errors
-   ```''',
-            },
-            {
-                'title': 'Design the churn test',
-                'why': 'Real servers face thousands of connections opening and closing per second. Churn exposes cleanup bugs, fd leaks, and registry corruption.',
-                'content': '''   ```
-   TEST: Connection Churn (1000 cycles)
-   Setup: Start server
-   Loop 1000 times:
-     1. Open 10 connections simultaneously
-     2. Each sends one message
-     3. Verify echo response
-     4. Close all 10
-   After loop:
-     ASSERT: registry.size() == 0
-     ASSERT: fd_count == baseline_fd_count  (ZERO leaks)
-     ASSERT: server still accepts new connections
-     ASSERT: no error logs during churn
-   ```''',
-            },
-            {
-                'title': 'Define fd leak detection method',
-                'why': 'Fd leaks are silent killers — the server works fine for hours, then suddenly can\'t accept connections because it hit the fd limit.',
-                'content': '''   Choose a detection method:
-
-   **Method 1: /proc/self/fd counting**
-   ```bash
-   # Before test
-   BEFORE=$(ls /proc/$SERVER_PID/fd | wc -l)
-   # Run test
-   ./run_churn_test
-   # After test
-   AFTER=$(ls /proc/$SERVER_PID/fd | wc -l)
-   # Assert
-   [ "$BEFORE" -eq "$AFTER" ] || echo "LEAK: $((AFTER-BEFORE)) fds leaked"
-   ```
-
-   **Method 2: Socket-specific counting**
-   ```bash
-   lsof -p $PID | grep -c "SOCK"
-   ```
-
-   Include this in your test suite as a post-test assertion.''',
-            },
-            {
-                'title': 'Add timeout test scenarios',
-                'why': 'Timeout handling is where cleanup meets time. A connection that times out must be closed AND removed — partial cleanup causes fd leaks.',
-                'content': '''   ```
-   TEST: Idle Timeout
-   1. Client connects but sends nothing
-   2. Wait for server timeout period (e.g., 10 seconds)
-   ASSERT: Server closes connection, logs "idle_timeout"
-   ASSERT: fd removed from registry
-
-   TEST: Read Timeout
-   1. Client sends partial frame header (3 of 4 bytes)
-   2. Client stops sending
-   3. Wait for read timeout
-   ASSERT: Server closes connection, logs "read_timeout"
-   ASSERT: Partial buffer freed, fd removed
-   ```''',
-            },
-        ],
-        'done_when': [
-            '15+ numbered test scenarios in lifecycle matrix — *proves complete lifecycle coverage*',
-            'Half-close tests for client and server shutdown — *catches the subtlest TCP edge case*',
-            'Churn test: 1000 cycles with zero fd leaks — *proves cleanup correctness under rapid cycling*',
-            'Fd leak detection using /proc/self/fd — *automated leak checking for CI*',
-            'Timeout tests for idle and partial-read — *proves time-based cleanup works*',
-        ],
-        'proof_instruction': 'Paste your lifecycle test matrix (15+ scenarios) and fd leak detection method, or upload `week-3/day5-connection-lifecycle-tests.md`.',
-        'self_test': [
-            ('How do you detect fd leaks in a running server?', 'Count entries in /proc/$PID/fd before and after tests. If the count increases, fds are leaking.'),
-            ('What happens when `recv()` returns 0?', 'The peer closed their send side (half-close or full close). Your server should transition to CLOSING.'),
-            ('Why test 1000 rapid connect/disconnect cycles instead of just 10?', 'Leaks are often 1 fd per cycle. 10 cycles might leak 10 fds (unnoticed). 1000 cycles leak 1000 fds (obvious and measurable).'),
-        ],
-    },
-]
-
-# I'll continue with the remaining weeks using a more compact data generation approach.
-# The remaining weeks will use helper functions to generate consistent, rich content.
-
-def make_week_lessons(week_num, week_slug, week_theme, lessons_data):
-    """Generate lesson data dicts for a week from compact specifications."""
-    result = []
-    for i, ld in enumerate(lessons_data):
-        day = i + 1
-        prev_id = f"{week_slug}-d{day-1:02d}-quest-{lessons_data[i-1]['slug']}-2h" if day > 1 else None
-
-        # Determine prereqs
-        if ld.get('prereqs') is not None:
-            prereqs = ld['prereqs']
-        elif day == 1:
-            prereqs = []
-        else:
-            prereqs = [prev_id]
+def file_hash(filepath):
+    """sha256 of a file's bytes, or None if it does not exist."""
+    try:
+        with open(filepath, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
 
-        fm_id = ld.get('id', f"{week_slug}-d{day:02d}-quest-{ld['slug']}-2h")
 
-        d = {
-            'frontmatter': {
-                'id': fm_id,
-                'part': week_slug,
-                'title': ld['title'],
-                'order': day,
-                'prereqs': prereqs,
-            },
-            'goal_intro': ld['goal_intro'],
-            'goal_deliverables': ld['goal_deliverables'],
-            'pass_criteria': ld['pass_criteria'],
-            'build_description': ld['build_desc'],
-            'build_deliverables': ld['build_deliverables'],
-            'done_example': ld['done_example'],
-            'code_lang': ld.get('code_lang', 'markdown'),
-            'can_do': ld['can_do'],
-            'cannot_yet': ld['cannot_yet'],
-            'why_without': ld['why_without'],
-            'why_with': ld['why_with'],
-            'why_connects': ld['why_connects'],
-            'mental_model_name': ld['mental_model_name'],
-            'mental_model_desc': ld['mental_model_desc'],
-            'visual_model': ld['visual_model'],
-            'ship_file': ld['ship_file'],
-            'do_steps': ld['do_steps'],
-            'done_when': ld['done_when'],
-            'proof_instruction': ld['proof_instruction'],
-            'self_test': ld['self_test'],
+def load_cache(path=CACHE_PATH):
+    """Load the cache manifest; a missing or unreadable cache is treated as empty."""
+    try:
+        with open(path, 'r') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {'lessons': {}}
+    cache.setdefault('lessons', {})
+    return cache
+
+
+def save_cache(cache, path=CACHE_PATH):
+    atomic_write_bytes(path, (json.dumps(cache, indent=2, sort_keys=True) + '\n').encode('utf-8'))
+
+
+def is_fresh(entry, relpath, data_hash, layout_hash, filepath, merge_frontmatter=False, sections=False):
+    """True if a cache entry proves the target (and its sidecar, if wanted) is up to date."""
+    return (
+        entry is not None
+        and entry.get('path') == relpath
+        and entry.get('data_hash') == data_hash
+        and entry.get('template_version') == TEMPLATE_VERSION
+        and entry.get('layout_hash') == layout_hash
+        and entry.get('merge_frontmatter', False) == merge_frontmatter
+        and (not sections or (entry.get('sections') == SECTIONS_FORMAT_VERSION
+                              and os.path.exists(sections_path(filepath))))
+        and entry.get('output_hash') == file_hash(filepath)
+    )
+
+
+# ─── MANIFEST REGENERATION ────────────────────────────────────────────────────
+# --write-manifest folds this run's output back into manifest.json: every
+# lesson path the run produced is listed under its part, and each part gets
+# files.lesson_hashes (path -> sha256) so importers can skip unchanged lessons.
+
+def update_manifest(outputs, manifest_path=MANIFEST_PATH):
+    """Fold {lesson filepath: sha256} from this run into manifest.json.
+
+    Paths not produced by this run are hashed from disk. The manifest is only
+    rewritten (with a new generated_at_utc) if its lessons or hashes changed.
+    Returns (changed, [filepaths whose part is not in the manifest]).
+    """
+    content_dir = os.path.dirname(manifest_path)
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    before = json.dumps(manifest, sort_keys=True)
+
+    def rel(path):
+        return os.path.relpath(path, content_dir).replace(os.sep, '/')
+
+    parts_by_dir = {os.path.dirname(p['files']['part']): p for p in manifest.get('parts', [])}
+    hashes = {rel(path): digest for path, digest in outputs.items()}
+    unlisted = []
+    for path in outputs:
+        relpath = rel(path)
+        part = parts_by_dir.get(os.path.dirname(os.path.dirname(relpath)))
+        if part is None:
+            unlisted.append(path)
+            continue
+        lessons = part['files']['lessons']
+        if relpath not in lessons:
+            if lessons == sorted(lessons):
+                bisect.insort(lessons, relpath)
+            else:
+                lessons.append(relpath)
+
+    for part in manifest.get('parts', []):
+        part_hashes = {}
+        for relpath in part['files']['lessons']:
+            digest = hashes.get(relpath) or file_hash(os.path.join(content_dir, relpath))
+            if digest is not None:
+                part_hashes[relpath] = digest
+        part['files']['lesson_hashes'] = part_hashes
+
+    manifest['format_version'] = MANIFEST_FORMAT_VERSION
+    if json.dumps(manifest, sort_keys=True) == before:
+        return False, unlisted
+    manifest['generated_at_utc'] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    atomic_write_bytes(manifest_path, (json.dumps(manifest, indent=2, ensure_ascii=False) + '\n').encode('utf-8'))
+    return True, unlisted
+
+
+# ─── LAZY WEEK DATA LOADING ────────────────────────────────────────────────────
+# scripts/lesson_data/<week-slug>.{py,json,yaml,yml} holds one week each. Files
+# are discovered by name up front (one directory scan) and only parsed when a
+# week is actually iterated, so a run's startup cost does not grow with the
+# number of weeks on disk.
+#
+# A week file provides either full lesson dicts or compact specs for
+# make_week_lessons:
+#   .py         LESSONS = [...]  or  LESSON_SPECS = [...] (+ WEEK_NUM, WEEK_THEME)
+#               box_diagram and the diagram helpers (box, columns, arrow,
+#               diagram) are available to Python week modules without import.
+#   .json/.yaml a list of lesson dicts, or a mapping with 'lessons', or with
+#               'specs' (+ 'week_num', 'theme').
+
+LESSON_DATA_DIR = os.path.join(os.path.dirname(__file__), 'lesson_data')
+WEEK_DATA_EXTS = ('.py', '.json', '.yaml', '.yml')
+
+
+def discover_weeks(data_dir=LESSON_DATA_DIR):
+    """Map week slug -> data file path, sorted by slug, without loading anything."""
+    sources = {}
+    try:
+        names = sorted(os.listdir(data_dir))
+    except FileNotFoundError:
+        return sources
+    for name in names:
+        slug, ext = os.path.splitext(name)
+        if ext not in WEEK_DATA_EXTS or name.startswith(('_', '.')):
+            continue
+        if slug in sources:
+            raise ValueError(f"Week {slug} is defined twice: {os.path.basename(sources[slug])}, {name}")
+        sources[slug] = os.path.join(data_dir, name)
+    return sources
+
+
+def _lessons_from_dicts(dicts, errors=None):
+    lessons = []
+    for d in dicts:
+        try:
+            lessons.append(Lesson.from_dict(d))
+        except LessonDataError as e:
+            if errors is None:
+                raise
+            errors.append(str(e))
+    return lessons
+
+
+def _week_from_mapping(week_slug, data, errors=None):
+    if isinstance(data, list):
+        return _lessons_from_dicts(data, errors)
+    if 'lessons' in data:
+        return _lessons_from_dicts(data['lessons'], errors)
+    return make_week_lessons(data.get('week_num'), week_slug, data.get('theme'), data['specs'], errors)
+
+
+def load_week(week_slug, path, text=None, errors=None):
+    """Parse one week data file into its list of Lessons.
+
+    ``text`` overrides the file contents (used to load a week as of an older
+    git revision); ``path`` still decides the format. If ``errors`` is a list,
+    invalid lessons are reported there and left out instead of raising.
+    """
+    if text is None:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    ext = os.path.splitext(path)[1]
+    if ext == '.py':
+        module = types.ModuleType(f'lesson_data.{week_slug}')
+        module.__file__ = path
+        module.box_diagram = box_diagram
+        module.box, module.columns, module.arrow, module.diagram = box, columns, arrow, diagram
+        exec(compile(text, path, 'exec'), module.__dict__)
+        if hasattr(module, 'LESSONS'):
+            return _lessons_from_dicts(module.LESSONS, errors)
+        return make_week_lessons(getattr(module, 'WEEK_NUM', None), week_slug,
+                                 getattr(module, 'WEEK_THEME', None), module.LESSON_SPECS, errors)
+    data = json.loads(text) if ext == '.json' else yaml.safe_load(text)
+    return _week_from_mapping(week_slug, data, errors)
+
+
+def iter_weeks(sources):
+    """Yield (week_slug, lessons), loading each week only when it is reached."""
+    for week_slug, path in sources.items():
+        yield week_slug, load_week(week_slug, path)
+
+
+# ─── VALIDATION ───────────────────────────────────────────────────────────────
+# Every selected week is loaded and checked in one pass before anything is
+# rendered or written. All problems are collected and reported together:
+# model errors (missing/unknown fields, wrong types), empty lists, duplicate
+# ids, non-contiguous day order and, when every week is loaded, prereqs that
+# point at no lesson.
+
+def iter_weeks_checked(sources, errors):
+    """Like iter_weeks, but load problems are appended to errors instead of raised."""
+    for week_slug, path in sources.items():
+        try:
+            lessons = load_week(week_slug, path, errors=errors)
+        except Exception as e:  # a broken data file must not hide the other weeks' errors
+            errors.append(f"{os.path.basename(path)}: {type(e).__name__}: {e}")
+            continue
+        yield week_slug, lessons
+
+
+def load_weeks_checked(sources):
+    """Load every week in sources. Returns ([(week_slug, lessons)], [error messages])."""
+    errors = []
+    return list(iter_weeks_checked(sources, errors)), errors
+
+
+def lesson_errors(lesson):
+    """Per-lesson checks the model's type checks do not cover."""
+    errors = []
+    lesson_id = lesson.frontmatter.id
+    if not lesson_id.strip():
+        errors.append(f"{lesson.frontmatter.part} day {lesson.frontmatter.order}: empty id")
+    if not lesson.frontmatter.title.strip():
+        errors.append(f"{lesson_id}: empty title")
+    for name, _ in _field_coercers(Lesson):
+        value = getattr(lesson, name)
+        if isinstance(value, tuple) and not value:
+            errors.append(f"{lesson_id}: {name} is empty")
+    return errors
+
+
+def validate_weeks(weeks, check_prereqs=True):
+    """Cross-check weeks; returns (error messages, PrereqGraph).
+
+    ``weeks`` is iterated once, so it may be a generator that loads weeks one
+    at a time. Prereq cycles are always reported; dangling prereqs only with
+    check_prereqs.
+    """
+    errors = []
+    seen = {}
+    frontmatters = []
+    for week_slug, lessons in weeks:
+        for lesson in lessons:
+            frontmatters.append(lesson.frontmatter)
+            errors.extend(lesson_errors(lesson))
+            lesson_id = lesson.frontmatter.id
+            if lesson_id in seen:
+                errors.append(f"{lesson_id}: duplicate id (also in {seen[lesson_id]})")
+            seen.setdefault(lesson_id, week_slug)
+        orders = sorted(l.frontmatter.order for l in lessons)
+        if orders != list(range(1, len(orders) + 1)):
+            errors.append(f"{week_slug}: lesson order is {orders}, expected 1..{len(orders)}")
+    graph = PrereqGraph(frontmatters)
+    if check_prereqs:
+        for lesson_id, prereq in graph.dangling:
+            errors.append(f"{lesson_id}: prereq {prereq} does not exist")
+    for cycle in graph.cycles():
+        errors.append(f"prerequisite cycle: {' → '.join(cycle + cycle[:1])}")
+    return errors, graph
+
+
+# ─── PREREQUISITE GRAPH ───────────────────────────────────────────────────────
+# Lessons form a DAG through frontmatter.prereqs, across weeks. PrereqGraph
+# finds dangling references and cycles in O(V + E), gives a topological build
+# order and answers transitive prereq queries one lesson at a time. --graph writes it as JSON so
+# the platform can load a precomputed graph instead of rebuilding it.
+
+class PrereqGraph:
+    """Prerequisite DAG over lessons' front matter, keyed by id.
+
+    Only Frontmatter objects are kept, so a graph over a whole pack stays
+    small even when it is built from streamed weeks.
+
+    Edges point from a prereq to the lessons that require it. References to
+    ids that are not in the graph are kept aside in ``dangling`` and do not
+    become edges.
+    """
+
+    def __init__(self, frontmatters):
+        self.nodes = {}       # id -> Frontmatter, in input order
+        self.requires = {}    # id -> [prereq ids in the graph]
+        self.unlocks = {}     # id -> [ids that list it as a prereq]
+        self.dangling = []    # [(id, missing prereq id)]
+        duplicates = []
+        for fm in frontmatters:
+            if self.nodes.setdefault(fm.id, fm) is not fm:
+                duplicates.append(fm)
+        for lesson_id, fm in self.nodes.items():
+            self.requires[lesson_id] = []
+            self.unlocks.setdefault(lesson_id, [])
+            for prereq in fm.prereqs:
+                if prereq in self.nodes:
+                    self.requires[lesson_id].append(prereq)
+                    self.unlocks.setdefault(prereq, []).append(lesson_id)
+                else:
+                    self.dangling.append((lesson_id, prereq))
+        # A duplicate id never becomes a node, but its missing prereqs are still missing.
+        for fm in duplicates:
+            self.dangling.extend((fm.id, prereq) for prereq in fm.prereqs if prereq not in self.nodes)
+        self._ancestors = {}  # id -> all_prereqs(id), filled per query
+
+    @classmethod
+    def from_weeks(cls, weeks):
+        return cls(lesson.frontmatter for _, lessons in weeks for lesson in lessons)
+
+    def cycles(self):
+        """Every strongly connected component that contains a cycle, as a list of ids.
+
+        Iterative Tarjan, so long prerequisite chains cannot hit the
+        recursion limit.
+        """
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        found = []
+        counter = 0
+        for root in self.nodes:
+            if root in index:
+                continue
+            work = [(root, iter(self.unlocks[root]))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.unlocks[child])))
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1 or node in self.requires[node]:
+                            found.append(component[::-1])
+        return found
+
+    def topological_order(self):
+        """Ids with every prereq before the lessons that need it (Kahn's algorithm).
+
+        Ties keep input order. Raises ValueError if the graph has a cycle.
+        """
+        pending = {lesson_id: len(prereqs) for lesson_id, prereqs in self.requires.items()}
+        order = [lesson_id for lesson_id, count in pending.items() if count == 0]
+        for lesson_id in order:  # order grows while we walk it
+            for child in self.unlocks[lesson_id]:
+                pending[child] -= 1
+                if pending[child] == 0:
+                    order.append(child)
+        if len(order) != len(self.nodes):
+            stuck = [lesson_id for lesson_id, count in pending.items() if count > 0]
+            raise ValueError(f"prerequisite cycle among {', '.join(stuck)}")
+        return order
+
+    def _reachable(self, lesson_id, edges):
+        """Every id reachable from lesson_id along edges (iterative DFS, O(V + E))."""
+        seen = set()
+        todo = [lesson_id]
+        while todo:
+            for nxt in edges[todo.pop()]:
+                if nxt not in seen:
+                    seen.add(nxt)
+                    todo.append(nxt)
+        return frozenset(seen)
+
+    def all_prereqs(self, lesson_id):
+        """Every lesson that must be done before lesson_id.
+
+        Computed per query and memoised for the queried lesson only; the full
+        transitive closure is never materialised.
+        """
+        ancestors = self._ancestors.get(lesson_id)
+        if ancestors is None:
+            ancestors = self._ancestors[lesson_id] = self._reachable(lesson_id, self.requires)
+        return ancestors
+
+    def all_unlocks(self, lesson_id):
+        """Every lesson that directly or indirectly depends on lesson_id."""
+        return self._reachable(lesson_id, self.unlocks)
+
+    def depends_on(self, lesson_id, prereq_id):
+        return prereq_id in self.all_prereqs(lesson_id)
+
+    def to_dict(self):
+        """JSON-ready graph: nodes with their direct edges, plus build order.
+
+        Output is O(V + E): transitive prereqs are left to consumers, which can
+        walk ``prereqs`` in ``order``. ``depth`` is the length of the longest
+        prereq chain leading to the lesson.
+        """
+        order = self.topological_order()
+        depth = {}
+        for lesson_id in order:
+            depth[lesson_id] = 1 + max((depth[p] for p in self.requires[lesson_id]), default=-1)
+        nodes = {}
+        for lesson_id, fm in self.nodes.items():
+            nodes[lesson_id] = {
+                'part': fm.part,
+                'order': fm.order,
+                'title': fm.title,
+                'prereqs': list(self.requires[lesson_id]),
+                'unlocks': list(self.unlocks[lesson_id]),
+                'depth': depth[lesson_id],
+            }
+        return {
+            'format_version': GRAPH_FORMAT_VERSION,
+            'order': order,
+            'nodes': nodes,
+            'dangling': [list(edge) for edge in self.dangling],
         }
-        result.append(d)
-    return result
-
 
-# ─── FILE DISCOVERY AND WRITING ───────────────────────────────────────────────
 
-def find_lesson_file(week_slug, day_num):
-    """Find the existing lesson file for a given week and day number."""
-    week_dir = os.path.join(BASE_DIR, week_slug, 'lessons')
-    if not os.path.isdir(week_dir):
-        # Try partial matching
-        for d in os.listdir(BASE_DIR):
-            if d.startswith(week_slug[:3]):
-                week_dir = os.path.join(BASE_DIR, d, 'lessons')
-                break
-    if not os.path.isdir(week_dir):
+def write_graph(graph, path=GRAPH_PATH):
+    """Write graph.to_dict() as JSON if it differs from what is on disk. Returns changed."""
+    data = (json.dumps(graph.to_dict(), indent=2, ensure_ascii=False) + '\n').encode('utf-8')
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    atomic_write_bytes(path, data)
+    return True
+
+
+# ─── SEARCH INDEX ─────────────────────────────────────────────────────────────
+# --search-index builds one BM25 index over every lesson's title, goal, do
+# steps and self-test (the engine lives in lesson_search.py). Per-lesson token
+# data is kept in .search-cache.json keyed by lesson id and data hash: only
+# lessons whose data changed are tokenized again, and the index is merged
+# from the cached postings.
+
+SEARCH_FIELDS = ('title', 'goal', 'steps', 'self_test')
+SEARCH_FIELD_WEIGHTS = (3.0, 1.5, 1.0, 1.0)
+
+
+def lesson_search_text(lesson):
+    """The searchable text of a lesson, one string per SEARCH_FIELDS entry."""
+    return (
+        lesson.frontmatter.title,
+        '\n'.join((lesson.goal_intro, *lesson.goal_deliverables)),
+        '\n'.join(part for step in lesson.do_steps for part in (step.title, step.why, step.content)),
+        '\n'.join(part for item in lesson.self_test for part in (item.question, item.answer)),
+    )
+
+
+def build_search_index(weeks, cache):
+    """Build the index document from (week_slug, lessons) pairs.
+
+    ``cache`` is {lesson id: {'hash', 'terms', 'lengths'}} from the last
+    build. Returns (index, new cache, number of lessons reused from cache).
+    """
+    new_cache = {}
+    reused = 0
+
+    def documents():
+        nonlocal reused
+        for _, lessons in weeks:
+            for lesson in lessons:
+                fm = lesson.frontmatter
+                data_hash = lesson_hash(lesson)
+                record = cache.get(fm.id)
+                if record is not None and record.get('hash') == data_hash:
+                    reused += 1
+                else:
+                    record = {'hash': data_hash, **lesson_search.field_postings(lesson_search_text(lesson))}
+                new_cache[fm.id] = record
+                yield [fm.id, fm.part, fm.order, fm.title], record
+
+    index = lesson_search.build_index(documents(), SEARCH_FIELDS, SEARCH_FIELD_WEIGHTS)
+    return index, new_cache, reused
+
+
+def write_search_index(weeks, path=SEARCH_INDEX_PATH, cache_path=SEARCH_CACHE_PATH, errors=None):
+    """Build the search index incrementally and write it if it changed.
+
+    Returns (changed, lessons, terms, reused). If ``errors`` is the list that
+    loading ``weeks`` reports problems to and it is not empty once every week
+    has been read, nothing is written and None is returned.
+    """
+    version = lesson_search.SEARCH_FORMAT_VERSION
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        cache = {}
+    if cache.get('format_version') != version:
+        cache = {'format_version': version, 'lessons': {}}
+    index, lessons, reused = build_search_index(weeks, cache['lessons'])
+    if errors:
         return None
-
-    for f in sorted(os.listdir(week_dir)):
-        if f.startswith(f'{day_num:02d}-') and f.endswith('.md'):
-            return os.path.join(week_dir, f)
-    return None
-
-
-def read_existing_frontmatter(filepath):
-    """Read existing YAML frontmatter from a lesson file."""
-    with open(filepath, 'r') as f:
-        content = f.read()
-    m = re.match(r'^---\n(.*?\n)---', content, re.DOTALL)
-    if m:
-        return yaml.safe_load(m.group(1))
-    return {}
-
-
-def write_lesson(filepath, content):
-    """Write lesson content to file."""
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, 'w') as f:
-        f.write(content)
-    print(f"  ✅ Wrote {os.path.basename(filepath)} ({len(content.splitlines())} lines)")
+    if lessons != cache['lessons']:
+        atomic_write_bytes(cache_path, json.dumps({'format_version': version, 'lessons': lessons},
+                                                  ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    changed = write_lesson(path, json.dumps(index, ensure_ascii=False, separators=(',', ':')) + '\n')
+    return changed, len(index['docs']), len(index['terms']), reused
+
+
+# ─── PROOF PATTERN AUDIT ──────────────────────────────────────────────────────
+# --audit-proof collects proof.regex_patterns from the front matter of every
+# lesson and quest in parts/ and writes the table proof_audit.py builds from
+# them. It runs after the lessons are written, so the table describes the
+# front matter on disk. A run that would overwrite authored patterns or ids
+# (no --merge-frontmatter) is refused before anything is written.
+
+def proof_patterns(fm):
+    proof = fm.get('proof') if isinstance(fm.get('proof'), dict) else {}
+    return [str(p) for p in proof.get('regex_patterns') or proof.get('patterns') or []]
+
+
+def collect_proof_patterns(base_dir=BASE_DIR):
+    """{lesson or quest id: [patterns]} from front matter under base_dir, in path order."""
+    found = {}
+    for week in sorted(os.listdir(base_dir)):
+        week_dir = os.path.join(base_dir, week)
+        if not os.path.isdir(week_dir):
+            continue
+        paths = [os.path.join(week_dir, 'quest.md')]
+        lessons_dir = os.path.join(week_dir, 'lessons')
+        if os.path.isdir(lessons_dir):
+            paths += [os.path.join(lessons_dir, n) for n in sorted(os.listdir(lessons_dir)) if n.endswith('.md')]
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            fm = read_existing_frontmatter(path)
+            patterns = proof_patterns(fm)
+            if patterns:
+                found[str(fm.get('id') or os.path.relpath(path, base_dir))] = patterns
+    return found
 
 
-# ─── MAIN GENERATION LOGIC ───────────────────────────────────────────────────
 
-# We'll store ALL week data in a list, where each entry is (week_slug, [lesson_data_dicts])
-ALL_WEEKS = []
 
-# Week 3 is fully defined above
-ALL_WEEKS.append(('w03-multi-client-event-loop', W03_LESSONS))
 
+def generated_frontmatter(lesson_data, layout=DEFAULT_LAYOUT):
+    """The front matter a lesson renders with, rendering only up to its closing ``---``."""
+    buf = ''
+    for chunk in iter_lesson(lesson_data, layout):
+        buf += chunk
+        m = FRONTMATTER_RE.match(buf)
+        if m:
+            return yaml.safe_load(m.group(1)) or {}
+    return {}
 
-# ─── REMAINING WEEKS DATA (W04-W24) ──────────────────────────────────────────
-# Each week defines 5 lessons with full content matching Day 1 quality.
 
-# Import the remaining week data from separate files
-# For efficiency, we define them inline here.
+def authored_frontmatter_losses(plan, layout=DEFAULT_LAYOUT):
+    """["file: what it would lose"] for targets whose authored proof patterns or id
+    a plain (unmerged) rewrite would drop."""
+    losses = []
+    for _, _, filepath, lesson_data in plan:
+        if filepath is None:
+            continue
+        existing = read_existing_frontmatter(filepath)
+        lost = []
+        if existing.get('id') is not None and str(existing['id']) != lesson_data.frontmatter.id:
+            lost.append(f"id {existing['id']}")
+        patterns = proof_patterns(existing)
+        if patterns:
+            kept = proof_patterns(generated_frontmatter(lesson_data, layout))
+            if any(p not in kept for p in patterns):
+                lost.append(f"{len(patterns)} proof pattern(s)")
+        if lost:
+            losses.append(f"{os.path.relpath(filepath, BASE_DIR)}: {', '.join(lost)}")
+    return losses
+
+
+def refuse_authored_losses(plan, layout=DEFAULT_LAYOUT):
+    """Print what a plain rewrite of plan would drop; True if anything would be."""
+    losses = authored_frontmatter_losses(plan, layout)
+    if losses:
+        print(f"❌ {len(losses)} lesson(s) would lose authored front matter, nothing written "
+              f"(rerun with --merge-frontmatter to keep it):")
+        for message in losses:
+            print(f"  - {message}")
+    return bool(losses)
+
+
+def write_proof_table(path):
+    """Audit the patterns now on disk and write the table to path."""
+    table = proof_audit.build_proof_table(collect_proof_patterns())
+    flagged = [e for e in table['patterns'] if e['status'] != 'ok']
+    for entry in flagged:
+        detail = f"{entry['max_ms']} ms" if entry.get('max_ms') is not None else entry.get('error', '')
+        print(f"  ⚠️  Proof pattern {entry['status']}: {entry['source']!r} {detail}".rstrip())
+    changed = write_lesson(path, json.dumps(table, indent=2, ensure_ascii=False) + '\n')
+    print(f"🧪 {os.path.basename(path)} {'updated' if changed else 'unchanged'} "
+          f"({len(table['patterns'])} patterns from {len(table['lessons'])} lessons, {len(flagged)} flagged)")
+
+
+# ─── SELECTION ────────────────────────────────────────────────────────────────
+# Week-level selectors (--week, --since) are applied to the discovered file
+# list, so unselected weeks are never parsed. Lesson-level selectors (--day,
+# --id) are applied as each selected week is loaded, before any rendering.
+
+def week_matches(week_slug, pattern):
+    """--week matches a full slug, a slug prefix (``w07``) or a glob."""
+    return (week_slug == pattern or week_slug.startswith(pattern + '-')
+            or fnmatch.fnmatchcase(week_slug, pattern))
+
+
+def select_weeks(sources, week_patterns=None):
+    if not week_patterns:
+        return sources
+    return {slug: path for slug, path in sources.items()
+            if any(week_matches(slug, p) for p in week_patterns)}
+
+
+def _git(*args, cwd=LESSON_DATA_DIR):
+    return subprocess.run(('git', *args), cwd=cwd, check=True, capture_output=True,
+                          text=True).stdout
+
+
+def changed_since(rev, sources):
+    """Lessons whose data changed since a git revision.
+
+    Returns {week_slug: set of changed lesson ids, or None for "whole week"}
+    covering only weeks whose data file differs from ``rev`` (including
+    uncommitted and untracked edits). Changed files are compared lesson by
+    lesson against their version at ``rev`` using lesson_hash.
+    """
+    try:
+        _git('rev-parse', '--verify', '--quiet', f'{rev}^{{commit}}')
+    except subprocess.CalledProcessError:
+        raise ValueError(f"unknown git revision: {rev}")
+    changed_files = set(_git('diff', '--name-only', '--relative', rev, '--', '.').split())
+    changed_files |= set(_git('ls-files', '--others', '--exclude-standard', '--', '.').split())
+
+    changed = {}
+    for slug, path in sources.items():
+        name = os.path.basename(path)
+        if name not in changed_files:
+            continue
+        try:
+            old_text = _git('show', f'{rev}:./{name}')
+        except subprocess.CalledProcessError:
+            changed[slug] = None  # new week file
+            continue
+        old_hashes = {l.frontmatter.id: lesson_hash(l) for l in load_week(slug, path, old_text)}
+        changed[slug] = {l.frontmatter.id for l in load_week(slug, path)
+                         if old_hashes.get(l.frontmatter.id) != lesson_hash(l)}
+    return changed
+
+
+def select_lessons(weeks, days=None, id_patterns=None, changed=None):
+    """Filter (week_slug, lessons) pairs by day, id glob and --since changes.
+
+    Weeks left with no lessons are dropped.
+    """
+    for week_slug, lessons in weeks:
+        wanted_ids = changed.get(week_slug) if changed is not None else None
+        kept = [
+            l for l in lessons
+            if lesson_selected(l.frontmatter, days, id_patterns)
+            and (wanted_ids is None or l.frontmatter.id in wanted_ids)
+        ]
+        if kept:
+            yield week_slug, kept
+
+
+def lesson_selected(fm, days=None, id_patterns=None):
+    return ((not days or fm.order in days)
+            and (not id_patterns or any(fnmatch.fnmatchcase(fm.id, p) for p in id_patterns)))
+
+
+def describe_selectors(args):
+    """The --week/--day/--id arguments of a run, as typed."""
+    return ' '.join([*(f'--week {w}' for w in args.week or ()), *(f'--day {d}' for d in args.day or ()),
+                     *(f'--id {p}' for p in args.ids or ())])
+
+
+# ─── PROFILING ────────────────────────────────────────────────────────────────
+# --profile times the build per stage: loading week data, resolving target
+# files (find_lesson_file), rendering (generate_lesson) and writing
+# (write_lesson), in wall and CPU seconds, and keeps per-lesson timings to
+# list the slowest lessons. Rendering and writing are streamed together, so
+# render time is the time spent producing chunks and write time is the rest.
+# With --jobs, render/write timings are measured inside the workers and their
+# sums can exceed the elapsed time.
+
+PROFILE_STAGES = ('load', 'find_lesson_file', 'generate_lesson', 'write_lesson')
+
+
+class Profile:
+    """Per-stage wall/CPU totals and per-lesson wall times."""
+
+    def __init__(self):
+        self.stages = {name: {'wall_s': 0.0, 'cpu_s': 0.0, 'calls': 0} for name in PROFILE_STAGES}
+        self.lessons = {}  # lesson id -> {'path': ..., stage: wall seconds}
+        self.start = (time.perf_counter(), time.process_time())
+
+    @contextlib.contextmanager
+    def stage(self, name, lesson_id=None, path=None):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - wall, time.process_time() - cpu, lesson_id, path)
+
+    def add(self, name, wall, cpu, lesson_id=None, path=None):
+        stage = self.stages.setdefault(name, {'wall_s': 0.0, 'cpu_s': 0.0, 'calls': 0})
+        stage['wall_s'] += wall
+        stage['cpu_s'] += cpu
+        stage['calls'] += 1
+        if lesson_id is not None:
+            record = self.lessons.setdefault(lesson_id, {'path': None})
+            record['path'] = path or record['path']
+            record[name] = record.get(name, 0.0) + wall
+
+    def slowest(self, n):
+        """The n lessons with the most wall time across stages, slowest first."""
+        def total(item):
+            return sum(v for k, v in item[1].items() if k != 'path')
+        return sorted(self.lessons.items(), key=total, reverse=True)[:n]
+
+    def to_dict(self, top=10):
+        wall = time.perf_counter() - self.start[0]
+        cpu = time.process_time() - self.start[1]
+        slowest = []
+        for lesson_id, record in self.slowest(top):
+            timings = {name: round(record.get(name, 0.0), 6) for name in PROFILE_STAGES if name != 'load'}
+            slowest.append({'id': lesson_id,
+                            'path': os.path.relpath(record['path'], BASE_DIR) if record['path'] else None,
+                            **timings, 'total_s': round(sum(timings.values()), 6)})
+        return {
+            'total_wall_s': round(wall, 6),
+            'total_cpu_s': round(cpu, 6),
+            'lessons': len(self.lessons),
+            'stages': {name: {'wall_s': round(st['wall_s'], 6), 'cpu_s': round(st['cpu_s'], 6),
+                              'calls': st['calls']} for name, st in self.stages.items()},
+            'slowest': slowest,
+        }
 
-# Helper for consistent visual models
-def box_diagram(title, rows):
-    """Generate a simple ASCII box diagram."""
-    width = max(len(title) + 4, max(len(r) for r in rows) + 4)
-    top = '┌' + '─' * width + '┐'
-    bottom = '└' + '─' * width + '┘'
-    title_line = '│' + title.center(width) + '│'
-    sep = '├' + '─' * width + '┤'
-    content = '\n'.join('│  ' + r.ljust(width - 2) + '│' for r in rows)
-    return f"{top}\n{title_line}\n{sep}\n{content}\n{bottom}"
+    def print_report(self, top=10):
+        data = self.to_dict(top)
+        print(f"\n⏱️  Profile ({data['total_wall_s'] * 1000:.1f} ms wall, "
+              f"{data['total_cpu_s'] * 1000:.1f} ms CPU, {data['lessons']} lessons)")
+        for name, st in data['stages'].items():
+            print(f"  {name:<18} {st['wall_s'] * 1000:9.2f} ms wall  {st['cpu_s'] * 1000:9.2f} ms CPU"
+                  f"  ×{st['calls']}")
+        if data['slowest']:
+            print(f"  Slowest {len(data['slowest'])} lessons:")
+            for item in data['slowest']:
+                print(f"    {item['total_s'] * 1000:8.2f} ms  {item['path'] or item['id']}")
+
+
+def profile_stage(profile, name):
+    """profile.stage(name), or a no-op context when not profiling."""
+    return contextlib.nullcontext() if profile is None else profile.stage(name)
+
+
+def write_profile_json(profile, path, top=10):
+    data = profile.to_dict(top)
+    data['generated_at_utc'] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    atomic_write_bytes(path, (json.dumps(data, indent=2) + '\n').encode('utf-8'))
+
+
+def _timed_chunks(chunks, totals):
+    """Pass chunks through, adding the wall/CPU time spent producing them to totals."""
+    chunks = iter(chunks)
+    while True:
+        wall, cpu = time.perf_counter(), time.process_time()
+        chunk = next(chunks, None)
+        totals[0] += time.perf_counter() - wall
+        totals[1] += time.process_time() - cpu
+        if chunk is None:
+            return
+        yield chunk
+
+
+def profiled_render_and_write(filepath, lesson_data, layout=DEFAULT_LAYOUT, existing_fm=None, sections=False):
+    """render_and_write, plus {stage: (wall, cpu)} for generate_lesson and write_lesson."""
+    wall, cpu = time.perf_counter(), time.process_time()
+    render = [0.0, 0.0]
+    changed, lines, output_hash = stream_lesson(
+        filepath, _timed_chunks(render_chunks(lesson_data, layout, existing_fm), render))
+    if sections:
+        changed = write_sections(filepath, lesson_data, output_hash) or changed
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    timings = {'generate_lesson': tuple(render), 'write_lesson': (wall - render[0], cpu - render[1])}
+    return lines, output_hash, changed, timings
+
+
+# ─── STREAMING ────────────────────────────────────────────────────────────────
+# --stream keeps memory flat regardless of pack size: lesson data is
+# validated week by week (only front matter is kept for the prereq graph),
+# then each week is loaded, rendered, written and released before the next
+# one is read. Memory is reported per stage so growth shows up.
+
+def _mb(n):
+    return f"{n / 2**20:.1f} MB"
+
+
+class MemoryReport:
+    """Memory per pipeline stage.
+
+    By default this is the process's resident set as each stage ends, read
+    from /proc/self/statm: in a flat pipeline it stays level from week to
+    week. Where there is no /proc it is how much the stage raised the peak
+    RSS (ru_maxrss), which drops to zero once memory stops growing. With
+    ``trace`` (--trace-alloc) it is the peak of Python allocations within the
+    stage, from tracemalloc with a one-frame limit; more precise, but
+    rendering runs noticeably slower while tracing. Worker processes (--jobs)
+    are not measured.
+    """
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.statm = current_rss_bytes() is not None
+        self.peaks = {}  # stage -> highest value seen, in bytes
+        self.last = {}   # stage -> value of its latest run
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if self.trace:
+            tracemalloc.reset_peak()
+        before = peak_rss_bytes()
+        try:
+            yield
+        finally:
+            if self.trace:
+                value = tracemalloc.get_traced_memory()[1]
+            elif self.statm:
+                value = current_rss_bytes()
+            else:
+                value = peak_rss_bytes() - before
+            self.last[name] = value
+            self.peaks[name] = max(self.peaks.get(name, 0), value)
+
+    @property
+    def source(self):
+        if self.trace:
+            return 'traced peak'
+        return 'RSS at stage end' if self.statm else 'peak RSS growth'
+
+    def describe(self, values):
+        return ', '.join(f"{name} {_mb(value)}" for name, value in values.items())
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def current_rss_bytes():
+    """Resident set size right now, or None without /proc (macOS, BSD)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
 
 
-if __name__ == '__main__':
+def stream_build(args, sources, changed, selective, index, memory, profile=None, html_renderer=None):
+    """--stream: load, render, write and release one week at a time.
+
+    Same output, cache and manifest handling as a normal run (or --check),
+    but no more than one week of lesson data is alive at once.
+    """
+    check_counts = [0, 0, 0]  # checked, drifted, missing
+    if not args.check:
+        cache = load_cache()
+        old_entries = cache['lessons']
+        new_entries = dict(old_entries) if selective else {}
+        totals = {'written': 0, 'skipped': 0, 'lines': 0}
+        outputs = {}
+    planned_weeks = []
+    reported = 0
+
+    for week_slug, path in sources.items():
+        with memory.stage('load'), profile_stage(profile, 'load'):
+            lessons = load_week(week_slug, path)
+
+        with memory.stage('write'):
+            plan = plan_lessons(select_lessons([(week_slug, lessons)], args.day, args.ids, changed),
+                                index, profile)
+            del lessons
+            if not plan:
+                continue
+            planned_weeks.append(week_slug)
+            for message in list(index.ambiguities)[reported:]:
+                print(f"⚠️  Ambiguous match, skipping — {message}")
+            reported = len(index.ambiguities)
+
+            frontmatter = None
+            if args.merge_frontmatter:
+                frontmatter = build_frontmatter_index(entry[2] for entry in plan if entry[2] is not None)
+            if args.check:
+                for i, count in enumerate(check_lessons(plan, args.layout, args.jobs, args.diff, frontmatter)):
+                    check_counts[i] += count
+            else:
+                write_plan(plan, args, old_entries, new_entries, frontmatter, totals, profile, html_renderer)
+                outputs.update(plan_outputs(plan, new_entries))
+            del plan, frontmatter
+            _FRONTMATTER_CACHE.clear()
+        print(f"  📈 Memory ({memory.source}): load {_mb(memory.last['load'])}, write {_mb(memory.last['write'])}")
+
+    if args.targets == 'manifest':
+        report_manifest_coverage(index, planned_weeks, selective)
+    print(f"\n📈 Highest memory per stage ({memory.source}): {memory.describe(memory.peaks)}; "
+          f"process peak RSS {_mb(peak_rss_bytes())}")
+    if args.check:
+        return report_check(*check_counts)
+    return finish_build(args, cache, old_entries, new_entries, selective, totals, outputs)
+
+
+# ─── WATCH MODE ───────────────────────────────────────────────────────────────
+# --watch runs one normal build, then stays up with every selected week
+# parsed, the target index, layouts and render cache warm, and the lesson
+# cache in memory. Saves under lesson_data/ (and lesson_layouts/) arrive via
+# inotify, or mtime polling where inotify is unavailable. Events are
+# debounced (lesson_watch.py), so an editor's write-rename-chmod burst is one
+# rebuild, and only lessons whose lesson_hash changed (or whose layout
+# changed) are re-rendered.
+
+class WatchSession:
+    """Warm state for --watch: parsed weeks, the target index and the lesson cache."""
+
+    def __init__(self, args):
+        # Rebuilds touch a handful of lessons; a worker pool would only add startup latency.
+        self.args = argparse.Namespace(**{**vars(args), 'jobs': 1})
+        self.sources = select_weeks(discover_weeks(), args.week)
+        self.weeks = dict(iter_weeks_checked(self.sources, []))
+        self.check_prereqs = not args.week
+        self.index = ManifestIndex() if args.targets == 'manifest' else LessonIndex()
+        self.cache = load_cache()
+
+    def week_for(self, path):
+        """Week slug of a lesson data file, or None if it is not one (or not selected)."""
+        slug, ext = os.path.splitext(os.path.basename(path))
+        if os.path.dirname(path) != LESSON_DATA_DIR or ext not in WEEK_DATA_EXTS:
+            return None
+        if self.args.week and not any(week_matches(slug, p) for p in self.args.week):
+            return None
+        return slug
+
+    def relevant(self, path):
+        return self.week_for(path) is not None or (
+            os.path.dirname(path) == LAYOUT_DIR and path.endswith('.md'))
+
+    def reload(self, paths):
+        """Re-read changed week files. Returns (lessons to rebuild, error messages)."""
+        layouts_changed = any(os.path.dirname(p) == LAYOUT_DIR for p in paths)
+        errors = []
+        changed = []
+        for path in sorted(paths):
+            week_slug = self.week_for(path)
+            if week_slug is None:
+                continue
+            if not os.path.exists(path):
+                if self.sources.get(week_slug) == path:
+                    del self.sources[week_slug]
+                    self.weeks.pop(week_slug, None)
+                    print(f"  🗑️  {os.path.basename(path)} removed; its lessons are left on disk")
+                continue
+            self.sources[week_slug] = path
+            try:
+                lessons = load_week(week_slug, path, errors=errors)
+            except Exception as e:  # a half-typed edit must not stop the watcher
+                errors.append(f"{os.path.basename(path)}: {type(e).__name__}: {e}")
+                continue
+            self.weeks[week_slug] = lessons
+            changed.append(week_slug)
+
+        more_errors, _ = validate_weeks(self.weeks.items(), self.check_prereqs)
+        errors += more_errors
+        if layouts_changed:
+            # write_plan skips every lesson whose layout digest did not change.
+            return list(self.weeks.items()), errors
+        # The cache's data_hash is the lesson_hash each lesson was last written from.
+        entries = self.cache['lessons']
+        dirty = []
+        for week_slug in changed:
+            lessons = [l for l in self.weeks[week_slug]
+                       if entries.get(l.frontmatter.id, {}).get('data_hash') != lesson_hash(l)]
+            if lessons:
+                dirty.append((week_slug, lessons))
+        return dirty, errors
+
+    def rebuild(self, paths, html_renderer=None):
+        """Regenerate what paths affect. Returns the number of lessons planned, or None on errors."""
+        args = self.args
+        weeks, errors = self.reload(paths)
+        if errors:
+            print(f"❌ {len(errors)} lesson data error(s), nothing written:")
+            for message in errors:
+                print(f"  - {message}")
+            return None
+        plan = plan_lessons(select_lessons(weeks, args.day, args.ids), self.index)
+        if any(filepath is None for *_, filepath, _ in plan):
+            # A target file may have been added since the index was built.
+            self.index = ManifestIndex() if args.targets == 'manifest' else LessonIndex()
+            plan = plan_lessons(select_lessons(weeks, args.day, args.ids), self.index)
+        if not plan:
+            return 0
+        frontmatter = None
+        if args.merge_frontmatter:
+            _FRONTMATTER_CACHE.clear()
+            frontmatter = build_frontmatter_index(entry[2] for entry in plan if entry[2] is not None)
+        old_entries = self.cache['lessons']
+        new_entries = dict(old_entries)
+        totals = {'written': 0, 'skipped': 0, 'lines': 0}
+        write_plan(plan, args, old_entries, new_entries, frontmatter, totals, None, html_renderer)
+        self.cache['template_version'] = TEMPLATE_VERSION
+        self.cache['lessons'] = new_entries
+        save_cache(self.cache)
+        if args.render_cache:
+            RENDER_CACHE.save(args.render_cache)
+        if args.write_manifest:
+            update_manifest(plan_outputs(plan, new_entries))
+        return len(plan)
+
+
+def watch(args, html_renderer=None):
+    """--watch: rebuild affected lessons whenever lesson data or layouts change."""
+    session = WatchSession(args)
+    watcher = lesson_watch.make_watcher([d for d in (LESSON_DATA_DIR, LAYOUT_DIR) if os.path.isdir(d)])
+    lesson_count = sum(len(lessons) for lessons in session.weeks.values())
+    print(f"\n👀 Watching {os.path.relpath(LESSON_DATA_DIR)} ({watcher.kind}, {lesson_count} lessons warm); "
+          f"Ctrl-C to stop")
+    try:
+        while True:
+            paths, last_event = lesson_watch.wait_for_changes(watcher)
+            paths = {p for p in paths if session.relevant(p)}
+            if not paths:
+                continue  # editor temp files, __pycache__, ...
+            start = time.perf_counter()
+            count = session.rebuild(paths, html_renderer)
+            done = time.perf_counter()
+            if count is None:
+                continue
+            names = ', '.join(sorted(os.path.basename(p) for p in paths))
+            print(f"⚡ {count} lesson(s) rebuilt in {(done - start) * 1000:.1f} ms "
+                  f"({(time.monotonic() - last_event) * 1000:.1f} ms after the change was seen) — {names}")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        watcher.close()
+    return 0
+
+
+# ─── CLI ──────────────────────────────────────────────────────────────────────
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate rich lesson markdown for W03-W24.')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='render and write lessons in N worker processes (0 = one per CPU)')
+    parser.add_argument('--force', action='store_true',
+                        help=f'regenerate every lesson, ignoring {os.path.basename(CACHE_PATH)}')
+    parser.add_argument('--week', action='append', metavar='SLUG',
+                        help='only weeks whose slug equals, starts with (w07) or globs this; repeatable')
+    parser.add_argument('--day', action='append', type=int, metavar='N',
+                        help='only lessons with this order/day number; repeatable')
+    parser.add_argument('--id', action='append', metavar='GLOB', dest='ids',
+                        help='only lessons whose front matter id matches this glob; repeatable')
+    parser.add_argument('--since', metavar='REV',
+                        help='only lessons whose data changed since this git revision')
+    parser.add_argument('--check', action='store_true',
+                        help='render in memory and list lessons that differ from disk; '
+                             'writes nothing, exits 1 on drift')
+    parser.add_argument('--diff', action='store_true',
+                        help='with --check, print a unified diff for each drifted lesson')
+    parser.add_argument('--merge-frontmatter', action='store_true',
+                        help="keep each target's authored front matter (xp, kind, proof patterns, ...) "
+                             'and only regenerate the body')
+    parser.add_argument('--targets', choices=('index', 'manifest'), default='index',
+                        help='resolve target files from the parts/ directory index (default) '
+                             'or from manifest.json')
+    parser.add_argument('--write-manifest', action='store_true',
+                        help='add generated lessons and per-lesson content hashes to manifest.json')
+    parser.add_argument('--graph', nargs='?', const=GRAPH_PATH, metavar='PATH',
+                        help='write the prerequisite graph of all lessons as JSON '
+                             f'(default: {os.path.basename(GRAPH_PATH)} in the content dir)')
+    parser.add_argument('--render-cache', nargs='?', const=RENDER_CACHE_PATH, metavar='PATH',
+                        help='keep rendered blocks (box diagrams, ...) between builds in this file '
+                             f'(default: {os.path.basename(RENDER_CACHE_PATH)} in the content dir)')
+    parser.add_argument('--sections', action='store_true',
+                        help='also write NN-slug.sections.json next to each lesson with its '
+                             'structured sections (goal, do steps, proof, self-test, ...)')
+    parser.add_argument('--html', action='store_true',
+                        help="also pre-render each lesson to sanitized NN-slug.<hash>.html with the app's "
+                             'remark pipeline, in one node process (needs node_modules)')
+    parser.add_argument('--stream', action='store_true',
+                        help='load, render and write one week at a time so memory stays flat '
+                             'for large packs; reports memory per stage')
+    parser.add_argument('--trace-alloc', action='store_true',
+                        help="with --stream, measure each stage's peak allocations with tracemalloc instead "
+                             'of RSS (more precise, slower)')
+    parser.add_argument('--profile', action='store_true',
+                        help='time loading, find_lesson_file, generate_lesson and write_lesson '
+                             '(wall and CPU) and list the slowest lessons')
+    parser.add_argument('--profile-top', type=int, default=10, metavar='N',
+                        help='how many of the slowest lessons --profile lists (default: 10)')
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help='also write the --profile results as JSON (implies --profile)')
+    parser.add_argument('--profile-dump', metavar='PATH',
+                        help='run under cProfile and dump pstats data here (main process only)')
+    parser.add_argument('--search-index', nargs='?', const=SEARCH_INDEX_PATH, metavar='PATH',
+                        help='write a BM25 inverted index over every lesson '
+                             f'(default: {os.path.basename(SEARCH_INDEX_PATH)} in the content dir)')
+    parser.add_argument('--audit-proof', nargs='?', const=PROOF_PATTERNS_PATH, metavar='PATH',
+                        help='time every proof regex in parts/ against adversarial inputs and write '
+                             f'a precompiled pattern table (default: {os.path.basename(PROOF_PATTERNS_PATH)})')
+    parser.add_argument('--watch', action='store_true',
+                        help='after building, keep running and regenerate affected lessons whenever '
+                             'lesson data or layouts change')
+    parser.add_argument('--validate', action='store_true',
+                        help='only load and validate the selected lesson data, then exit')
+    parser.add_argument('--layout', default=DEFAULT_LAYOUT,
+                        help='layout name in scripts/lesson_layouts/ or a layout file path, for '
+                             f'lessons without their own "layout" key (default: {DEFAULT_LAYOUT})')
+    args = parser.parse_args(argv)
+    if args.trace_alloc and not args.stream:
+        parser.error('--trace-alloc only applies to --stream')
+    if args.watch and (args.check or args.validate or args.stream or args.audit_proof):
+        parser.error('--watch cannot be combined with --check, --validate, --stream or --audit-proof')
+    if args.check and (args.graph or args.search_index or args.audit_proof or args.write_manifest):
+        parser.error('--check writes nothing, so it cannot be combined with --graph, --search-index, '
+                     '--audit-proof or --write-manifest')
+    return args
+
+
+def plan_lessons(weeks, index, profile=None):
+    """Resolve target files up front: [(week_slug, day, filepath or None, lesson_data)].
+
+    ``index`` is a LessonIndex or a ManifestIndex.
+    """
+    plan = []
+    for week_slug, lessons in weeks:
+        for lesson_data in lessons:
+            day = lesson_data.frontmatter.order
+            if profile is None:
+                filepath = index.resolve(week_slug, lesson_data)
+            else:
+                with profile.stage('find_lesson_file', lesson_data.frontmatter.id):
+                    filepath = index.resolve(week_slug, lesson_data)
+            plan.append((week_slug, day, filepath, lesson_data))
+    return plan
+
+
+def report_manifest_coverage(index, week_slugs, selective):
+    """Print manifest entries without lesson data and lesson data without entries."""
+    parts = {index.part_id(week_slug) for week_slug in week_slugs} if selective else None
+    unclaimed = index.unclaimed(parts)
+    if unclaimed:
+        total = sum(len(paths) for paths in unclaimed.values())
+        counts = ', '.join(f"{part_id} ×{len(paths)}" for part_id, paths in unclaimed.items())
+        print(f"📋 {total} manifest lessons have no lesson data: {counts}")
+    for lesson_id in index.unmatched:
+        print(f"📋 No manifest entry for lesson data {lesson_id}")
+
+
+def run_tasks(tasks, jobs=1, fn=render_and_write):
+    """Yield fn(*task) for each task tuple, in order.
+
+    With jobs != 1 the work fans out over a process pool, but results are still
+    yielded in task order so output and summaries match serial mode.
+    """
+    if jobs == 1 or len(tasks) < 2:
+        for task in tasks:
+            yield fn(*task)
+        return
+
+    workers = jobs if jobs > 0 else os.cpu_count()
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        yield from pool.map(fn, *zip(*tasks))
+
+
+def write_plan(plan, args, old_entries, new_entries, frontmatter, totals, profile=None, html_renderer=None):
+    """Render and write the lessons in plan, skipping fresh ones.
+
+    Cache entries go into new_entries; written/skipped/lines counts are added
+    to totals. With a Profile, render and write times are recorded per lesson.
+    With an html_renderer, lessons whose HTML is missing or stale are sent to
+    it as soon as their markdown is on disk, so node converts them while the
+    rest is still being written.
+    """
+    # Decide what to render before starting any workers.
+    todo = []
+    for week_slug, day, filepath, lesson_data in plan:
+        lesson_id = lesson_data.frontmatter.id
+        if filepath is None:
+            # Still in the data, just unresolved this run: not an orphan.
+            if lesson_id in old_entries:
+                new_entries[lesson_id] = old_entries[lesson_id]
+            continue
+        relpath = os.path.relpath(filepath, BASE_DIR)
+        data_hash = lesson_hash(lesson_data)
+        layout = lesson_layout(lesson_data, args.layout)
+        entry = old_entries.get(lesson_id)
+        if not args.force and is_fresh(entry, relpath, data_hash, layout.digest, filepath,
+                                       args.merge_frontmatter, args.sections):
+            new_entries[lesson_id] = entry
+        else:
+            new_entries[lesson_id] = {'path': relpath, 'data_hash': data_hash,
+                                      'template_version': TEMPLATE_VERSION,
+                                      'layout_hash': layout.digest,
+                                      'merge_frontmatter': args.merge_frontmatter}
+            if args.sections:
+                new_entries[lesson_id]['sections'] = SECTIONS_FORMAT_VERSION
+            todo.append((filepath, lesson_data, layout.path,
+                         frontmatter.get(filepath) if frontmatter is not None else None, args.sections))
+
+    current_week = None
+    results = run_tasks(todo, args.jobs, render_and_write if profile is None else profiled_render_and_write)
+    html_jobs = []
+
+    for week_slug, day, filepath, lesson_data in plan:
+        if week_slug != current_week:
+            current_week = week_slug
+            print(f"\n📗 Processing {week_slug}...")
+        if filepath is None:
+            print(f"  ⚠️  Could not find file for {week_slug} day {day}")
+            continue
+
+        entry = new_entries[lesson_data.frontmatter.id]
+        if 'output_hash' not in entry:
+            lines, entry['output_hash'], changed, *timings = next(results)
+            entry['lines'] = lines
+            if profile is not None:
+                for name, (wall, cpu) in timings[0].items():
+                    profile.add(name, wall, cpu, lesson_data.frontmatter.id, filepath)
+        else:
+            changed = None
+        if html_renderer is not None and not lesson_html.html_is_fresh(entry, filepath):
+            html_renderer.submit(filepath)
+            html_jobs.append((filepath, entry))
+
+        if changed is None:
+            print(f"  ⏭️  Unchanged {os.path.basename(filepath)}")
+            totals['skipped'] += 1
+            continue
+        if not changed:
+            print(f"  ⏭️  Identical {os.path.basename(filepath)}")
+            totals['skipped'] += 1
+            continue
+        print(f"  ✅ Wrote {os.path.basename(filepath)} ({lines} lines)")
+        totals['written'] += 1
+        totals['lines'] += lines
+
+    rendered = html_renderer.collect() if html_jobs else {}
+    for filepath, entry in html_jobs:
+        entry['html'], entry['html_source'] = rendered[os.path.abspath(filepath)]
+        entry['html_version'] = lesson_html.HTML_VERSION
+        print(f"  🌐 {entry['html']}")
+    lesson_html.remove_stale_html({filepath: entry['html'] for filepath, entry in html_jobs})
+    totals['html'] = totals.get('html', 0) + len(html_jobs)
+
+
+def plan_outputs(plan, new_entries):
+    """{target filepath: output sha256} for the resolved lessons in plan."""
+    return {filepath: new_entries[lesson_data.frontmatter.id]['output_hash']
+            for _, _, filepath, lesson_data in plan if filepath is not None}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    profile = Profile() if args.profile or args.profile_json else None
+    html_renderer = lesson_html.HtmlRenderer() if args.html and not args.check else None
+    try:
+        if args.profile_dump:
+            profiler = cProfile.Profile()
+            code = profiler.runcall(build, args, profile, html_renderer)
+            profiler.dump_stats(args.profile_dump)
+        else:
+            code = build(args, profile, html_renderer)
+        if args.watch and code in (0, 1):
+            # Keep watching after data errors so the next save can fix them.
+            code = watch(args, html_renderer)
+    except lesson_html.RenderError as e:
+        print(f"❌ HTML rendering failed: {e}")
+        code = 1
+    finally:
+        if html_renderer is not None:
+            html_renderer.close()
+
+    if profile is not None:
+        profile.print_report(args.profile_top)
+        if args.profile_json:
+            write_profile_json(profile, args.profile_json, args.profile_top)
+            print(f"📝 Profile JSON written to {args.profile_json}")
+    if args.profile_dump:
+        print(f"📝 cProfile stats written to {args.profile_dump} (python3 -m pstats {args.profile_dump})")
+    return code
+
+
+def build(args, profile=None, html_renderer=None):
+    """Run the generator for parsed arguments; returns the exit code."""
     print("=" * 60)
     print("Rich Lesson Generator — W03-W24")
     print("=" * 60)
 
-    total_written = 0
-    total_lines = 0
-
-    for week_slug, lessons in ALL_WEEKS:
-        print(f"\n📗 Processing {week_slug}...")
-        for lesson_data in lessons:
-            day = lesson_data['frontmatter']['order']
-            filepath = find_lesson_file(week_slug, day)
-            if filepath is None:
-                print(f"  ⚠️  Could not find file for {week_slug} day {day}")
-                continue
-
-            content = generate_lesson(lesson_data)
-            write_lesson(filepath, content)
-            total_written += 1
-            total_lines += len(content.splitlines())
-
+    sources = select_weeks(discover_weeks(), args.week)
+    if args.week and not sources:
+        print(f"❌ No lessons matched {describe_selectors(args)}")
+        return 2
+    changed = None
+    if args.since:
+        try:
+            changed = changed_since(args.since, sources)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 2
+        sources = {slug: path for slug, path in sources.items() if slug in changed}
+    selective = bool(args.week or args.day or args.ids or args.since)
+    memory = MemoryReport(args.trace_alloc) if args.stream else None
+
+    if args.render_cache:
+        RENDER_CACHE.load(args.render_cache)
+    weeks = None
+    errors = []
+    # Prereqs can only be resolved when no week was filtered out.
+    check_prereqs = not (args.week or args.since)
+    if args.stream:
+        # Validate week by week, keeping only front matter, then load each
+        # week again when it is rendered.
+        with memory.stage('validate'), profile_stage(profile, 'load'):
+            more_errors, graph = validate_weeks(iter_weeks_checked(sources, errors), check_prereqs)
+    else:
+        with profile_stage(profile, 'load'):
+            weeks, errors = load_weeks_checked(sources)
+            more_errors, graph = validate_weeks(weeks, check_prereqs)
+    errors += more_errors
+    if args.render_cache:
+        if not args.check:  # --check reads the cache but writes nothing
+            RENDER_CACHE.save(args.render_cache)
+        print(f"🧩 Render cache: {RENDER_CACHE.hits} hits, {RENDER_CACHE.misses} rendered, "
+              f"{len(RENDER_CACHE.entries)} kept")
+    if errors:
+        print(f"❌ {len(errors)} lesson data error(s), nothing written:")
+        for message in errors:
+            print(f"  - {message}")
+        return 1
+    # With --since an unmatched --day/--id may only mean those lessons are unchanged.
+    if ((args.day or args.ids) and not args.since
+            and not any(lesson_selected(fm, args.day, args.ids) for fm in graph.nodes.values())):
+        print(f"❌ No lessons matched {describe_selectors(args)}")
+        return 2
+    if args.graph:
+        if not check_prereqs:
+            # The graph always covers every lesson, whatever this run renders.
+            errors = []
+            more_errors, full_graph = validate_weeks(iter_weeks_checked(discover_weeks(), errors))
+            errors += more_errors
+            if errors:
+                print(f"❌ {len(errors)} lesson data error(s), graph not written:")
+                for message in errors:
+                    print(f"  - {message}")
+                return 1
+        else:
+            full_graph = graph
+        graph_changed = write_graph(full_graph, args.graph)
+        print(f"🕸️  {os.path.basename(args.graph)} {'updated' if graph_changed else 'unchanged'}")
+    if args.search_index:
+        # Like the graph, the index always covers every lesson, so weeks this
+        # run did not select (and has not validated) are loaded here, checked.
+        errors = []
+        if weeks is not None and check_prereqs:
+            search_weeks = weeks
+        else:
+            search_weeks = iter_weeks_checked(discover_weeks() if not check_prereqs else sources, errors)
+        with profile_stage(profile, 'search_index'):
+            written = write_search_index(search_weeks, args.search_index, errors=errors)
+        if written is None:
+            print(f"❌ {len(errors)} lesson data error(s), search index not written:")
+            for message in errors:
+                print(f"  - {message}")
+            return 1
+        search_changed, count, term_count, reused = written
+        print(f"🔍 {os.path.basename(args.search_index)} {'updated' if search_changed else 'unchanged'} "
+              f"({count} lessons, {term_count} terms, {reused} reused)")
+    if args.validate:
+        print(f"✅ {len(graph.nodes)} lessons in {len(sources)} week(s) are valid")
+        if args.audit_proof:
+            write_proof_table(args.audit_proof)
+        return 0
+
+    with profile_stage(profile, 'find_lesson_file'):
+        index = ManifestIndex() if args.targets == 'manifest' else LessonIndex()
+    if args.stream:
+        if args.audit_proof and not args.merge_frontmatter:
+            # Planned on a throwaway index so stream_build reports ambiguities once.
+            plans = (plan_lessons(select_lessons([(week_slug, load_week(week_slug, path))],
+                                                 args.day, args.ids, changed), type(index)())
+                     for week_slug, path in sources.items())
+            if refuse_authored_losses(itertools.chain.from_iterable(plans), args.layout):
+                return 1
+        code = stream_build(args, sources, changed, selective, index, memory, profile, html_renderer)
+    else:
+        plan = plan_lessons(select_lessons(weeks, args.day, args.ids, changed), index, profile)
+        for message in index.ambiguities:
+            print(f"⚠️  Ambiguous match, skipping — {message}")
+        if args.targets == 'manifest':
+            report_manifest_coverage(index, (entry[0] for entry in plan), selective)
+        frontmatter = None
+        if args.merge_frontmatter:
+            frontmatter = build_frontmatter_index(entry[2] for entry in plan if entry[2] is not None)
+        if args.check:
+            return check_plan(plan, args.layout, args.jobs, args.diff, frontmatter)
+        if args.audit_proof and not args.merge_frontmatter and refuse_authored_losses(plan, args.layout):
+            return 1
+
+        cache = load_cache()
+        old_entries = cache['lessons']
+        # A selective run only sees some lessons; keep everyone else's entries.
+        new_entries = dict(old_entries) if selective else {}
+        totals = {'written': 0, 'skipped': 0, 'lines': 0}
+        write_plan(plan, args, old_entries, new_entries, frontmatter, totals, profile, html_renderer)
+        code = finish_build(args, cache, old_entries, new_entries, selective, totals,
+                            plan_outputs(plan, new_entries))
+    if args.audit_proof and code == 0:
+        write_proof_table(args.audit_proof)
+    return code
+
+
+def finish_build(args, cache, old_entries, new_entries, selective, totals, outputs):
+    """Report orphans, save the cache, update the manifest and print the summary."""
+    orphaned = [] if selective else sorted(set(old_entries) - set(new_entries))
+    for lesson_id in orphaned:
+        print(f"  🗑️  Orphaned cache entry {lesson_id} ({old_entries[lesson_id].get('path')})")
+
+    cache['template_version'] = TEMPLATE_VERSION
+    cache['lessons'] = new_entries
+    save_cache(cache)
+
+    if args.write_manifest:
+        manifest_changed, unlisted = update_manifest(outputs)
+        for filepath in unlisted:
+            print(f"  ⚠️  {os.path.relpath(filepath, BASE_DIR)}: part is not in manifest.json")
+        print(f"\n📋 manifest.json {'updated' if manifest_changed else 'unchanged'}")
+
+    total_written, total_lines = totals['written'], totals['lines']
     print(f"\n{'=' * 60}")
     print(f"✅ Generated {total_written} files, {total_lines} total lines")
     print(f"📊 Average: {total_lines // max(total_written, 1)} lines/file")
+    print(f"⏭️  Skipped {totals['skipped']} unchanged, 🗑️  {len(orphaned)} orphaned")
+    if args.html:
+        print(f"🌐 Rendered {totals.get('html', 0)} HTML files")
     print(f"{'=' * 60}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
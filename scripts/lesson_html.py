@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Pre-rendered lesson HTML for generate-rich-lessons.py --html.
+
+The app renders lesson markdown with remark (lib/markdown.ts). --html hands
+each written lesson to scripts/render-lesson-html.ts, which runs that same
+pipeline plus remark-html's sanitizer in one long-lived node process and
+writes NN-slug.<hash>.html beside the markdown. <hash> is the first 12 hex
+digits of the HTML's sha256, so the name changes with the content; older
+hashed copies are removed with one directory scan per week once a batch is
+collected. Requests stream to node while the generator is still writing
+markdown, so conversion overlaps the writes instead of following them.
+"""
+
+import json
+import os
+import queue
+import re
+import subprocess
+import threading
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+HTML_VERSION = 1  # bump when the renderer's output changes
+HTML_RENDER_COMMAND = ['npx', '--no-install', 'tsx', os.path.join(SCRIPTS_DIR, 'render-lesson-html.ts')]
+_HASHED_HTML_RE = re.compile(r'(.+)\.[0-9a-f]{12}\.html')
+
+
+class RenderError(RuntimeError):
+    """The node renderer could not be started or exited early."""
+
+
+class HtmlRenderer:
+    """A render-lesson-html.ts process, started on first use and kept for the whole run."""
+
+    def __init__(self, command=None):
+        self.command = command or HTML_RENDER_COMMAND
+        self.proc = None
+        self.results = queue.Queue()
+        self.pending = 0
+
+    def _start(self):
+        try:
+            # Run from the repo root so npx finds node_modules/.bin/tsx.
+            self.proc = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         text=True, encoding='utf-8', cwd=os.path.dirname(SCRIPTS_DIR))
+        except OSError as e:
+            raise RenderError(f"cannot run {self.command[0]}: {e}") from e
+        # Answers are drained on a thread, so a long batch cannot fill both pipes and deadlock.
+        threading.Thread(target=self._read, args=(self.proc.stdout,), daemon=True).start()
+
+    def _read(self, stdout):
+        for line in stdout:
+            self.results.put(json.loads(line))
+        self.results.put(None)
+
+    def _failed(self):
+        return RenderError(f"{' '.join(self.command)} exited with status {self.proc.wait()}")
+
+    def submit(self, filepath):
+        """Queue a lesson's markdown file; its result comes from the next collect()."""
+        if self.proc is None:
+            self._start()
+        try:
+            self.proc.stdin.write(json.dumps({'path': os.path.abspath(filepath)}) + '\n')
+            self.proc.stdin.flush()
+        except BrokenPipeError:
+            raise self._failed() from None
+        self.pending += 1
+
+    def collect(self):
+        """{absolute markdown path: (html file name, sha256 of the markdown)} for
+        everything submitted since the last call."""
+        done = {}
+        while self.pending:
+            result = self.results.get()
+            if result is None:
+                self.pending = 0
+                raise self._failed()
+            done[result['path']] = (result['html'], result['source'])
+            self.pending -= 1
+        return done
+
+    def close(self):
+        if self.proc is not None:
+            try:
+                self.proc.stdin.close()
+            except BrokenPipeError:
+                pass
+            self.proc.wait()
+            self.proc = None
+
+
+def remove_stale_html(current):
+    """Delete superseded hashed HTML copies, scanning each directory once.
+
+    ``current`` maps a lesson's markdown path to its current HTML file name;
+    other ``<stem>.<hash>.html`` files of those lessons are removed.
+    """
+    by_dir = {}
+    for filepath, name in current.items():
+        directory, base = os.path.split(os.path.splitext(filepath)[0])
+        by_dir.setdefault(directory, {})[base] = name
+    removed = 0
+    for directory, keep in by_dir.items():
+        for entry in os.scandir(directory):
+            m = _HASHED_HTML_RE.fullmatch(entry.name)
+            if m and m.group(1) in keep and entry.name != keep[m.group(1)]:
+                os.unlink(entry.path)
+                removed += 1
+    return removed
+
+
+def html_is_fresh(entry, filepath):
+    return (entry.get('html_version') == HTML_VERSION
+            and entry.get('html_source') == entry.get('output_hash')
+            and os.path.exists(os.path.join(os.path.dirname(filepath), entry.get('html', ''))))
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+BM25 search over lessons: tokenizer, positional postings, index building and
+the reference query implementation.
+
+generate-rich-lessons.py --search-index feeds this module each lesson's
+searchable fields and writes the index it returns. The index is one JSON
+document: per-field document lengths and their averages, and for every term
+its document frequency, IDF and [doc, field, [positions]] postings, so the
+app can answer queries with dict lookups. Tokens are lowercased words minus
+stop words; positions count the dropped stop words too, so phrase offsets
+match the source text.
+
+Usage: python3 scripts/lesson_search.py INDEX.json QUERY [--limit N]
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+
+SEARCH_FORMAT_VERSION = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+SEARCH_TOKEN_RE = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+STOP_WORDS = frozenset("""
+a about after all also an and any are as at be because been before but by can could did do does
+each for from had has have how i if in into is it its just more most my no not now of on once only
+or other our out over so some such than that the their them then there these they this those
+through to too under up very was we were what when where which while who why will with would you
+your
+""".split())
+
+
+def tokenize(text):
+    """[(position, term)] for the words in text, stop words skipped but counted."""
+    return [(pos, term) for pos, term in enumerate(SEARCH_TOKEN_RE.findall(text.lower()))
+            if term not in STOP_WORDS and (len(term) > 1 or term.isdigit())]
+
+
+def field_postings(texts):
+    """{'terms': {term: [[field, [positions]], ...]}, 'lengths': [tokens per field]}
+    for one document given as one string per field."""
+    terms = {}
+    lengths = []
+    for field, text in enumerate(texts):
+        tokens = tokenize(text)
+        lengths.append(len(tokens))
+        positions = {}
+        for pos, term in tokens:
+            positions.setdefault(term, []).append(pos)
+        for term, plist in positions.items():
+            terms.setdefault(term, []).append([field, plist])
+    return {'terms': terms, 'lengths': lengths}
+
+
+def build_index(documents, fields, field_weights):
+    """Build the index document from (doc row, field_postings record) pairs.
+
+    A doc row is whatever the app needs to show a hit; its first element
+    must be the lesson id.
+    """
+    docs = []
+    doc_lengths = []
+    postings = {}
+    for row, record in documents:
+        doc = len(docs)
+        docs.append(row)
+        doc_lengths.append(record['lengths'])
+        for term, entries in record['terms'].items():
+            postings.setdefault(term, []).extend([doc, field, plist] for field, plist in entries)
+
+    n = len(docs)
+    avg_lengths = [round(sum(lengths[f] for lengths in doc_lengths) / n, 4) if n else 0.0
+                   for f in range(len(fields))]
+    terms = {}
+    for term in sorted(postings):
+        plist = postings[term]
+        df = len({doc for doc, _, _ in plist})
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        terms[term] = [df, round(idf, 6), plist]
+    return {
+        'format_version': SEARCH_FORMAT_VERSION,
+        'fields': list(fields),
+        'field_weights': list(field_weights),
+        'k1': BM25_K1,
+        'b': BM25_B,
+        'docs': docs,
+        'doc_lengths': doc_lengths,
+        'avg_lengths': avg_lengths,
+        'terms': terms,
+    }
+
+
+def search(index, query, limit=10):
+    """Rank lessons for a query against a loaded index: [(score, lesson id)].
+
+    Words are scored with per-field BM25, weighted by field. Quoted phrases
+    ("event loop") must also appear with the same word offsets in one field.
+    This is the reference for the app's lookup; it reads nothing but the index.
+    """
+    terms = index['terms']
+    weights = index['field_weights']
+    avg = index['avg_lengths']
+    k1, b = index['k1'], index['b']
+    scores = {}
+    for _, term in tokenize(query.replace('"', ' ')):
+        entry = terms.get(term)
+        if entry is None:
+            continue
+        _, idf, plist = entry
+        for doc, field, positions in plist:
+            tf = len(positions)
+            norm = 1 - b + b * index['doc_lengths'][doc][field] / (avg[field] or 1)
+            scores[doc] = scores.get(doc, 0.0) + weights[field] * idf * tf * (k1 + 1) / (tf + k1 * norm)
+
+    for phrase in re.findall(r'"([^"]+)"', query):
+        tokens = tokenize(phrase)
+        if len(tokens) < 2:
+            continue
+        if any(term not in terms for _, term in tokens):
+            return []
+        (first_pos, first), rest = tokens[0], tokens[1:]
+        where = {}
+        for _, term in rest:
+            for doc, field, positions in terms[term][2]:
+                where[(doc, field, term)] = set(positions)
+        matched = set()
+        for doc, field, positions in terms[first][2]:
+            if any(all(p - first_pos + pos in where.get((doc, field, term), ()) for pos, term in rest)
+                   for p in positions):
+                matched.add(doc)
+        scores = {doc: score for doc, score in scores.items() if doc in matched}
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return [(round(score, 4), index['docs'][doc][0]) for doc, score in ranked]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query a lesson search index.')
+    parser.add_argument('index', help='search-index.json written by generate-rich-lessons.py --search-index')
+    parser.add_argument('query')
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args(argv)
+    with open(args.index, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    for score, lesson_id in search(index, args.query, args.limit):
+        print(f"{score:8.4f}  {lesson_id}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
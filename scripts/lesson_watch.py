@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+File watchers for generate-rich-lessons.py --watch.
+
+InotifyWatcher reads inotify(7) events through ctypes; PollingWatcher
+compares file mtimes where inotify is unavailable. Both report changed
+paths from wait(); wait_for_changes debounces them, so an editor's
+write-rename-chmod burst is one rebuild. Hidden, backup and __pycache__
+style names are ignored.
+"""
+
+import ctypes
+import os
+import select
+import struct
+import time
+
+WATCH_DEBOUNCE_S = 0.03   # quiet time after the last event before rebuilding
+WATCH_POLL_S = 0.25       # scan interval of the mtime fallback
+
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_INOTIFY_EVENT = struct.Struct('iIII')
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+
+
+def _watched_name(name):
+    return not name.startswith(('.', '_', '#')) and not name.endswith('~')
+
+
+class InotifyWatcher:
+    """Directory change notifications via inotify(7), through ctypes."""
+
+    kind = 'inotify'
+
+    def __init__(self, dirs):
+        libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.dirs = {}  # watch descriptor -> directory
+        for d in dirs:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(d), _WATCH_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {d}')
+            self.dirs[wd] = d
+
+    def wait(self, timeout=None):
+        """Block up to timeout seconds; return the set of changed file paths."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        try:
+            buf = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return set()
+        paths = set()
+        offset = 0
+        while offset < len(buf):
+            wd, _mask, _cookie, length = _INOTIFY_EVENT.unpack_from(buf, offset)
+            offset += _INOTIFY_EVENT.size
+            name = buf[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace')
+            offset += length
+            if name and wd in self.dirs and _watched_name(name):
+                paths.add(os.path.join(self.dirs[wd], name))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback for systems without inotify: compare directory mtimes."""
+
+    kind = 'polling'
+
+    def __init__(self, dirs):
+        self.dirs = list(dirs)
+        self.mtimes = self._scan()
+
+    def _scan(self):
+        mtimes = {}
+        for d in self.dirs:
+            try:
+                entries = list(os.scandir(d))
+            except FileNotFoundError:
+                continue
+            for e in entries:
+                if e.is_file() and _watched_name(e.name):
+                    mtimes[e.path] = e.stat().st_mtime_ns
+        return mtimes
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            mtimes = self._scan()
+            paths = {p for p in mtimes.keys() | self.mtimes.keys() if mtimes.get(p) != self.mtimes.get(p)}
+            self.mtimes = mtimes
+            if paths:
+                return paths
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(WATCH_POLL_S if deadline is None else min(WATCH_POLL_S, max(deadline - time.monotonic(), 0)))
+
+    def close(self):
+        pass
+
+
+def make_watcher(dirs):
+    try:
+        return InotifyWatcher(dirs)
+    except (OSError, AttributeError):  # not Linux, or out of inotify watches
+        return PollingWatcher(dirs)
+
+
+def wait_for_changes(watcher, debounce=WATCH_DEBOUNCE_S):
+    """Block until something changes, then until debounce seconds pass quietly.
+
+    Returns (changed paths, monotonic time the last event was seen).
+    """
+    paths = watcher.wait()
+    last = time.monotonic()
+    while True:
+        more = watcher.wait(debounce)
+        if not more:
+            return paths, last
+        paths |= more
+        last = time.monotonic()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Proof regex audit: pattern normalization, timing against adversarial inputs
+in a killable child process, and the precompiled pattern table.
+
+lib/validate-proof.ts runs every proof.regex_patterns entry of a lesson
+against the pasted submission with flags "im". generate-rich-lessons.py
+--audit-proof collects the patterns from the front matter of every lesson and
+quest in parts/ and hands them to build_proof_table, which times each
+distinct pattern (a runaway pattern cannot be interrupted in-process, so its
+child is killed at the hard timeout) and flags anything over budget. The
+table has one normalized entry per distinct pattern, with its timing and
+status, and each lesson's list of pattern indexes, so the validator can
+compile each pattern once and skip flagged ones.
+
+Normalization only rewrites what cannot change a search() result under
+"im": top-level alternation branches that are plain literals and contain
+another literal branch (case-insensitively) are dropped, as are duplicates.
+"REJECTED|rejected|REJECT" becomes "REJECT"; patterns that normalize to the
+same source share one entry.
+"""
+
+import multiprocessing
+import re
+import time
+
+PROOF_FORMAT_VERSION = 1
+PROOF_FLAGS = 'im'
+PROOF_BUDGET_MS = 50       # per input; slower patterns are flagged
+PROOF_TIMEOUT_S = 1.0      # per pattern; the child process is killed after this
+PROOF_INPUT_SIZE = 64_000
+_REGEX_META = set('\\.^$*+?()[]{}|')
+
+
+def split_alternation(pattern):
+    """Split a pattern on its top-level '|' (not inside groups, classes or escapes)."""
+    branches = []
+    depth = 0
+    in_class = False
+    start = 0
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if in_class:
+            in_class = ch != ']'
+        elif ch == '[':
+            in_class = True
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == '|' and depth == 0:
+            branches.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    branches.append(pattern[start:])
+    return branches
+
+
+def normalize_pattern(pattern):
+    """Drop literal branches that another literal branch already covers under the i flag."""
+    branches = split_alternation(pattern)
+    if len(branches) < 2:
+        return pattern
+    literal = [b and not (set(b) & _REGEX_META) for b in branches]
+    kept = []
+    seen = set()
+    for i, branch in enumerate(branches):
+        if literal[i]:
+            low = branch.lower()
+            covered = any(literal[j] and j != i and branches[j].lower() in low
+                          and (len(branches[j]) < len(branch) or (branches[j].lower() == low and j < i))
+                          for j in range(len(branches)))
+            if covered or low in seen:
+                continue
+            seen.add(low)
+        kept.append(branch)
+    return '|'.join(kept)
+
+
+def proof_inputs(pattern):
+    """Inputs to time a pattern against: a large realistic log, and adversarial
+    strings built from the pattern's own literal characters with no line
+    breaks and no final match."""
+    line = ("2024-05-01T12:00:00Z INFO verifier: checked bundle 7f3a9c receipt ok "
+            "latency=12ms ops/sec=48211 tests passed 5/5 signature valid\n")
+    log = (line * (PROOF_INPUT_SIZE // len(line) + 1))[:PROOF_INPUT_SIZE]
+    letters = ''.join(ch for ch in pattern if ch.isalnum()) or 'a'
+    derived = (letters * (PROOF_INPUT_SIZE // len(letters) + 1))[:PROOF_INPUT_SIZE] + '\x00'
+    return {
+        'log': log,
+        'pattern_chars': derived,
+        'single_char': 'a' * PROOF_INPUT_SIZE + '!',
+        'spaces': ' ' * PROOF_INPUT_SIZE + '\x00',
+        'hex': ('0123456789abcdef' * (PROOF_INPUT_SIZE // 16))[:PROOF_INPUT_SIZE] + 'z',
+    }
+
+
+def _time_patterns(conn, patterns):
+    """Child process: send (pattern, result) for each pattern, then None."""
+    for pattern in patterns:
+        try:
+            regex = re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+        except re.error as e:
+            conn.send((pattern, {'status': 'unsupported', 'error': str(e)}))
+            continue
+        timings = {}
+        for name, text in proof_inputs(pattern).items():
+            start = time.perf_counter()
+            regex.search(text)
+            timings[name] = round((time.perf_counter() - start) * 1000, 3)
+        conn.send((pattern, {'timings_ms': timings}))
+    conn.send(None)
+
+
+def audit_patterns(patterns, budget_ms=PROOF_BUDGET_MS, timeout_s=PROOF_TIMEOUT_S):
+    """Time each pattern in a child process: {pattern: result dict with 'status'}.
+
+    A pattern that runs past timeout_s gets its child killed, is marked
+    'timeout', and the remaining patterns continue in a fresh child.
+    """
+    results = {}
+    remaining = list(patterns)
+    while remaining:
+        parent, child = multiprocessing.Pipe(duplex=False)
+        proc = multiprocessing.Process(target=_time_patterns, args=(child, remaining), daemon=True)
+        proc.start()
+        child.close()
+        while remaining:
+            if not parent.poll(timeout_s):
+                proc.kill()
+                results[remaining.pop(0)] = {'status': 'timeout', 'max_ms': None}
+                break
+            message = parent.recv()
+            if message is None:
+                remaining = []
+                break
+            pattern, result = message
+            remaining.remove(pattern)
+            if 'timings_ms' in result:
+                result['max_ms'] = max(result['timings_ms'].values())
+                result['status'] = 'slow' if result['max_ms'] > budget_ms else 'ok'
+            results[pattern] = result
+        proc.join()
+        parent.close()
+    return results
+
+
+def build_proof_table(by_lesson, budget_ms=PROOF_BUDGET_MS, timeout_s=PROOF_TIMEOUT_S):
+    """Audit every distinct pattern and return the proof-patterns.json document."""
+    sources = []
+    index_of = {}
+    originals = {}
+    lessons = {}
+    for lesson_id, patterns in by_lesson.items():
+        refs = []
+        for pattern in patterns:
+            source = normalize_pattern(pattern)
+            if source not in index_of:
+                index_of[source] = len(sources)
+                sources.append(source)
+            originals.setdefault(source, [])
+            if pattern not in originals[source]:
+                originals[source].append(pattern)
+            if index_of[source] not in refs:
+                refs.append(index_of[source])
+        lessons[lesson_id] = refs
+    audit = audit_patterns(sources, budget_ms, timeout_s)
+    entries = []
+    for source in sources:
+        entries.append({'source': source, 'flags': PROOF_FLAGS, 'original': originals[source],
+                        **audit[source]})
+    return {
+        'format_version': PROOF_FORMAT_VERSION,
+        'flags': PROOF_FLAGS,
+        'budget_ms': budget_ms,
+        'input_size': PROOF_INPUT_SIZE,
+        'patterns': entries,
+        'lessons': lessons,
+    }
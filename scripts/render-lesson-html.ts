@@ -0,0 +1,52 @@
+/**
+ * Batch HTML renderer behind `generate-rich-lessons.py --html`.
+ *
+ * Reads one JSON request per line on stdin, {"path": "/abs/NN-slug.md"}, and
+ * renders the lesson body (front matter dropped, as content-loader does) with
+ * the app's markdownToHtml plus remark-html's sanitizer (GitHub schema). The
+ * HTML is written beside the lesson as NN-slug.<hash>.html, <hash> being the
+ * first 12 hex digits of its sha256, unless that file already exists. Each
+ * request is answered in order with one JSON line:
+ *   {"path": same path, "html": file name, "source": sha256 of the markdown}
+ *
+ * One process serves a whole build, so node and remark start once.
+ */
+
+import crypto from "crypto";
+import fs from "fs";
+import path from "path";
+import readline from "readline";
+import matter from "gray-matter";
+import { markdownToHtml } from "../lib/markdown";
+
+function sha256(data: string | Buffer): string {
+  return crypto.createHash("sha256").update(data).digest("hex");
+}
+
+async function renderLesson(mdPath: string) {
+  const source = fs.readFileSync(mdPath);
+  // Options disable gray-matter's per-input cache, which would keep every lesson alive.
+  const body = matter(source.toString("utf-8"), {}).content;
+  const html = await markdownToHtml(body, { sanitize: true });
+  const htmlPath = `${mdPath.replace(/\.md$/, "")}.${sha256(html).slice(0, 12)}.html`;
+  if (!fs.existsSync(htmlPath)) {
+    const tmp = `${htmlPath}.${process.pid}.tmp`;
+    fs.writeFileSync(tmp, html);
+    fs.renameSync(tmp, htmlPath);
+  }
+  return { path: mdPath, html: path.basename(htmlPath), source: sha256(source) };
+}
+
+async function main() {
+  const lines = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+  for await (const line of lines) {
+    if (!line.trim()) continue;
+    const request = JSON.parse(line) as { path: string };
+    process.stdout.write(JSON.stringify(await renderLesson(request.path)) + "\n");
+  }
+}
+
+main().catch((error) => {
+  console.error("✗ HTML rendering crashed:", error.message || error);
+  process.exit(1);
+});
@@ -0,0 +1,62 @@
+"""Fixtures for the generate-rich-lessons.py tests.
+
+Every test gets a throwaway copy of the generator next to copies of
+lesson_data/, lesson_layouts/, manifest.json and the w03 part, so the
+module's __file__-relative paths point into tmp_path and nothing in the
+real content tree is touched.
+
+Run with: python3 -m pytest scripts/tests
+"""
+
+import importlib.util
+import os
+import shutil
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTENT_DIR = os.path.join(SCRIPTS_DIR, '..', 'content', 'trust_platform_content')
+WEEK = 'w03'
+SCRIPTS = ('generate-rich-lessons.py', 'lesson_html.py', 'lesson_search.py', 'lesson_watch.py', 'proof_audit.py')
+
+
+def load_generator(path):
+    spec = importlib.util.spec_from_file_location('generate_rich_lessons', path)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so --jobs worker processes can unpickle its functions.
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def gen(tmp_path):
+    """The generator module, loaded from a sandbox copy of scripts/ and content/."""
+    scripts = tmp_path / 'scripts'
+    scripts.mkdir()
+    for name in SCRIPTS:
+        shutil.copy(os.path.join(SCRIPTS_DIR, name), scripts)
+    shutil.copytree(os.path.join(SCRIPTS_DIR, 'lesson_layouts'), scripts / 'lesson_layouts')
+    data = scripts / 'lesson_data'
+    data.mkdir()
+    for name in os.listdir(os.path.join(SCRIPTS_DIR, 'lesson_data')):
+        if name.startswith(WEEK):
+            shutil.copy(os.path.join(SCRIPTS_DIR, 'lesson_data', name), data)
+
+    content = tmp_path / 'content' / 'trust_platform_content'
+    content.mkdir(parents=True)
+    shutil.copy(os.path.join(CONTENT_DIR, 'manifest.json'), content)
+    shutil.copytree(os.path.join(CONTENT_DIR, 'parts', WEEK), content / 'parts' / WEEK)
+    return load_generator(str(scripts / 'generate-rich-lessons.py'))
+
+
+def lesson_files(gen, week=WEEK):
+    """{file name: bytes} of a week's generated lesson markdown."""
+    lessons_dir = os.path.join(gen.BASE_DIR, week, 'lessons')
+    out = {}
+    for name in sorted(os.listdir(lessons_dir)):
+        if name.endswith('.md'):
+            with open(os.path.join(lessons_dir, name), 'rb') as f:
+                out[name] = f.read()
+    return out
@@ -0,0 +1,79 @@
+import json
+import os
+
+from conftest import lesson_files
+
+
+def read_cache(gen):
+    with open(gen.CACHE_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def add_orphan(gen):
+    cache = read_cache(gen)
+    cache['lessons']['w99-gone'] = dict(next(iter(cache['lessons'].values())), path='w99/lessons/01-gone.md')
+    with open(gen.CACHE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+
+
+def generated_paths(gen):
+    """Absolute paths of the lessons the cache says were generated."""
+    return sorted(os.path.join(gen.BASE_DIR, entry['path']) for entry in read_cache(gen)['lessons'].values())
+
+
+def test_second_run_skips_everything(gen, capsys):
+    assert gen.main(['--force']) == 0
+    count = len(read_cache(gen)['lessons'])
+    capsys.readouterr()
+
+    assert gen.main([]) == 0
+    out = capsys.readouterr().out
+    assert out.count('⏭️  Unchanged') == count
+    assert '✅ Generated 0 files' in out and f'Skipped {count} unchanged' in out
+
+
+def test_force_rerenders_but_leaves_identical_files_alone(gen, capsys):
+    assert gen.main(['--force']) == 0
+    mtimes = {path: os.stat(path).st_mtime_ns for path in generated_paths(gen)}
+    capsys.readouterr()
+
+    assert gen.main(['--force']) == 0
+    out = capsys.readouterr().out
+    assert '⏭️  Unchanged' not in out and out.count('⏭️  Identical') == len(mtimes)
+    assert mtimes == {path: os.stat(path).st_mtime_ns for path in mtimes}
+
+
+def test_hand_edited_output_is_rewritten(gen, capsys):
+    assert gen.main(['--force']) == 0
+    expected = lesson_files(gen)
+    path = generated_paths(gen)[0]
+    name = os.path.basename(path)
+    with open(path, 'ab') as f:
+        f.write(b'\nhand edit\n')
+    capsys.readouterr()
+
+    assert gen.main([]) == 0
+    assert f'✅ Wrote {name}' in capsys.readouterr().out
+    assert lesson_files(gen) == expected
+
+
+def test_orphaned_entries_are_reported_and_dropped(gen, capsys):
+    assert gen.main(['--force']) == 0
+    add_orphan(gen)
+    capsys.readouterr()
+
+    assert gen.main([]) == 0
+    out = capsys.readouterr().out
+    assert 'Orphaned cache entry w99-gone (w99/lessons/01-gone.md)' in out and '1 orphaned' in out
+    assert 'w99-gone' not in read_cache(gen)['lessons']
+
+
+def test_selective_runs_do_not_count_orphans(gen, capsys):
+    assert gen.main(['--force']) == 0
+    add_orphan(gen)
+    lesson_id = sorted(read_cache(gen)['lessons'])[0]
+    capsys.readouterr()
+
+    assert gen.main(['--id', lesson_id]) == 0
+    out = capsys.readouterr().out
+    assert 'Orphaned' not in out and '0 orphaned' in out
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+
+def snapshot(root):
+    """{path: (size, mtime_ns)} of every file under root."""
+    out = {}
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            st = os.stat(os.path.join(dirpath, name))
+            out[os.path.join(dirpath, name)] = (st.st_size, st.st_mtime_ns)
+    return out
+
+
+def test_check_reports_drift_until_regenerated(gen, capsys):
+    before = snapshot(gen.CONTENT_DIR)
+    assert gen.main(['--check']) == 1  # the sandbox starts from the authored lessons
+    assert 'drifted' in capsys.readouterr().out
+    assert snapshot(gen.CONTENT_DIR) == before
+
+    assert gen.main(['--force']) == 0
+    assert gen.main(['--check']) == 0
+
+
+def test_check_diff_shows_the_edit(gen, capsys):
+    assert gen.main(['--force']) == 0
+    lessons_dir = os.path.join(gen.BASE_DIR, 'w03', 'lessons')
+    name = '01-envelope-design.md'
+    with open(os.path.join(lessons_dir, name), 'a', encoding='utf-8') as f:
+        f.write('hand edit\n')
+    capsys.readouterr()
+
+    assert gen.main(['--check', '--diff']) == 1
+    out = capsys.readouterr().out
+    rel = os.path.join('w03', 'lessons', name)
+    assert f'❌ {rel}' in out
+    assert f'--- a/{rel}' in out and f'+++ b/{rel}' in out and '-hand edit' in out
+    assert '1 drifted' in out
+
+
+def test_check_writes_nothing(gen):
+    assert gen.main(['--force']) == 0
+    before = snapshot(gen.CONTENT_DIR)
+    assert gen.main(['--check', '--render-cache', '--sections', '--html', '--stream']) == 0
+    assert gen.main(['--check', '--render-cache']) == 0
+    assert snapshot(gen.CONTENT_DIR) == before
+
+
+@pytest.mark.parametrize('flag', ['--graph', '--search-index', '--audit-proof', '--write-manifest'])
+def test_check_rejects_flags_that_write(gen, flag):
+    with pytest.raises(SystemExit) as exit_info:
+        gen.main(['--check', flag])
+    assert exit_info.value.code == 2
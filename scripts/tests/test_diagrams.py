@@ -0,0 +1,18 @@
+def test_columns_rows_have_no_trailing_whitespace(gen):
+    text = gen.diagram(gen.columns(gen.box('A', 'one', 'two', 'three'), 'short', sep=' ──▶ '))
+    lines = text.split('\n')
+    assert all(line == line.rstrip() for line in lines)
+    assert lines[0].endswith('┐     short') and lines[3].endswith('│ ──▶')
+
+
+def test_box_around_columns_stays_rectangular(gen):
+    text = gen.box_diagram('FLOW', [gen.columns('client', gen.box(None, 'x', 'y', 'z'), sep=' → '), 'done'])
+    widths = {gen.display_width(line) for line in text.split('\n')}
+    assert len(widths) == 1
+
+
+def test_display_width_counts_wide_and_zero_width_characters(gen):
+    assert gen.display_width('abc') == 3
+    assert gen.display_width('日本') == 4
+    assert gen.display_width('é') == 1
+    assert gen.display_width('⚠️') == 2
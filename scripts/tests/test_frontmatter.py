@@ -0,0 +1,51 @@
+import os
+
+
+def lesson_path(gen):
+    return os.path.join(gen.BASE_DIR, 'w03', 'lessons', '01-envelope-design.md')
+
+
+def split_lesson(path):
+    """(front matter text, body) of a generated lesson."""
+    with open(path, encoding='utf-8') as f:
+        _, frontmatter, body = f.read().split('---\n', 2)
+    return frontmatter, body
+
+
+def hand_edit(frontmatter):
+    """The generated front matter as an author might leave it: a comment, other
+    quoting, a flow list, a changed value and no duration_minutes."""
+    lines = ['# reviewed by hand']
+    for line in frontmatter.splitlines():
+        if line.startswith('duration_minutes:'):
+            continue
+        if line.startswith('xp:'):
+            line = 'xp: 80   # bonus lesson'
+        lines.append(line)
+    return '\n'.join(lines) + '\nextra: [a, "b"]\n'
+
+
+def test_authored_frontmatter_is_kept_byte_for_byte(gen):
+    path = lesson_path(gen)
+    assert gen.main(['--force', '--day', '1']) == 0
+    generated, body = split_lesson(path)
+    duration = next(l for l in generated.splitlines() if l.startswith('duration_minutes:'))
+    authored = hand_edit(generated)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'---\n{authored}---\n{body}')
+
+    assert gen.main(['--force', '--merge-frontmatter', '--day', '1']) == 0
+    assert split_lesson(path) == (f'{authored}{duration}\n', body)
+
+
+def test_nothing_missing_leaves_the_file_untouched(gen):
+    path = lesson_path(gen)
+    assert gen.main(['--force', '--day', '1']) == 0
+    generated, body = split_lesson(path)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'---\n{hand_edit(generated)}duration_minutes: 30\n---\n{body}')
+    os.utime(path, ns=(0, 0))
+
+    assert gen.main(['--force', '--merge-frontmatter', '--day', '1']) == 0
+    assert os.stat(path).st_mtime_ns == 0
+    assert gen.main(['--check', '--merge-frontmatter', '--day', '1']) == 0
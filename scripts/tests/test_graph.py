@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+
+def chain(gen, n):
+    """l0 <- l1 <- ... <- l{n-1}: each lesson requires the one before it."""
+    return gen.PrereqGraph(
+        gen.Frontmatter(id=f'l{i}', part='w01', title=f'L{i}', order=i + 1,
+                        prereqs=(f'l{i - 1}',) if i else ())
+        for i in range(n))
+
+
+def test_transitive_queries(gen):
+    graph = chain(gen, 5)
+    assert graph.all_prereqs('l3') == {'l0', 'l1', 'l2'}
+    assert graph.all_unlocks('l3') == {'l4'}
+    assert graph.depends_on('l4', 'l0')
+    assert not graph.depends_on('l0', 'l4')
+    assert graph.topological_order() == ['l0', 'l1', 'l2', 'l3', 'l4']
+
+
+def test_graph_json_grows_linearly(gen):
+    small = len(json.dumps(chain(gen, 1000).to_dict()))
+    large = len(json.dumps(chain(gen, 4000).to_dict()))
+    assert large < 5 * small
+    node = chain(gen, 3).to_dict()['nodes']['l2']
+    assert node['prereqs'] == ['l1'] and node['depth'] == 2
+    assert 'all_prereqs' not in node
+
+
+def test_cycles_are_reported(gen):
+    graph = gen.PrereqGraph([
+        gen.Frontmatter(id='a', part='w01', title='A', order=1, prereqs=('b',)),
+        gen.Frontmatter(id='b', part='w01', title='B', order=2, prereqs=('a',)),
+    ])
+    assert [sorted(cycle) for cycle in graph.cycles()] == [['a', 'b']]
+    with pytest.raises(ValueError):
+        graph.topological_order()
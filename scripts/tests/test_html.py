@@ -0,0 +1,89 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Speaks render-lesson-html.ts's line protocol without node: <pre>-wraps the
+# escaped body instead of running remark. Logs one line per process start.
+FAKE_RENDERER = r'''
+import hashlib, html, json, os, sys
+with open(sys.argv[1], 'a') as log:
+    log.write('start\n')
+for line in sys.stdin:
+    path = json.loads(line)['path']
+    with open(path, 'rb') as f:
+        source = f.read()
+    data = ('<pre>' + html.escape(source.decode('utf-8').split('---\n', 2)[-1]) + '</pre>').encode('utf-8')
+    name = f"{os.path.splitext(path)[0]}.{hashlib.sha256(data).hexdigest()[:12]}.html"
+    if not os.path.exists(name):
+        with open(name, 'wb') as f:
+            f.write(data)
+    print(json.dumps({'path': path, 'html': os.path.basename(name),
+                      'source': hashlib.sha256(source).hexdigest()}), flush=True)
+'''
+
+
+@pytest.fixture
+def starts(gen, tmp_path, monkeypatch):
+    """Swap the node renderer for FAKE_RENDERER; returns a function counting its starts."""
+    script = tmp_path / 'fake_renderer.py'
+    script.write_text(FAKE_RENDERER)
+    log = tmp_path / 'renderer.log'
+    monkeypatch.setattr(gen.lesson_html, 'HTML_RENDER_COMMAND', [sys.executable, str(script), str(log)])
+    return lambda: len(log.read_text().splitlines()) if log.exists() else 0
+
+
+def html_files(gen):
+    lessons_dir = os.path.join(gen.BASE_DIR, 'w03', 'lessons')
+    return sorted(n for n in os.listdir(lessons_dir) if n.endswith('.html'))
+
+
+def test_html_is_rendered_in_one_process_and_cached(gen, starts):
+    assert gen.main(['--force', '--html']) == 0
+    assert starts() == 1
+    with open(gen.CACHE_PATH, encoding='utf-8') as f:
+        entries = json.load(f)['lessons'].values()
+    assert sorted(entry['html'] for entry in entries) == html_files(gen)
+    assert all(entry['html_source'] == entry['output_hash'] for entry in entries)
+
+    assert gen.main(['--html']) == 0
+    assert starts() == 1  # everything fresh: node is never started
+
+
+def test_stale_html_is_removed_with_one_scan_per_directory(gen, starts, monkeypatch):
+    assert gen.main(['--force', '--html']) == 0
+    lessons_dir = os.path.join(gen.BASE_DIR, 'w03', 'lessons')
+    current = html_files(gen)
+    stale = current[0].rsplit('.', 2)[0] + '.0123456789ab.html'
+    open(os.path.join(lessons_dir, stale), 'w').close()
+
+    scans = []
+    real_scandir, real_listdir = os.scandir, os.listdir
+    monkeypatch.setattr(os, 'scandir', lambda d=None: scans.append(d) or real_scandir(d))
+    monkeypatch.setattr(os, 'listdir', lambda d=None: scans.append(d) or real_listdir(d))
+    gen.lesson_html.remove_stale_html({os.path.join(lessons_dir, n.rsplit('.', 2)[0] + '.md'): n
+                                       for n in current})
+    assert len(scans) == 1
+    monkeypatch.undo()
+    assert html_files(gen) == current
+
+
+def test_a_failing_renderer_fails_the_build(gen, monkeypatch, capsys):
+    monkeypatch.setattr(gen.lesson_html, 'HTML_RENDER_COMMAND', [sys.executable, '-c', 'import sys; sys.exit(3)'])
+    assert gen.main(['--force', '--html']) == 1
+    assert 'HTML rendering failed' in capsys.readouterr().out
+
+
+def test_long_batches_do_not_deadlock(gen, starts):
+    assert gen.main(['--force']) == 0
+    lessons_dir = os.path.join(gen.BASE_DIR, 'w03', 'lessons')
+    path = os.path.join(lessons_dir, next(n for n in sorted(os.listdir(lessons_dir)) if n.endswith('.md')))
+    renderer = gen.lesson_html.HtmlRenderer()
+    try:
+        for _ in range(5000):
+            renderer.submit(path)
+        assert list(renderer.collect()) == [os.path.abspath(path)]
+    finally:
+        renderer.close()
+    assert starts() == 1
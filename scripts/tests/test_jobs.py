@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from conftest import lesson_files
+
+
+def run(gen, capsys, *argv):
+    assert gen.main(list(argv)) == 0
+    return capsys.readouterr().out
+
+
+@pytest.mark.parametrize('jobs', ['2', '0'])
+def test_jobs_output_matches_serial(gen, capsys, jobs):
+    authored = lesson_files(gen)
+    serial = run(gen, capsys, '--force')
+    expected = lesson_files(gen)
+    assert expected != authored
+
+    lessons_dir = os.path.join(gen.BASE_DIR, 'w03', 'lessons')
+    for name, data in authored.items():
+        with open(os.path.join(lessons_dir, name), 'wb') as f:
+            f.write(data)
+    os.unlink(gen.CACHE_PATH)
+
+    assert run(gen, capsys, '--force', '--jobs', jobs) == serial
+    assert lesson_files(gen) == expected
+    # Same progress lines and summary counts on an incremental run, too.
+    assert run(gen, capsys, '--jobs', jobs) == run(gen, capsys)
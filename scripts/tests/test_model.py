@@ -0,0 +1,66 @@
+import dataclasses
+
+import pytest
+
+
+@pytest.fixture
+def lesson(gen):
+    week_slug, path = next(iter(gen.discover_weeks().items()))
+    return gen.load_week(week_slug, path)[0]
+
+
+def rejects(gen, data, where):
+    with pytest.raises(gen.LessonDataError) as error:
+        gen.Lesson.from_dict(data)
+    assert str(error.value).startswith(where)
+    return str(error.value)
+
+
+def test_round_trip_coerces_lists_to_tuples(gen, lesson):
+    data = lesson.to_dict()
+    assert isinstance(data['goal_deliverables'], list) and isinstance(data['do_steps'][0], dict)
+    rebuilt = gen.Lesson.from_dict(data)
+    assert rebuilt == lesson
+    assert isinstance(rebuilt.goal_deliverables, tuple)
+    assert isinstance(rebuilt.frontmatter.prereqs, tuple)
+    assert all(isinstance(step, gen.DoStep) for step in rebuilt.do_steps)
+    assert all(isinstance(c, gen.PassCriterion) for c in rebuilt.pass_criteria)
+
+
+def test_unknown_and_missing_keys_name_the_lesson_and_field(gen, lesson):
+    lesson_id = lesson.frontmatter.id
+    data = lesson.to_dict()
+    data['goal_outro'] = 'typo'
+    assert rejects(gen, data, f'{lesson_id}: ').endswith('unknown field(s) goal_outro')
+    data = lesson.to_dict()
+    del data['ship_file'], data['done_when']
+    assert rejects(gen, data, f'{lesson_id}: ').endswith('missing field(s) done_when, ship_file')
+
+
+@pytest.mark.parametrize('edit, where', [
+    (lambda d: d['frontmatter'].update(order='1'), 'frontmatter.order: expected int, got str'),
+    (lambda d: d['frontmatter'].update(order=True), 'frontmatter.order: expected int, got bool'),
+    (lambda d: d.update(goal_deliverables='one'), 'goal_deliverables: expected a list, got str'),
+    (lambda d: d['goal_deliverables'].append(3), 'goal_deliverables[{n}]: expected str, got int'),
+    (lambda d: d['do_steps'].__setitem__(0, ['title only']), 'do_steps[0]: '),
+    (lambda d: d['do_steps'].__setitem__(0, {'title': 't', 'why': 'w', 'extra': 1}), 'do_steps[0]: '),
+    (lambda d: d['pass_criteria'].__setitem__(0, ['a', 'b', 'c']), 'pass_criteria[0]: '),
+    (lambda d: d['self_test'].__setitem__(0, 'question'), 'self_test[0]: expected SelfTestItem, got str'),
+])
+def test_bad_values_report_their_field_path(gen, lesson, edit, where):
+    data = lesson.to_dict()
+    edit(data)
+    where = where.format(n=len(data['goal_deliverables']) - 1)
+    rejects(gen, data, f'{lesson.frontmatter.id}: {where}')
+
+
+def test_lessons_are_immutable_and_slotted(gen, lesson):
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        lesson.goal_intro = 'changed'
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        lesson.do_steps[0].title = 'changed'
+    with pytest.raises((AttributeError, TypeError)):
+        lesson.extra = 1
+    assert not hasattr(lesson, '__dict__')
+    with pytest.raises(AttributeError):
+        lesson.goal_deliverables.append('more')
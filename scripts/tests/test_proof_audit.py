@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+
+@pytest.mark.parametrize('pattern, branches', [
+    ('a|b|c', ['a', 'b', 'c']),
+    (r'a\|b|c', [r'a\|b', 'c']),
+    ('(a|b)|c', ['(a|b)', 'c']),
+    ('[|]x|y', ['[|]x', 'y']),
+    (r'[\]|]x|y', [r'[\]|]x', 'y']),
+    ('a||b', ['a', '', 'b']),
+    ('abc', ['abc']),
+])
+def test_split_alternation(gen, pattern, branches):
+    assert gen.proof_audit.split_alternation(pattern) == branches
+
+
+@pytest.mark.parametrize('pattern, normalized', [
+    ('REJECTED|rejected|REJECT', 'REJECT'),           # covered branches dropped
+    ('ok|OK|ok', 'ok'),                                # duplicates, first spelling kept
+    ('struct Envelope|class Envelope', 'struct Envelope|class Envelope'),
+    (r'a\|b|a', r'a\|b|a'),                            # escaped | is not a literal branch
+    ('(pass|passed)|passed', '(pass|passed)|passed'),  # groups are not literals
+    ('[|]x|x', '[|]x|x'),
+    ('passed||pass', '|pass'),                         # empty branches are kept
+    ('tests? passed|passed', 'tests? passed|passed'),
+    ('single', 'single'),
+])
+def test_normalize_pattern(gen, pattern, normalized):
+    assert gen.proof_audit.normalize_pattern(pattern) == normalized
+
+
+def test_catastrophic_pattern_times_out_and_audit_continues(gen):
+    results = gen.proof_audit.audit_patterns(['(a+)+$', 'receipt ok', '(unclosed'], timeout_s=0.5)
+    assert results['(a+)+$'] == {'status': 'timeout', 'max_ms': None}
+    assert results['receipt ok']['status'] == 'ok'
+    assert results['(unclosed']['status'] == 'unsupported'
+
+
+def lesson_path(gen, day):
+    lessons_dir = os.path.join(gen.BASE_DIR, 'w03', 'lessons')
+    name = next(n for n in sorted(os.listdir(lessons_dir)) if n.startswith(f'{day:02d}-'))
+    return os.path.join(lessons_dir, name)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('mode', [[], ['--stream']])
+def test_audit_refuses_a_run_that_drops_authored_patterns(gen, capsys, mode):
+    path = lesson_path(gen, 1)
+    authored = read(path)
+    assert gen.main(['--force', '--day', '1', '--audit-proof', *mode]) == 1
+    assert 'would lose authored front matter' in capsys.readouterr().out
+    assert read(path) == authored
+    assert not os.path.exists(gen.PROOF_PATTERNS_PATH)
+
+
+def test_audit_describes_the_front_matter_written(gen):
+    authored = gen.read_existing_frontmatter(lesson_path(gen, 1))
+    assert gen.main(['--force', '--day', '1', '--merge-frontmatter', '--audit-proof']) == 0
+    with open(gen.PROOF_PATTERNS_PATH, encoding='utf-8') as f:
+        table = json.load(f)
+    sources = [table['patterns'][i]['source'] for i in table['lessons'][authored['id']]]
+    assert sources == [gen.proof_audit.normalize_pattern(p) for p in authored['proof']['regex_patterns']]
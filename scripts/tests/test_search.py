@@ -0,0 +1,29 @@
+import json
+import os
+
+
+def test_search_index_ranks_and_matches_phrases(gen, tmp_path):
+    path = str(tmp_path / 'search-index.json')
+    assert gen.main(['--validate', '--search-index', path]) == 0
+    with open(path, encoding='utf-8') as f:
+        index = json.load(f)
+    hits = gen.lesson_search.search(index, '"event loop"')
+    assert hits and all('w03' in lesson_id for _, lesson_id in hits)
+    assert gen.lesson_search.search(index, '"loop event"') == []
+
+
+def test_unchanged_lessons_reuse_cached_postings(gen, tmp_path, capsys):
+    path = str(tmp_path / 'search-index.json')
+    assert gen.main(['--validate', '--search-index', path]) == 0
+    assert gen.main(['--validate', '--search-index', path]) == 0
+    assert 'unchanged (5 lessons' in capsys.readouterr().out.split('🔍')[-1]
+
+
+def test_broken_unselected_week_is_reported_not_raised(gen, tmp_path, capsys):
+    with open(os.path.join(gen.LESSON_DATA_DIR, 'w04-broken.json'), 'w') as f:
+        json.dump([{'frontmatter': {'id': 'w04-l01'}}], f)
+    path = str(tmp_path / 'search-index.json')
+
+    assert gen.main(['--week', 'w03', '--validate', '--search-index', path]) == 1
+    assert 'search index not written' in capsys.readouterr().out
+    assert not os.path.exists(path)
@@ -0,0 +1,22 @@
+import hashlib
+import json
+import os
+
+
+def test_sidecar_summary_comes_from_the_data(gen):
+    assert gen.main(['--force', '--sections', '--day', '1']) == 0
+    week_slug, path = next(iter(gen.discover_weeks().items()))
+    lesson = next(l for l in gen.load_week(week_slug, path) if l.frontmatter.order == 1)
+    filepath = gen.find_lesson_file(week_slug, 1)
+    with open(gen.sections_path(filepath), encoding='utf-8') as f:
+        document = json.load(f)
+    with open(filepath, 'rb') as f:
+        assert document['source_sha256'] == hashlib.sha256(f.read()).hexdigest()
+    assert document['source'] == os.path.basename(filepath)
+
+    summary = document['lesson_sections']
+    assert summary['goal'] == lesson.goal_intro
+    assert summary['doSteps'] == [step.title for step in lesson.do_steps]
+    assert summary['proofText'] == lesson.proof_instruction
+    assert [c['text'] for c in summary['callouts']] == [q.question for q in lesson.self_test][:5]
+    assert [item['difficulty'] for item in summary['practiceItems']][:1] == ['warmup']
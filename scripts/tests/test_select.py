@@ -0,0 +1,32 @@
+import os
+import subprocess
+
+import pytest
+
+from conftest import lesson_files
+
+
+@pytest.mark.parametrize('argv', [
+    ['--week', 'w99'],
+    ['--day', '99'],
+    ['--id', 'nope-*'],
+    ['--week', 'w03', '--day', '99'],
+    ['--check', '--id', 'nope-*'],
+    ['--stream', '--day', '99'],
+])
+def test_selectors_that_match_nothing_fail(gen, capsys, argv):
+    before = lesson_files(gen)
+    assert gen.main(argv) == 2
+    assert f"No lessons matched {' '.join(a for a in argv if a not in ('--check', '--stream'))}" \
+        in capsys.readouterr().out
+    assert lesson_files(gen) == before
+    assert not os.path.exists(gen.CACHE_PATH)
+
+
+def test_since_without_changes_is_not_an_error(gen, capsys):
+    git = ['git', '-c', 'user.name=t', '-c', 'user.email=t@t', '-C', gen.LESSON_DATA_DIR]
+    for command in (['init', '-q'], ['add', '.'], ['commit', '-qm', 'data']):
+        subprocess.run(git + command, check=True)
+    assert gen.main(['--since', 'HEAD']) == 0
+    assert gen.main(['--since', 'HEAD', '--id', 'nope-*']) == 0
+    assert 'Generated 0 files' in capsys.readouterr().out
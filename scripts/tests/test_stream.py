@@ -0,0 +1,51 @@
+import tracemalloc
+
+import pytest
+
+from conftest import lesson_files
+
+
+def test_stream_matches_a_normal_build_without_tracing(gen, capsys):
+    assert gen.main(['--force']) == 0
+    expected = lesson_files(gen)
+    assert gen.main(['--force', '--stream']) == 0
+    assert lesson_files(gen) == expected
+    assert not tracemalloc.is_tracing()
+    assert '(RSS at stage end)' in capsys.readouterr().out
+
+
+def test_trace_alloc_uses_tracemalloc(gen, capsys):
+    try:
+        assert gen.main(['--force', '--stream', '--trace-alloc']) == 0
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    assert '(traced peak)' in capsys.readouterr().out
+
+
+def test_trace_alloc_needs_stream(gen):
+    with pytest.raises(SystemExit):
+        gen.main(['--trace-alloc'])
+
+
+def test_each_stage_reports_rss_at_its_end(gen):
+    memory = gen.MemoryReport()
+    with memory.stage('grow'):
+        block = b'x' * (64 * 2**20)
+    with memory.stage('release'):
+        del block
+    assert memory.source == 'RSS at stage end'
+    assert memory.last['grow'] - memory.last['release'] > 32 * 2**20
+
+
+def test_without_proc_stages_report_peak_growth(gen, monkeypatch):
+    monkeypatch.setattr(gen, 'current_rss_bytes', lambda: None)
+    memory = gen.MemoryReport()
+    with memory.stage('grow'):
+        block = b'x' * (gen.peak_rss_bytes() + 16 * 2**20)
+    del block
+    with memory.stage('idle'):
+        pass
+    assert memory.source == 'peak RSS growth'
+    assert memory.last['grow'] > 16 * 2**20
+    assert memory.last['idle'] == 0
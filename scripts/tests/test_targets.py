@@ -0,0 +1,28 @@
+import os
+
+from conftest import lesson_files
+
+
+def test_manifest_targets_resolve_like_the_directory_index(gen):
+    assert gen.main(['--force']) == 0
+    by_index = lesson_files(gen)
+    os.remove(gen.CACHE_PATH)
+
+    assert gen.main(['--force', '--targets', 'manifest']) == 0
+    assert lesson_files(gen) == by_index
+
+
+def test_manifest_index_resolves_frozen_front_matter(gen):
+    week_slug, path = next(iter(gen.discover_weeks().items()))
+    lessons = gen.load_week(week_slug, path)
+    index = gen.ManifestIndex()
+    lesson_index = gen.LessonIndex()
+    for lesson in lessons:
+        assert index.resolve(week_slug, lesson) == lesson_index.resolve(week_slug, lesson)
+    assert index.unmatched == []
+
+
+def test_manifest_targets_check_reports_no_drift(gen, capsys):
+    assert gen.main(['--force']) == 0
+    assert gen.main(['--check', '--targets', 'manifest']) == 0
+    assert '0 drifted' in capsys.readouterr().out
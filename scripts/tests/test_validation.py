@@ -0,0 +1,53 @@
+import dataclasses
+import json
+import os
+
+from conftest import lesson_files
+
+
+def make(gen, base, lesson_id, order, prereqs=(), **changes):
+    fm = gen.Frontmatter(id=lesson_id, part='w90', title=lesson_id.upper(), order=order, prereqs=prereqs)
+    return dataclasses.replace(base, frontmatter=fm, **changes)
+
+
+def test_validate_weeks_reports_every_problem_at_once(gen):
+    week_slug, path = next(iter(gen.discover_weeks().items()))
+    base = gen.load_week(week_slug, path)[0]
+    weeks = [
+        ('w90', [make(gen, base, 'a', 1),
+                 make(gen, base, 'b', 3, done_when=()),
+                 make(gen, base, 'c', 4, prereqs=('d',)),
+                 make(gen, base, 'd', 5, prereqs=('c',))]),
+        ('w91', [make(gen, base, 'a', 1, prereqs=('ghost',))]),
+    ]
+    errors, graph = gen.validate_weeks(weeks)
+    assert sorted(errors) == sorted([
+        'b: done_when is empty',
+        'w90: lesson order is [1, 3, 4, 5], expected 1..4',
+        'a: duplicate id (also in w90)',
+        'a: prereq ghost does not exist',  # from the duplicate, which is not a graph node
+        'prerequisite cycle: c → d → c',
+    ])
+    assert list(graph.nodes) == ['a', 'b', 'c', 'd']
+
+
+def test_dangling_prereqs_are_skipped_without_check_prereqs(gen):
+    week_slug, path = next(iter(gen.discover_weeks().items()))
+    base = gen.load_week(week_slug, path)[0]
+    errors, _ = gen.validate_weeks([('w90', [make(gen, base, 'a', 1, prereqs=('ghost',))])],
+                                   check_prereqs=False)
+    assert errors == []
+
+
+def test_a_bad_week_aborts_before_anything_is_written(gen, capsys):
+    week_slug, path = next(iter(gen.discover_weeks().items()))
+    first = gen.load_week(week_slug, path)[0].to_dict()
+    with open(os.path.join(gen.LESSON_DATA_DIR, 'w04-dup.json'), 'w') as f:
+        json.dump([first], f)
+    before = lesson_files(gen)
+
+    assert gen.main(['--force']) == 1
+    out = capsys.readouterr().out
+    assert 'nothing written' in out and f"{first['frontmatter']['id']}: duplicate id" in out
+    assert lesson_files(gen) == before
+    assert not os.path.exists(gen.CACHE_PATH)
@@ -0,0 +1,64 @@
+import os
+import time
+
+import pytest
+
+
+@pytest.fixture
+def watched(tmp_path, gen, monkeypatch):
+    monkeypatch.setattr(gen.lesson_watch, 'WATCH_POLL_S', 0.01)
+    return tmp_path / 'watched'
+
+
+def touch(path, text='x'):
+    path.write_text(text)
+    # Coarse mtime clocks could otherwise hide a rewrite within the same tick.
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_polling_watcher_reports_created_changed_and_removed_files(gen, watched):
+    watched.mkdir()
+    kept = watched / 'w03.json'
+    touch(kept)
+    watcher = gen.lesson_watch.PollingWatcher([str(watched)])
+    assert watcher.wait(0.02) == set()
+
+    touch(kept, 'y')
+    touch(watched / 'w04.json')
+    touch(watched / '.w03.json.swp')
+    touch(watched / 'w03.json~')
+    assert watcher.wait(0.02) == {str(kept), str(watched / 'w04.json')}
+
+    kept.unlink()
+    assert watcher.wait(0.02) == {str(kept)}
+    assert watcher.wait(0.02) == set()
+
+
+def test_a_missing_directory_is_not_an_error(gen, watched):
+    watcher = gen.lesson_watch.PollingWatcher([str(watched)])
+    watched.mkdir()
+    touch(watched / 'w03.json')
+    assert watcher.wait(0.02) == {str(watched / 'w03.json')}
+
+
+class ScriptedWatcher:
+    """Replays batches of events; an empty batch means the debounce window stayed quiet."""
+
+    def __init__(self, *batches):
+        self.batches = list(batches)
+        self.timeouts = []
+
+    def wait(self, timeout=None):
+        self.timeouts.append(timeout)
+        return set(self.batches.pop(0))
+
+
+def test_wait_for_changes_merges_a_burst_into_one_batch(gen):
+    watcher = ScriptedWatcher({'a'}, {'a', 'b'}, {'c'}, set(), {'d'})
+    before = time.monotonic()
+    paths, last = gen.lesson_watch.wait_for_changes(watcher, debounce=0.5)
+    assert paths == {'a', 'b', 'c'}
+    assert before <= last <= time.monotonic()
+    assert watcher.timeouts == [None, 0.5, 0.5, 0.5]
+    assert watcher.batches == [{'d'}]  # the next burst is left for the next call
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def writes(gen, monkeypatch):
+    """Record every path atomic_write_bytes is asked to replace."""
+    calls = []
+    real = gen.atomic_write_bytes
+
+    def recording(filepath, data):
+        calls.append(filepath)
+        return real(filepath, data)
+    monkeypatch.setattr(gen, 'atomic_write_bytes', recording)
+    return calls
+
+
+CHUNKS = ['---\nid: x\n---\n', '# Title\n', '', 'body ' * 5000, '\nlast line']
+
+
+@pytest.mark.parametrize('old', [
+    None,                                        # no file yet
+    ''.join(CHUNKS).replace('Title', 'Tidle'),   # differs in the middle
+    'X' + ''.join(CHUNKS)[1:],                   # differs in the first byte
+    ''.join(CHUNKS)[:-3],                        # old file is shorter
+    ''.join(CHUNKS) + '\nstale tail\n',          # old file is longer
+])
+def test_stream_lesson_rewrites_changed_files(gen, tmp_path, writes, old):
+    path = tmp_path / 'lessons' / '01-x.md'
+    if old is not None:
+        path.parent.mkdir()
+        path.write_text(old)
+    changed, lines, _ = gen.stream_lesson(str(path), iter(CHUNKS))
+    assert changed
+    assert path.read_text() == ''.join(CHUNKS)
+    assert lines == ''.join(CHUNKS).count('\n') + 1
+    assert writes == [str(path)]
+    assert [p.name for p in path.parent.iterdir()] == ['01-x.md']
+
+
+def test_stream_lesson_leaves_unchanged_files_alone(gen, tmp_path, writes):
+    path = tmp_path / '01-x.md'
+    path.write_text(''.join(CHUNKS))
+    os.utime(path, ns=(0, 0))
+    changed, _, digest = gen.stream_lesson(str(path), iter(CHUNKS))
+    assert not changed
+    assert writes == []
+    assert path.stat().st_mtime_ns == 0
+    assert digest == gen.file_hash(str(path))
+
+
+def test_force_rebuild_of_unchanged_lessons_writes_nothing(gen, writes):
+    assert gen.main(['--force']) == 0
+    writes.clear()
+    assert gen.main(['--force']) == 0
+    assert [w for w in writes if w.endswith('.md')] == []
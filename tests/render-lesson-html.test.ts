@@ -0,0 +1,37 @@
+import test from "node:test";
+import assert from "node:assert/strict";
+import { markdownToHtml } from "../lib/markdown";
+
+test("sanitized lesson HTML drops raw markup and unsafe links", async () => {
+  const html = await markdownToHtml(
+    [
+      "<script>alert(1)</script>",
+      "",
+      '[a](javascript:alert(1)) [b](https://example.com) <img src=x onerror="alert(1)">',
+      "",
+      "| <iframe src=x></iframe> | b |",
+      "|---|---|",
+    ].join("\n"),
+    { sanitize: true },
+  );
+  assert.ok(!html.includes("<script"));
+  assert.ok(!html.includes("<iframe"));
+  assert.ok(!html.includes("onerror"));
+  assert.ok(!html.includes("javascript:"));
+  assert.match(html, /<a href="https:\/\/example\.com">b<\/a>/);
+});
+
+test("sanitized lesson HTML keeps code languages, tables and task lists", async () => {
+  const html = await markdownToHtml(
+    ["```rust", "fn main() {}", "```", "", "| a | b |", "|---|---|", "| 1 | 2 |", "", "- [x] done"].join("\n"),
+    { sanitize: true },
+  );
+  assert.match(html, /<code class="language-rust">/);
+  assert.match(html, /<table>/);
+  assert.match(html, /type="checkbox"/);
+});
+
+test("markdownToHtml still renders unsanitized by default", async () => {
+  const html = await markdownToHtml("<kbd>Ctrl</kbd>");
+  assert.match(html, /<kbd>Ctrl<\/kbd>/);
+});